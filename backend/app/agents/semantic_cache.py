@@ -0,0 +1,253 @@
+"""
+Semantic Identification Cache
+Reuses specialist identifications for text-only discoveries whose description
+means the same as one seen before ("a little red bug with black dots" /
+"small red beetle with black spots").
+
+Descriptions are embedded (SEMANTIC_SIMILARITY) and looked up in a vector
+index with one partition per specialist. The nearest previous identification
+is reused when its cosine similarity reaches SEMANTIC_CACHE_THRESHOLD and it is
+younger than SEMANTIC_CACHE_TTL_DAYS; expired neighbours are skipped and
+removed. Only confident identifications are stored. Entries are shared by all
+users, so they hold just the description's embedding, the model's answer and
+when it was stored, never the child's text. A full partition drops its expired
+entries, then its oldest ones, to make room.
+
+Hit quality: counters at /metrics (semantic_cache_*), including the summed
+similarity of hits and near misses just under the threshold. A sample of hits
+(SEMANTIC_CACHE_AUDIT_RATE) is re-identified by the model in the background
+and compared. If the audited mismatch rate passes
+SEMANTIC_CACHE_MAX_MISMATCH_RATE, the cache switches itself off.
+SEMANTIC_CACHE_ENABLED=false is the manual kill switch.
+"""
+from app.memory.embeddings import get_embedder
+from app.memory.vector_db import VectorDBClient, np
+from app.utils.metrics import metrics
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+import asyncio
+import logging
+import random
+import re
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Placeholder descriptions the frontend sends when the child typed nothing
+PLACEHOLDER_DESCRIPTIONS = {"", "i found something!", "i found this!"}
+
+# Misses this close under the threshold are counted as near misses (for tuning)
+NEAR_MISS_MARGIN = 0.05
+
+# Audits needed before the mismatch rate can switch the cache off
+MIN_AUDITS = 20
+
+# Neighbours read per lookup, so expired entries don't hide a valid one behind them
+LOOKUP_NEIGHBOURS = 5
+
+# Share of a full partition evicted (oldest first) once expired entries are gone
+EVICT_FRACTION = 0.1
+
+
+def _normalize_description(description: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", (description or "").strip().lower())
+
+
+def _same_identification(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+    """Whether two specialist outputs name the same thing."""
+    def names(output: Dict[str, Any]) -> Set[str]:
+        return {
+            _normalize_description(output.get(field))
+            for field in ("scientific_name", "common_name")
+            if output.get(field)
+        }
+    return bool(names(first) & names(second))
+
+
+class SemanticCache:
+    """Similarity cache for text-only specialist identifications (see module docstring)."""
+
+    def __init__(
+        self,
+        index: VectorDBClient,
+        embedder,
+        threshold: float = 0.9,
+        ttl_days: float = 30,
+        min_confidence: float = 0.5,
+        max_entries: int = 50000,
+        audit_rate: float = 0.05,
+        max_mismatch_rate: float = 0.2
+    ):
+        """
+        Args:
+            index: Vector index for cached identifications (one partition per specialist)
+            embedder: HashingEmbedder or GeminiEmbedder
+            threshold: Cosine similarity a neighbour needs to be reused
+            ttl_days: Age after which an entry is no longer reused
+            min_confidence: Identifications below this confidence aren't stored
+            max_entries: Entries per specialist; the oldest make room past it
+            audit_rate: Fraction of hits re-identified by the model to measure quality
+            max_mismatch_rate: Audited mismatch rate that switches the cache off
+        """
+        self.index = index
+        self.embedder = embedder
+        self.threshold = threshold
+        self.ttl = timedelta(days=ttl_days)
+        self.min_confidence = min_confidence
+        self.max_entries = max_entries
+        self.audit_rate = audit_rate
+        self.max_mismatch_rate = max_mismatch_rate
+        self.enabled = True
+        self._audits: Set[asyncio.Task] = set()
+
+    def usable(self, description: Optional[str]) -> bool:
+        """Whether a description is worth caching (not empty or a placeholder)."""
+        return self.enabled and _normalize_description(description) not in PLACEHOLDER_DESCRIPTIONS
+
+    async def _embed(self, description: str):
+        return (await self.embedder.embed([_normalize_description(description)], task_type="SEMANTIC_SIMILARITY"))[0]
+
+    async def lookup(
+        self,
+        specialist: str,
+        description: str,
+        identify: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """
+        Return a cached identification for a similar description, or call
+        `identify` and cache its result.
+
+        Args:
+            specialist: Specialist agent name (the index partition)
+            description: The child's description
+            identify: Runs the model (SpecialistAgent.analyze without the cache)
+
+        Returns:
+            SpecialistOutput dict
+        """
+        try:
+            embedding = await self._embed(description)
+            hits = await self.index.search(specialist, embedding, top_k=LOOKUP_NEIGHBOURS)
+            expired = [hit["id"] for hit in hits if self._expired(hit["metadata"])]
+            if expired:
+                await self.index.delete(specialist, expired)
+                metrics.increment("semantic_cache_expired", len(expired))
+        except Exception as e:
+            logger.error(f"Semantic cache lookup failed for {specialist}: {str(e)}")
+            return await identify()
+
+        metrics.increment("semantic_cache_lookups")
+        hit = next((hit for hit in hits if hit["id"] not in expired), None)
+        if hit and hit["score"] >= self.threshold:
+            metrics.increment("semantic_cache_hits")
+            metrics.increment("semantic_cache_hit_similarity_sum", hit["score"])
+            result = dict(hit["metadata"]["result"])
+            if random.random() < self.audit_rate:
+                self._audit(specialist, result, identify)
+            return result
+
+        metrics.increment("semantic_cache_misses")
+        if hit and hit["score"] >= self.threshold - NEAR_MISS_MARGIN:
+            metrics.increment("semantic_cache_near_misses")
+
+        result = await identify()
+        await self._store(specialist, embedding, result)
+        return result
+
+    def _expired(self, metadata: Dict[str, Any]) -> bool:
+        stored_at = metadata.get("stored_at")
+        return not stored_at or datetime.utcnow() - datetime.fromisoformat(stored_at) > self.ttl
+
+    async def _store(self, specialist: str, embedding, result: Dict[str, Any]) -> None:
+        """Cache a confident identification, making room first if the partition is full."""
+        if (result.get("identification_confidence") or 0) < self.min_confidence:
+            return
+        try:
+            if await self.index.count(specialist) >= self.max_entries:
+                await self._make_room(specialist)
+            await self.index.store(specialist, uuid.uuid4().hex, embedding, {
+                "result": result,
+                "stored_at": datetime.utcnow().isoformat()
+            })
+            metrics.increment("semantic_cache_stores")
+        except Exception as e:
+            logger.error(f"Semantic cache store failed for {specialist}: {str(e)}")
+
+    async def _make_room(self, specialist: str) -> None:
+        """Drop expired entries, or the oldest EVICT_FRACTION if none have expired."""
+        entries = await self.index.entries(specialist)
+        doomed = [entry_id for entry_id, metadata in entries if self._expired(metadata)]
+        if not doomed:
+            oldest = sorted(entries, key=lambda entry: entry[1].get("stored_at") or "")
+            doomed = [entry_id for entry_id, _ in oldest[:max(1, int(len(entries) * EVICT_FRACTION))]]
+        await self.index.delete(specialist, doomed)
+        metrics.increment("semantic_cache_evictions", len(doomed))
+
+    def _audit(self, specialist: str, cached: Dict[str, Any], identify: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        """Re-identify in the background and compare with the reused result."""
+        async def audit() -> None:
+            fresh = await identify()
+            if fresh.get("species") == "Unknown":
+                return  # the model call failed; nothing to compare
+            metrics.increment("semantic_cache_audits")
+            if not _same_identification(cached, fresh):
+                metrics.increment("semantic_cache_audit_mismatches")
+                logger.info(
+                    f"Semantic cache mismatch ({specialist}): reused "
+                    f"{cached.get('common_name')!r}, model said {fresh.get('common_name')!r}"
+                )
+            self._check_quality()
+
+        task = asyncio.create_task(audit())
+        self._audits.add(task)
+        task.add_done_callback(self._audits.discard)
+
+    def _check_quality(self) -> None:
+        audits = metrics.get("semantic_cache_audits")
+        if audits < MIN_AUDITS:
+            return
+        mismatch_rate = metrics.get("semantic_cache_audit_mismatches") / audits
+        if mismatch_rate > self.max_mismatch_rate and self.enabled:
+            self.enabled = False
+            metrics.increment("semantic_cache_tripped")
+            logger.error(
+                f"Semantic cache switched off: {mismatch_rate:.0%} of {int(audits)} audited hits disagreed "
+                f"with the model (limit {self.max_mismatch_rate:.0%})"
+            )
+
+    async def start(self) -> None:
+        await self.index.start()
+
+    async def stop(self) -> None:
+        """Wait for running audits, then save the index."""
+        if self._audits:
+            await asyncio.gather(*self._audits, return_exceptions=True)
+        await self.index.stop()
+
+
+# Global cache instance (lazy-initialized)
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """The shared semantic cache, or None when it is switched off or numpy is missing."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        from app.config.settings import (
+            SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_DIR, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL_DAYS,
+            SEMANTIC_CACHE_MIN_CONFIDENCE, SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_AUDIT_RATE,
+            SEMANTIC_CACHE_MAX_MISMATCH_RATE, VECTOR_IVF_THRESHOLD, VECTOR_IVF_NPROBE, VECTOR_FLUSH_SECONDS
+        )
+        if not SEMANTIC_CACHE_ENABLED or np is None:
+            return None
+        _semantic_cache = SemanticCache(
+            VectorDBClient(SEMANTIC_CACHE_DIR, VECTOR_IVF_THRESHOLD, VECTOR_IVF_NPROBE, VECTOR_FLUSH_SECONDS),
+            get_embedder(),
+            SEMANTIC_CACHE_THRESHOLD,
+            SEMANTIC_CACHE_TTL_DAYS,
+            SEMANTIC_CACHE_MIN_CONFIDENCE,
+            SEMANTIC_CACHE_MAX_ENTRIES,
+            SEMANTIC_CACHE_AUDIT_RATE,
+            SEMANTIC_CACHE_MAX_MISMATCH_RATE
+        )
+    return _semantic_cache
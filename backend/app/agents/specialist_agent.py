@@ -2,9 +2,22 @@
 Specialist Agents - Domain experts for plant, insect, and animal identification.
 Uses Gemini API for species identification and fact generation.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List
 from app.utils.gemini_client import get_gemini_client
+from app.agents.semantic_cache import get_semantic_cache
 from app.models.discovery import SpecialistOutput
+import asyncio
+
+
+SPECIALIST_SCHEMA = {
+    "species": "string",
+    "common_name": "string",
+    "scientific_name": "string or null",
+    "facts": "array of strings",
+    "habitat": "string",
+    "conservation_status": "string or null",
+    "identification_confidence": "number"
+}
 
 
 class SpecialistAgent:
@@ -14,16 +27,8 @@ class SpecialistAgent:
         self.name = name
         self.domain = domain
         self.client = get_gemini_client()
-        
-    async def analyze(self, discovery_input: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Analyze a discovery from this specialist's domain perspective.
-        Uses image data when available, falls back to text description.
-        """
-        description = discovery_input.get("discovery_description", "I found something!")
-        image_base64 = discovery_input.get("media_data", "")
-
-        system_instruction = f"""You are a {self.domain} expert teaching children aged 5-10 about nature.
+        self.cache = get_semantic_cache()
+        self.system_instruction = f"""You are a {self.domain} expert teaching children aged 5-10 about nature.
 Your job is to identify {self.domain.lower()} and share fascinating, age-appropriate facts.
 
 Guidelines:
@@ -33,6 +38,23 @@ Guidelines:
 - Include conservation status if relevant
 - Be enthusiastic and encouraging"""
 
+    async def analyze(self, discovery_input: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyze a discovery from this specialist's domain perspective.
+        Uses image data when available, falls back to text description.
+        Text-only identifications go through the semantic cache.
+        """
+        description = discovery_input.get("discovery_description", "I found something!")
+        if not discovery_input.get("media_data") and self.cache is not None and self.cache.usable(description):
+            return await self.cache.lookup(self.name, description, lambda: self._identify(discovery_input))
+        return await self._identify(discovery_input)
+
+    async def _identify(self, discovery_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Ask the model (never cached)."""
+        description = discovery_input.get("discovery_description", "I found something!")
+        image_base64 = discovery_input.get("media_data", "")
+        system_instruction = self.system_instruction
+
         prompt = f"""A child has discovered this {self.domain.lower()}.
 {f'They described it as: {description}' if description and description != 'I found this!' else ''}
 
@@ -47,15 +69,7 @@ Identify it and share interesting facts. Respond as JSON:
     "identification_confidence": <0.0 to 1.0>
 }}"""
 
-        schema = {
-            "species": "string",
-            "common_name": "string",
-            "scientific_name": "string or null",
-            "facts": "array of strings",
-            "habitat": "string",
-            "conservation_status": "string or null",
-            "identification_confidence": "number"
-        }
+        schema = SPECIALIST_SCHEMA
 
         try:
             # Use image if available, otherwise fall back to text
@@ -75,30 +89,92 @@ Identify it and share interesting facts. Respond as JSON:
                     temperature=0.7
                 )
 
-            result = SpecialistOutput(
-                agent_name=self.name,
-                species=response.get("species"),
-                common_name=response.get("common_name"),
-                scientific_name=response.get("scientific_name"),
-                facts=response.get("facts", []),
-                habitat=response.get("habitat"),
-                conservation_status=response.get("conservation_status"),
-                identification_confidence=response.get("identification_confidence", 0.0)
-            )
-
-            return result.to_dict()
+            return self._to_output(response)
 
         except Exception as e:
             print(f"{self.name} error: {e}")
             # Return fallback response
-            return SpecialistOutput(
-                agent_name=self.name,
-                species="Unknown",
-                common_name="Mystery Discovery",
-                facts=["This is an interesting discovery!", "Let's learn more about it together!"],
-                habitat="Unknown",
-                identification_confidence=0.3
-            ).to_dict()
+            return self._fallback_output()
+
+    async def analyze_batch(
+        self,
+        discovery_inputs: List[Dict[str, Any]],
+        images_per_call: int = 4
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several discoveries, packing images into shared multimodal calls.
+
+        Inputs with images are identified `images_per_call` at a time; image-less
+        inputs (and any chunk whose batched call fails) go through analyze().
+
+        Returns:
+            One SpecialistOutput dict per input, in input order
+        """
+        results: List[Dict[str, Any]] = [{}] * len(discovery_inputs)
+        with_images = [i for i, d in enumerate(discovery_inputs) if d.get("media_data")]
+        without_images = [i for i, d in enumerate(discovery_inputs) if not d.get("media_data")]
+
+        async def identify_chunk(indexes: List[int]) -> None:
+            if len(indexes) == 1:
+                results[indexes[0]] = await self.analyze(discovery_inputs[indexes[0]])
+                return
+
+            descriptions = "\n".join(
+                f"- Image {n + 1}: {discovery_inputs[i].get('discovery_description') or 'no description'}"
+                for n, i in enumerate(indexes)
+            )
+            prompt = f"""A child has discovered these {self.domain.lower()}.
+What they said about each one:
+{descriptions}
+
+Identify each one and share interesting facts."""
+
+            try:
+                responses = await self.client.generate_with_images(
+                    images_base64=[discovery_inputs[i]["media_data"] for i in indexes],
+                    prompt=prompt,
+                    schema=SPECIALIST_SCHEMA,
+                    system_instruction=self.system_instruction,
+                    temperature=0.7
+                )
+                for i, response in zip(indexes, responses):
+                    results[i] = self._to_output(response)
+            except Exception as e:
+                print(f"{self.name} batch error, falling back to single calls: {e}")
+                singles = await asyncio.gather(*(self.analyze(discovery_inputs[i]) for i in indexes))
+                for i, result in zip(indexes, singles):
+                    results[i] = result
+
+        chunks = [
+            with_images[start:start + images_per_call]
+            for start in range(0, len(with_images), images_per_call)
+        ]
+        chunks.extend([i] for i in without_images)
+        await asyncio.gather(*(identify_chunk(chunk) for chunk in chunks))
+
+        return results
+
+    def _to_output(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        return SpecialistOutput(
+            agent_name=self.name,
+            species=response.get("species"),
+            common_name=response.get("common_name"),
+            scientific_name=response.get("scientific_name"),
+            facts=response.get("facts", []),
+            habitat=response.get("habitat"),
+            conservation_status=response.get("conservation_status"),
+            identification_confidence=response.get("identification_confidence", 0.0)
+        ).to_dict()
+
+    def _fallback_output(self) -> Dict[str, Any]:
+        return SpecialistOutput(
+            agent_name=self.name,
+            species="Unknown",
+            common_name="Mystery Discovery",
+            facts=["This is an interesting discovery!", "Let's learn more about it together!"],
+            habitat="Unknown",
+            identification_confidence=0.3
+        ).to_dict()
 
 
 
@@ -4,14 +4,101 @@ Provides middleware and utilities for authenticating API requests using Firebase
 """
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from app.config.settings import (
+    AUTH_MODE,
+    AUTH_TOKEN_CACHE_SIZE,
+    AUTH_CHECK_REVOKED,
+    AUTH_REVOCATION_RECHECK_SECONDS
+)
+from app.utils.ttl_cache import TTLCache
 from typing import Dict, Optional
+import asyncio
+import hashlib
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 # HTTP Bearer token security scheme
 security = HTTPBearer()
 
+# Verified tokens by SHA-256 digest ({"claims", "verified_at"}), each kept until its `exp`
+_verified_tokens: TTLCache[Dict] = TTLCache(
+    ttl_seconds=3600,
+    max_entries=AUTH_TOKEN_CACHE_SIZE,
+    name="auth_token"
+)
+
+if AUTH_MODE == "local":
+    logger.warning("AUTH_MODE=local: accepting locally signed tokens, not Firebase ID tokens")
+
+# uid -> cached verifications older than this are redone (see forget_user_tokens).
+# Kept as long as a cached verification can live, after which none predate it.
+_revoked_before: TTLCache[float] = TTLCache(
+    ttl_seconds=_verified_tokens.ttl_seconds,
+    max_entries=AUTH_TOKEN_CACHE_SIZE,
+    name="auth_revocation"
+)
+
+
+def _verify_sync(token: str, check_revoked: bool) -> Dict:
+    """Verify a token (blocking: signature check, and a cert or revocation fetch if needed)."""
+    if AUTH_MODE == "local":
+        from app.auth.local_tokens import verify_local_token
+        return verify_local_token(token)
+
+    from firebase_admin import auth
+    return auth.verify_id_token(token, check_revoked=check_revoked)
+
+
+async def verify_token(token: str, check_revoked: bool = AUTH_CHECK_REVOKED) -> Dict:
+    """
+    Verify an ID token, using the cache of already verified tokens.
+
+    A cached token is trusted until its `exp`. With check_revoked, entries are
+    only trusted for AUTH_REVOCATION_RECHECK_SECONDS before the revocation
+    check runs again. Verification runs on a worker thread so RSA checks and
+    certificate fetches don't block the event loop. Failures are never cached.
+
+    Args:
+        token: Encoded ID token
+        check_revoked: Also ask Firebase whether the token was revoked
+
+    Returns:
+        Decoded token claims (a copy; safe to modify)
+
+    Raises:
+        firebase_admin.auth errors: If the token is invalid, expired or revoked
+    """
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    now = time.time()
+
+    cached = _verified_tokens.get(digest)
+    if cached is not None and cached["claims"].get("exp", 0) > now:
+        forgotten_at = _revoked_before.get(cached["claims"].get("uid"))
+        if forgotten_at is None or cached["verified_at"] >= forgotten_at:
+            return dict(cached["claims"])
+        # Re-verify, checking revocation this time
+        check_revoked = True
+
+    decoded = await asyncio.to_thread(_verify_sync, token, check_revoked)
+
+    ttl = decoded.get("exp", now) - now
+    if check_revoked:
+        ttl = min(ttl, AUTH_REVOCATION_RECHECK_SECONDS)
+    _verified_tokens.set(digest, {"claims": decoded, "verified_at": time.time()}, ttl_seconds=ttl)
+
+    return dict(decoded)
+
+
+def forget_user_tokens(uid: str) -> None:
+    """
+    Stop trusting this instance's cached verifications for a user (e.g. after
+    revoking their refresh tokens). Their next request re-verifies with a
+    revocation check.
+    """
+    _revoked_before.set(uid, time.time())
+
 
 async def verify_firebase_token(
     credentials: HTTPAuthorizationCredentials = Security(security)
@@ -41,25 +128,18 @@ async def verify_firebase_token(
             return {"user_id": user_id}
         ```
     """
-    from app.config.firebase_config import FirebaseConfig
     from firebase_admin import auth
     
     try:
         # Extract token from credentials
         token = credentials.credentials
         
-        # Verify the ID token with Firebase
-        decoded_token = auth.verify_id_token(token)
+        # Verify the ID token (cached until it expires)
+        decoded_token = await verify_token(token)
         
-        logger.info(f"Token verified for user: {decoded_token.get('uid')}")
+        logger.debug(f"Token verified for user: {decoded_token.get('uid')}")
         return decoded_token
         
-    except auth.InvalidIdTokenError:
-        logger.warning("Invalid Firebase ID token provided")
-        raise HTTPException(
-            status_code=401, 
-            detail="Invalid authentication token"
-        )
     except auth.ExpiredIdTokenError:
         logger.warning("Expired Firebase ID token provided")
         raise HTTPException(
@@ -72,6 +152,13 @@ async def verify_firebase_token(
             status_code=401,
             detail="Authentication token has been revoked"
         )
+    except auth.InvalidIdTokenError:
+        # Checked last: the expired/revoked errors are subclasses of it
+        logger.warning("Invalid Firebase ID token provided")
+        raise HTTPException(
+            status_code=401, 
+            detail="Invalid authentication token"
+        )
     except Exception as e:
         logger.error(f"Token verification failed: {str(e)}")
         raise HTTPException(
@@ -168,9 +255,7 @@ async def optional_auth(
         return None
     
     try:
-        from firebase_admin import auth
-        token = creds.credentials
-        return auth.verify_id_token(token)
+        return await verify_token(creds.credentials)
     except Exception as e:
         logger.debug(f"Optional auth failed: {str(e)}")
         return None
@@ -0,0 +1,132 @@
+"""
+Local Signing Key
+Stand-in for Firebase ID tokens when AUTH_MODE=local.
+
+Tokens are RS256 JWTs, like Firebase's, signed with a key kept on disk
+(generated on first use). Verification costs about the same as a real
+Firebase check, minus the certificate fetch. Use this for offline
+development and for benchmarking auth throughput. Never enable it in
+production.
+"""
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from firebase_admin import auth
+from jose import jwt, ExpiredSignatureError, JWTError
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "RS256"
+ISSUER = "local-auth"
+
+_keys: Optional[Dict[str, bytes]] = None
+
+
+def _load_keys() -> Dict[str, bytes]:
+    """Load the signing key pair, generating it on first use."""
+    global _keys
+    if _keys is None:
+        from app.config.settings import AUTH_LOCAL_KEY_FILE
+        key_path = Path(AUTH_LOCAL_KEY_FILE)
+
+        if key_path.exists():
+            private_key = serialization.load_pem_private_key(key_path.read_bytes(), password=None)
+        else:
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            key_path.parent.mkdir(parents=True, exist_ok=True)
+            key_path.write_bytes(private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption()
+            ))
+            os.chmod(key_path, 0o600)
+            logger.info(f"Generated local signing key at {key_path}")
+
+        _keys = {
+            "private": private_key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption()
+            ),
+            "public": private_key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo
+            )
+        }
+    return _keys
+
+
+def issue_local_token(
+    uid: str,
+    email: Optional[str] = None,
+    name: Optional[str] = None,
+    ttl_seconds: int = 3600
+) -> str:
+    """
+    Sign a Firebase-shaped ID token with the local key.
+
+    Args:
+        uid: User ID (becomes `sub` and `uid`)
+        email: Optional email claim
+        name: Optional display name claim
+        ttl_seconds: Lifetime of the token
+
+    Returns:
+        Encoded JWT
+    """
+    now = int(time.time())
+    claims = {
+        "iss": ISSUER,
+        "aud": ISSUER,
+        "sub": uid,
+        "uid": uid,
+        "iat": now,
+        "auth_time": now,
+        "exp": now + ttl_seconds
+    }
+    if email:
+        claims["email"] = email
+    if name:
+        claims["name"] = name
+    return jwt.encode(claims, _load_keys()["private"], algorithm=ALGORITHM)
+
+
+def verify_local_token(token: str) -> Dict:
+    """
+    Verify a token issued by issue_local_token(). Blocking; run off the event loop.
+
+    Raises:
+        auth.ExpiredIdTokenError: If the token has expired
+        auth.InvalidIdTokenError: If the signature or claims are invalid
+    """
+    try:
+        decoded = jwt.decode(token, _load_keys()["public"], algorithms=[ALGORITHM], audience=ISSUER, issuer=ISSUER)
+    except ExpiredSignatureError as e:
+        raise auth.ExpiredIdTokenError("Token expired", e)
+    except JWTError as e:
+        raise auth.InvalidIdTokenError(f"Invalid local token: {str(e)}", e)
+
+    decoded.setdefault("uid", decoded["sub"])
+    return decoded
+
+
+def main() -> None:
+    """Print a local token: python -m app.auth.local_tokens --uid <uid> [--email ...]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Issue a locally signed ID token (AUTH_MODE=local)")
+    parser.add_argument("--uid", required=True)
+    parser.add_argument("--email")
+    parser.add_argument("--name")
+    parser.add_argument("--ttl", type=int, default=3600, help="Lifetime in seconds")
+    args = parser.parse_args()
+
+    print(issue_local_token(args.uid, email=args.email, name=args.name, ttl_seconds=args.ttl))
+
+
+if __name__ == "__main__":
+    main()
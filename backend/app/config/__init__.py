@@ -12,5 +12,49 @@ __all__ = [
     'DEBUG',
     'LOG_LEVEL',
     'API_VERSION',
-    'API_PREFIX'
+    'API_PREFIX',
+    'AUTH_MODE',
+    'AUTH_LOCAL_KEY_FILE',
+    'AUTH_TOKEN_CACHE_SIZE',
+    'AUTH_CHECK_REVOKED',
+    'AUTH_REVOCATION_RECHECK_SECONDS',
+    'JOB_WORKERS',
+    'JOB_SPOOL_DIR',
+    'BATCH_MAX_DISCOVERIES',
+    'BATCH_IMAGES_PER_CALL',
+    'DISCOVERY_COUNTERS',
+    'WRITE_BUFFER_FLUSH_SECONDS',
+    'USER_CACHE_TTL_SECONDS',
+    'USER_CACHE_MAX_ENTRIES',
+    'CONTEXT_CACHE_TTL_SECONDS',
+    'CONTEXT_CACHE_MAX_ENTRIES',
+    'REPOSITORY_BACKEND',
+    'SQLITE_PATH',
+    'FIRESTORE_LAYOUT',
+    'COMPRESSION_MIN_BYTES',
+    'GZIP_LEVEL',
+    'BROTLI_QUALITY',
+    'IMAGE_STORE',
+    'IMAGE_DIR',
+    'IMAGE_BUCKET',
+    'IMAGE_BASE_URL',
+    'IMAGE_MAX_BYTES',
+    'IMAGE_WORKERS',
+    'VECTOR_DIR',
+    'VECTOR_IVF_THRESHOLD',
+    'VECTOR_IVF_NPROBE',
+    'VECTOR_FLUSH_SECONDS',
+    'VECTOR_MAX_PARTITIONS',
+    'EMBEDDING_BACKEND',
+    'EMBEDDING_MODEL',
+    'EMBEDDING_BATCH_SIZE',
+    'EMBEDDING_FLUSH_SECONDS',
+    'SEMANTIC_CACHE_ENABLED',
+    'SEMANTIC_CACHE_DIR',
+    'SEMANTIC_CACHE_THRESHOLD',
+    'SEMANTIC_CACHE_TTL_DAYS',
+    'SEMANTIC_CACHE_MIN_CONFIDENCE',
+    'SEMANTIC_CACHE_MAX_ENTRIES',
+    'SEMANTIC_CACHE_AUDIT_RATE',
+    'SEMANTIC_CACHE_MAX_MISMATCH_RATE'
 ]
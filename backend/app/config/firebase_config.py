@@ -3,7 +3,7 @@ Firebase Configuration Module
 Handles Firebase Admin SDK initialization and provides access to Firebase services.
 """
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, firestore, firestore_async, auth
 from pathlib import Path
 from typing import Optional
 import logging
@@ -18,6 +18,7 @@ class FirebaseConfig:
     """
     _initialized: bool = False
     _firestore_client: Optional[firestore.Client] = None
+    _async_firestore_client: Optional[firestore.AsyncClient] = None
     _app: Optional[firebase_admin.App] = None
     
     @classmethod
@@ -92,6 +93,24 @@ class FirebaseConfig:
         
         return cls._firestore_client
     
+    @classmethod
+    def get_async_firestore(cls) -> firestore.AsyncClient:
+        """
+        Get the asyncio Firestore client instance.
+        Use this from async code so Firestore round trips don't block the event loop.
+        Initializes Firebase if not already initialized.
+        
+        Returns:
+            Async Firestore client instance
+        """
+        if not cls._initialized:
+            cls.initialize()
+        
+        if cls._async_firestore_client is None:
+            cls._async_firestore_client = firestore_async.client()
+        
+        return cls._async_firestore_client
+    
     @classmethod
     def get_auth(cls):
         """
@@ -37,3 +37,89 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 # API Settings
 API_VERSION = "v1"
 API_PREFIX = f"/api/{API_VERSION}"
+
+# Authentication
+# "firebase" verifies Firebase ID tokens; "local" verifies tokens signed with a
+# local key (offline development and auth benchmarks only; see app/auth/local_tokens.py)
+AUTH_MODE = os.getenv("AUTH_MODE", "firebase").lower()
+AUTH_LOCAL_KEY_FILE = os.getenv("AUTH_LOCAL_KEY_FILE", str(backend_dir / ".data" / "local-signing-key.pem"))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_CHECK_REVOKED = os.getenv("AUTH_CHECK_REVOKED", "false").lower() == "true"
+AUTH_REVOCATION_RECHECK_SECONDS = float(os.getenv("AUTH_REVOCATION_RECHECK_SECONDS", "300"))
+
+# Background Jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", str(backend_dir / ".jobs"))
+
+# Batch Ingestion
+BATCH_MAX_DISCOVERIES = int(os.getenv("BATCH_MAX_DISCOVERIES", "50"))
+BATCH_IMAGES_PER_CALL = int(os.getenv("BATCH_IMAGES_PER_CALL", "4"))
+
+# Discovery Counters
+# Maintain a per-user counter document on save instead of running an
+# aggregation query for every count
+DISCOVERY_COUNTERS = os.getenv("DISCOVERY_COUNTERS", "false").lower() == "true"
+
+# Write-Behind Buffer (last_active and other low-value writes)
+WRITE_BUFFER_FLUSH_SECONDS = float(os.getenv("WRITE_BUFFER_FLUSH_SECONDS", "5"))
+
+# User Profile Cache (read-through, per instance)
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+# Discovery Context Cache (per-child snapshots used by ContextLoader)
+CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "600"))
+CONTEXT_CACHE_MAX_ENTRIES = int(os.getenv("CONTEXT_CACHE_MAX_ENTRIES", "5000"))
+
+# Repository Backend
+# "firestore" (default), "sqlite" (single-node, WAL file at SQLITE_PATH) or
+# "memory" (nothing persisted; local profiling and load tests)
+REPOSITORY_BACKEND = os.getenv("REPOSITORY_BACKEND", "firestore").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", str(backend_dir / ".data" / "explorer.db"))
+# Firestore discovery layout: "flat" (top-level discoveries collection) or
+# "nested" (users/{uid}/children/{child_id}/discoveries); see app/tools/migrate_layout.py
+FIRESTORE_LAYOUT = os.getenv("FIRESTORE_LAYOUT", "flat").lower()
+
+# Response Compression (gzip; brotli too when the `brotli` package is installed)
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Image Storage
+# "local" (files under IMAGE_DIR, served by /api/images), "bucket" (Cloud
+# Storage bucket IMAGE_BUCKET) or "none" (don't keep photos)
+IMAGE_STORE = os.getenv("IMAGE_STORE", "local").lower()
+IMAGE_DIR = os.getenv("IMAGE_DIR", str(backend_dir / ".data" / "images"))
+IMAGE_BUCKET = os.getenv("IMAGE_BUCKET")
+# Prefix for image URLs (a CDN, or the API origin); empty = paths relative to the API
+IMAGE_BASE_URL = os.getenv("IMAGE_BASE_URL", "")
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# Vector Index (episodic memory search; needs numpy)
+# Per-user partitions under VECTOR_DIR. A partition switches from exact
+# (flat) search to an IVF index once it holds VECTOR_IVF_THRESHOLD vectors.
+VECTOR_DIR = os.getenv("VECTOR_DIR", str(backend_dir / ".data" / "vectors"))
+VECTOR_IVF_THRESHOLD = int(os.getenv("VECTOR_IVF_THRESHOLD", "4096"))
+VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+VECTOR_FLUSH_SECONDS = float(os.getenv("VECTOR_FLUSH_SECONDS", "10"))
+VECTOR_MAX_PARTITIONS = int(os.getenv("VECTOR_MAX_PARTITIONS", "256"))
+
+# Memory Embeddings
+# "gemini" (embedding API) or "hashing" (local stand-in, no network); defaults
+# to gemini when GEMINI_API_KEY is set
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "gemini" if GEMINI_API_KEY else "hashing").lower()
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "gemini-embedding-001")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_FLUSH_SECONDS = float(os.getenv("EMBEDDING_FLUSH_SECONDS", "2"))
+
+# Semantic Identification Cache (text-only specialist calls; see app/agents/semantic_cache.py)
+# SEMANTIC_CACHE_ENABLED=false is the kill switch
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_DIR = os.getenv("SEMANTIC_CACHE_DIR", str(backend_dir / ".data" / "semantic_cache"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_TTL_DAYS = float(os.getenv("SEMANTIC_CACHE_TTL_DAYS", "30"))
+SEMANTIC_CACHE_MIN_CONFIDENCE = float(os.getenv("SEMANTIC_CACHE_MIN_CONFIDENCE", "0.5"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "50000"))
+SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05"))
+SEMANTIC_CACHE_MAX_MISMATCH_RATE = float(os.getenv("SEMANTIC_CACHE_MAX_MISMATCH_RATE", "0.2"))
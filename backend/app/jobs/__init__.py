@@ -0,0 +1,26 @@
+"""Background jobs package."""
+from .queue import Job, JobQueue, JobStatus, get_job_queue
+from .discovery_jobs import (
+    DiscoveryJobHandler,
+    DiscoveryBatchJobHandler,
+    FINALIZE_DISCOVERY,
+    FINALIZE_DISCOVERY_BATCH,
+    build_discovery_record,
+    parse_timestamp
+)
+from .account_jobs import AccountDeletionJobHandler, DELETE_ACCOUNT
+
+__all__ = [
+    'Job',
+    'JobQueue',
+    'JobStatus',
+    'get_job_queue',
+    'DiscoveryJobHandler',
+    'DiscoveryBatchJobHandler',
+    'FINALIZE_DISCOVERY',
+    'FINALIZE_DISCOVERY_BATCH',
+    'build_discovery_record',
+    'parse_timestamp',
+    'AccountDeletionJobHandler',
+    'DELETE_ACCOUNT'
+]
@@ -0,0 +1,118 @@
+"""
+Account Jobs
+Background deletion of everything stored for a user.
+"""
+from app.auth.firebase_auth import forget_user_tokens
+from app.jobs.queue import Job
+from app.orchestrator.context_loader import invalidate_context
+from app.storage.image_store import digest_from_url
+from typing import Any, Dict, List
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DELETE_ACCOUNT = "account.delete"
+
+# Image reference checks and deletes in flight at once
+IMAGE_DELETE_CONCURRENCY = 8
+
+
+class AccountDeletionJobHandler:
+    """
+    Handles DELETE_ACCOUNT jobs.
+
+    Order: discoveries (with their tombstones, change version and counter),
+    then stored images nobody else references, then the stats rollup, child
+    context, profile and remembered episodes, and finally this instance's caches. Every step is
+    idempotent. Image URLs are checkpointed into the spooled payload before
+    their discoveries are deleted, so a restarted job still cleans them up.
+    Progress is published as "progress" events on the job.
+
+    Payload:
+        user_id, image_urls (filled in as the job runs)
+    """
+
+    def __init__(
+        self,
+        user_repo,
+        discovery_repo,
+        stats_repo,
+        child_context_repo,
+        job_queue,
+        image_store=None,
+        memory_manager=None
+    ):
+        self.user_repo = user_repo
+        self.discovery_repo = discovery_repo
+        self.stats_repo = stats_repo
+        self.child_context_repo = child_context_repo
+        self.job_queue = job_queue
+        self.image_store = image_store
+        self.memory_manager = memory_manager
+
+    async def __call__(self, job: Job) -> Dict[str, Any]:
+        payload = job.payload
+        user_id = payload["user_id"]
+        image_urls: List[str] = payload.setdefault("image_urls", [])
+        seen_urls = set(image_urls)
+        progress = {"step": "discoveries", "pages": 0, "discoveries": 0, "images": 0}
+
+        def on_page(urls: List[str]) -> None:
+            for url in urls:
+                if url not in seen_urls:
+                    seen_urls.add(url)
+                    image_urls.append(url)
+            self.job_queue.checkpoint(job)
+            progress["pages"] += 1
+            self.job_queue.notify(job, "progress", progress)
+
+        progress["discoveries"] = await self.discovery_repo.delete_user_discoveries(user_id, on_page=on_page)
+
+        progress["step"] = "images"
+        self.job_queue.notify(job, "progress", progress)
+        progress["images"] = await self._delete_images(image_urls)
+
+        progress["step"] = "profile"
+        self.job_queue.notify(job, "progress", progress)
+        await asyncio.gather(
+            self.stats_repo.delete(user_id),
+            self.child_context_repo.delete(user_id)
+        )
+        profile_deleted = await self.user_repo.delete_user(user_id)
+        if self.memory_manager is not None:
+            await self.memory_manager.forget_user(user_id)
+
+        invalidate_context(user_id)
+        forget_user_tokens(user_id)
+
+        logger.info(
+            f"Deleted account {user_id}: {progress['discoveries']} discoveries, {progress['images']} images"
+        )
+        return {
+            "user_id": user_id,
+            "discoveries_deleted": progress["discoveries"],
+            "images_deleted": progress["images"],
+            "profile_deleted": profile_deleted
+        }
+
+    async def _delete_images(self, image_urls: List[str]) -> int:
+        """Delete the stored images no remaining discovery references."""
+        if self.image_store is None:
+            return 0
+
+        slots = asyncio.Semaphore(IMAGE_DELETE_CONCURRENCY)
+
+        async def delete(url: str) -> bool:
+            digest = digest_from_url(url)
+            if digest is None:
+                return False
+            async with slots:
+                # Content addressing means another account can hold the same photo
+                if await self.discovery_repo.image_in_use(url):
+                    return False
+                await self.image_store.delete(digest)
+                return True
+
+        results = await asyncio.gather(*(delete(url) for url in image_urls))
+        return sum(results)
@@ -0,0 +1,251 @@
+"""
+Discovery Jobs
+Background handlers that finish a discovery after identification has been
+returned to the child: support-agent enrichment, persistence and memory updates.
+"""
+from app.jobs.queue import Job
+from app.memory.manager import episode_from_record
+from app.models.discovery_record import DiscoveryRecord
+from app.repositories.base import utc_naive
+from app.storage.image_store import StoredImage, decode_media_data
+from typing import Dict, Any, Optional
+from datetime import datetime
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINALIZE_DISCOVERY = "discovery.finalize"
+FINALIZE_DISCOVERY_BATCH = "discovery.finalize_batch"
+
+# Concurrent enrichments per batch job
+BATCH_ENRICH_CONCURRENCY = 4
+
+# Specialist agent -> DiscoveryRecord.subject_type
+SUBJECT_TYPES = {
+    "Botanist": "plant",
+    "Entomologist": "insect",
+    "Zoologist": "animal"
+}
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO-8601 timestamp from a job payload as naive UTC, ignoring bad input."""
+    if not value:
+        return None
+    try:
+        return utc_naive(datetime.fromisoformat(value))
+    except ValueError:
+        logger.warning(f"Ignoring unparseable timestamp {value!r}")
+        return None
+
+
+def build_discovery_record(
+    discovery_id: str,
+    user_id: str,
+    agent_results: Dict[str, Any],
+    child_id: Optional[str] = None,
+    location: Optional[dict] = None,
+    timestamp: Optional[datetime] = None,
+    image: Optional[StoredImage] = None
+) -> DiscoveryRecord:
+    """
+    Build the persisted record for a discovery from raw agent results.
+
+    Args:
+        discovery_id: Pre-allocated discovery ID
+        user_id: Firebase UID
+        agent_results: Output of ExecutionCoordinator
+        child_id: Optional child ID
+        location: Optional {'lat': ..., 'lng': ...}
+        timestamp: When the discovery was made (defaults to now)
+        image: The stored photo, if any
+
+    Returns:
+        DiscoveryRecord instance
+    """
+    specialist = agent_results.get("Specialist", {})
+    story = agent_results.get("Storyteller", {})
+    educator = agent_results.get("Educator")
+    now = datetime.utcnow()
+
+    return DiscoveryRecord(
+        discovery_id=discovery_id,
+        user_id=user_id,
+        child_id=child_id,
+        timestamp=timestamp or now,
+        image_url=image.display_url if image else None,
+        thumbnail_url=image.thumbnail_url if image else None,
+        location=location,
+        subject_type=SUBJECT_TYPES.get(specialist.get("agent_name"), "unknown"),
+        species_info=specialist,
+        safety_assessment=agent_results.get("SafetyAgent", {}),
+        story=story.get("story") or "",
+        learning_activities=[educator] if educator else [],
+        viewed_at=now
+    )
+
+
+class DiscoveryJobHandler:
+    """
+    Handles FINALIZE_DISCOVERY jobs.
+
+    Payload:
+        discovery_id, user_id, child_id, location, timestamp (ISO string),
+        required_agents, context, agent_results, media_data (base64 photo),
+        enrich (run support agents), save (persist the record)
+    """
+
+    def __init__(self, orchestrator, discovery_repo, user_repo, stats_repo, memory_manager, job_queue, image_store=None):
+        self.orchestrator = orchestrator
+        self.discovery_repo = discovery_repo
+        self.user_repo = user_repo
+        self.stats_repo = stats_repo
+        self.memory_manager = memory_manager
+        self.job_queue = job_queue
+        self.image_store = image_store
+
+    async def store_image(self, item: Dict[str, Any]) -> Optional[StoredImage]:
+        """
+        Store an item's photo. The result replaces media_data in the item, so
+        retries don't store it again and the spooled payload shrinks.
+        A photo that can't be stored is dropped rather than failing the save.
+        """
+        if "image" in item:
+            return StoredImage.from_dict(item["image"]) if item["image"] else None
+
+        image = None
+        data = decode_media_data(item.pop("media_data", None))
+        if data is not None and self.image_store is not None:
+            try:
+                image = await self.image_store.put(data)
+            except Exception as e:
+                logger.error(f"Dropping photo for {item.get('discovery_id')}: {str(e)}")
+
+        item["image"] = image.to_dict() if image else None
+        return image
+
+    async def __call__(self, job: Job) -> Dict[str, Any]:
+        payload = job.payload
+        agent_results = payload.get("agent_results", {})
+
+        # Retries re-enter here; don't pay for enrichment twice
+        if payload.get("enrich") and "Storyteller" not in agent_results:
+            agent_results = await self.orchestrator.enrich_discovery(
+                payload.get("required_agents", []),
+                payload.get("context", {}),
+                agent_results
+            )
+            payload["agent_results"] = agent_results
+
+            self.job_queue.notify(job, "enriched", {
+                "discovery_id": payload.get("discovery_id"),
+                "story": agent_results.get("Storyteller", {}).get("story"),
+                "activity": {
+                    "prompt": agent_results.get("Educator", {}).get("prompt"),
+                    "question": agent_results.get("Educator", {}).get("question")
+                }
+            })
+
+        user_id = payload.get("user_id")
+        saved = False
+
+        if user_id and payload.get("save"):
+            record = build_discovery_record(
+                discovery_id=payload["discovery_id"],
+                user_id=user_id,
+                agent_results=agent_results,
+                child_id=payload.get("child_id"),
+                location=payload.get("location"),
+                timestamp=parse_timestamp(payload.get("timestamp")),
+                image=await self.store_image(payload)
+            )
+            # The photo is stored; re-spool the payload without it
+            self.job_queue.checkpoint(job)
+
+            await asyncio.gather(
+                self.discovery_repo.save_discovery(record),
+                self.user_repo.update_last_active(user_id)
+            )
+            await self.stats_repo.record_discoveries(user_id, [record])
+            await self.orchestrator.context_loader.record_discoveries(user_id, [record])
+            saved = True
+            logger.info(f"Saved discovery {record.discovery_id} for user {user_id}")
+
+            await self.memory_manager.store_memory(episode_from_record(record))
+
+        return {
+            "discovery_id": payload.get("discovery_id"),
+            "saved": saved,
+            "enriched": "Storyteller" in agent_results,
+            "story": agent_results.get("Storyteller", {}).get("story"),
+            "activity": agent_results.get("Educator")
+        }
+
+
+class DiscoveryBatchJobHandler(DiscoveryJobHandler):
+    """
+    Handles FINALIZE_DISCOVERY_BATCH jobs: enriches every item with bounded
+    concurrency, then writes all records with batched commits.
+
+    Payload:
+        user_id, save, items: [{discovery_id, child_id, location, timestamp,
+        required_agents, context, agent_results, media_data}]
+    """
+
+    async def __call__(self, job: Job) -> Dict[str, Any]:
+        payload = job.payload
+        items = payload.get("items", [])
+        semaphore = asyncio.Semaphore(BATCH_ENRICH_CONCURRENCY)
+
+        async def enrich(item: Dict[str, Any]) -> None:
+            results = item.get("agent_results", {})
+            if "Storyteller" in results or results.get("SafetyAgent", {}).get("is_dangerous", False):
+                return
+            async with semaphore:
+                item["agent_results"] = await self.orchestrator.enrich_discovery(
+                    item.get("required_agents", []), item.get("context", {}), results
+                )
+            self.job_queue.notify(job, "enriched", {
+                "discovery_id": item.get("discovery_id"),
+                "story": item["agent_results"].get("Storyteller", {}).get("story")
+            })
+
+        await asyncio.gather(*(enrich(item) for item in items))
+
+        user_id = payload.get("user_id")
+        saved_ids = []
+
+        if user_id and payload.get("save") and items:
+            images = await asyncio.gather(*(self.store_image(item) for item in items))
+            # The photos are stored; re-spool the payload without them
+            self.job_queue.checkpoint(job)
+            records = [
+                build_discovery_record(
+                    discovery_id=item["discovery_id"],
+                    user_id=user_id,
+                    agent_results=item.get("agent_results", {}),
+                    child_id=item.get("child_id"),
+                    location=item.get("location"),
+                    timestamp=parse_timestamp(item.get("timestamp")),
+                    image=image
+                )
+                for item, image in zip(items, images)
+            ]
+            saved_ids, _ = await asyncio.gather(
+                self.discovery_repo.save_discoveries(records),
+                self.user_repo.update_last_active(user_id)
+            )
+            await self.stats_repo.record_discoveries(user_id, records)
+            await self.orchestrator.context_loader.record_discoveries(user_id, records)
+
+            for record in records:
+                await self.memory_manager.store_memory(episode_from_record(record))
+
+        return {
+            "saved": saved_ids,
+            "enriched": [
+                item.get("discovery_id") for item in items
+                if "Storyteller" in item.get("agent_results", {})
+            ]
+        }
@@ -0,0 +1,448 @@
+"""
+Background Job Queue
+In-process job queue with a worker pool and durable local spooling.
+
+Jobs are written to the spool directory when submitted and removed once they
+reach a terminal state, so work that was accepted but not finished survives a
+restart and is re-queued on startup.
+
+Each job is spooled as a small state file (`{job_id}.json`, rewritten on every
+transition) and a payload file (`{job_id}.payload`, written on submit, on
+checkpoint() and after a failed attempt), so status changes don't rewrite
+large payloads such as photos. All spool I/O goes through one writer task
+that does the file work on a thread, keeping it off the event loop.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from collections import OrderedDict
+from itertools import islice
+import asyncio
+import json
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+TERMINAL_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED)
+
+
+@dataclass
+class Job:
+    """A unit of background work."""
+    job_id: str
+    job_type: str
+    payload: Dict[str, Any]
+    owner_id: Optional[str] = None  # Firebase UID allowed to read the job status
+    status: JobStatus = JobStatus.PENDING
+    attempts: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_dict(self, include_payload: bool = False) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        data = {
+            "job_id": self.job_id,
+            "job_type": self.job_type,
+            "owner_id": self.owner_id,
+            "status": self.status.value,
+            "attempts": self.attempts,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat()
+        }
+        if include_payload:
+            data["payload"] = self.payload
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        """Create Job from a spooled dictionary."""
+        return cls(
+            job_id=data["job_id"],
+            job_type=data["job_type"],
+            payload=data.get("payload", {}),
+            owner_id=data.get("owner_id"),
+            status=JobStatus(data.get("status", "pending")),
+            attempts=data.get("attempts", 0),
+            result=data.get("result"),
+            error=data.get("error"),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            updated_at=datetime.fromisoformat(data["updated_at"])
+        )
+
+
+JobHandler = Callable[[Job], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobQueue:
+    """
+    Asyncio job queue drained by a fixed pool of worker tasks.
+
+    Handlers are registered per job type and receive the Job instance. They can
+    publish intermediate events (e.g. "enriched") to status subscribers via
+    notify(); the queue itself publishes a "status" event on every transition.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        spool_dir: Optional[str] = None,
+        max_attempts: int = 3,
+        history_size: int = 1000
+    ):
+        """
+        Initialize job queue.
+
+        Args:
+            workers: Number of concurrent worker tasks
+            spool_dir: Directory for durable job spooling (None disables spooling)
+            max_attempts: Attempts per job before it is marked failed
+            history_size: Number of finished jobs kept for status lookups
+        """
+        self.workers = workers
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self.max_attempts = max_attempts
+        self.history_size = history_size
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+        # Spool writes waiting for the writer task: path -> text (None deletes)
+        self._spool_pending: Dict[Path, Optional[str]] = {}
+        self._spool_written: Optional[asyncio.Future] = None
+        self._spool_wakeup = asyncio.Event()
+        self._spool_task: Optional[asyncio.Task] = None
+        self._spool_closing = False
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """Register the coroutine that processes jobs of a given type."""
+        self._handlers[job_type] = handler
+
+    @property
+    def running(self) -> bool:
+        return bool(self._worker_tasks)
+
+    async def start(self) -> None:
+        """Start the worker pool and re-queue any spooled jobs."""
+        if self.running:
+            return
+
+        self._queue = asyncio.Queue()
+
+        if self.spool_dir:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            for job in self._load_spool():
+                self._remember(job)
+                self._queue.put_nowait(job.job_id)
+            if self._queue.qsize():
+                logger.info(f"Re-queued {self._queue.qsize()} spooled jobs")
+            self._spool_wakeup = asyncio.Event()
+            self._spool_task = asyncio.create_task(self._write_spool_periodically())
+
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Stop the worker pool, giving queued jobs up to `timeout` seconds to drain.
+        Unfinished jobs stay in the spool and are resumed on next start.
+        """
+        if not self.running:
+            return
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Job queue stopped with {self._queue.qsize()} jobs still queued")
+
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+        if self._spool_task is not None:
+            # Let the writer finish what is queued, then exit
+            self._spool_closing = True
+            self._spool_wakeup.set()
+            await self._spool_task
+            self._spool_task = None
+            self._spool_closing = False
+        logger.info("Job queue stopped")
+
+    async def submit(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        owner_id: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> Job:
+        """
+        Enqueue a job. Returns once the job is spooled.
+
+        Args:
+            job_type: Registered handler name
+            payload: JSON-serializable job arguments
+            owner_id: Optional Firebase UID allowed to read the status
+            job_id: Optional explicit ID (defaults to a random one)
+
+        Returns:
+            The pending Job
+
+        Raises:
+            ValueError: If no handler is registered for job_type
+            RuntimeError: If the queue has not been started
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+        if not self.running:
+            raise RuntimeError("Job queue is not running")
+
+        job = Job(
+            job_id=job_id or f"job_{uuid.uuid4().hex}",
+            job_type=job_type,
+            payload=payload,
+            owner_id=owner_id
+        )
+        self._spool_payload(job)
+        written = self._spool(job)
+        self._remember(job)
+        self._queue.put_nowait(job.job_id)
+        if written is not None:
+            await written
+
+        logger.debug(f"Submitted job {job.job_id} ({job_type})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by ID."""
+        return self._jobs.get(job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Subscribe to events for a job. Pair with unsubscribe()."""
+        events: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(events)
+        return events
+
+    def unsubscribe(self, job_id: str, events: asyncio.Queue) -> None:
+        """Remove a subscription created by subscribe()."""
+        subscribers = self._subscribers.get(job_id, [])
+        if events in subscribers:
+            subscribers.remove(events)
+        if not subscribers:
+            self._subscribers.pop(job_id, None)
+
+    def notify(self, job: Job, event: str, data: Dict[str, Any]) -> None:
+        """Publish an event to everyone subscribed to a job."""
+        for events in self._subscribers.get(job.job_id, []):
+            events.put_nowait({"event": event, "data": data})
+
+    def checkpoint(self, job: Job) -> None:
+        """
+        Re-spool a running job after its handler has recorded progress in the
+        payload, so a restart resumes from there instead of from scratch.
+        """
+        job.updated_at = datetime.utcnow()
+        self._spool_payload(job)
+        self._spool(job)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    await self._run(job)
+            except Exception as e:
+                logger.error(f"Job worker {index} crashed on {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        handler = self._handlers.get(job.job_type)
+        if handler is None:
+            self._transition(job, JobStatus.FAILED, error=f"Unknown job type '{job.job_type}'")
+            return
+
+        while job.attempts < self.max_attempts:
+            job.attempts += 1
+            self._transition(job, JobStatus.RUNNING)
+            try:
+                result = await handler(job)
+                job.error = None
+                self._transition(job, JobStatus.COMPLETED, result=result or {})
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job {job.job_id} attempt {job.attempts} failed: {str(e)}")
+                job.error = str(e)
+                # Keep what the attempt recorded in the payload for the next one
+                self._spool_payload(job)
+                if job.attempts < self.max_attempts:
+                    await asyncio.sleep(0.5 * job.attempts)
+
+        self._transition(job, JobStatus.FAILED, error=job.error)
+
+    def _transition(
+        self,
+        job: Job,
+        status: JobStatus,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None
+    ) -> None:
+        job.status = status
+        job.updated_at = datetime.utcnow()
+        if result is not None:
+            job.result = result
+        if error is not None:
+            job.error = error
+
+        if status in TERMINAL_STATUSES:
+            self._unspool(job.job_id)
+        else:
+            self._spool(job)
+
+        self.notify(job, "status", job.to_dict())
+
+    def _remember(self, job: Job) -> None:
+        self._jobs[job.job_id] = job
+        self._jobs.move_to_end(job.job_id)
+
+        # Evict the oldest finished jobs once history is full; running ones
+        # are skipped, so a stuck job at the front doesn't stop eviction
+        excess = len(self._jobs) - self.history_size
+        if excess > 0:
+            finished = (job_id for job_id, old in self._jobs.items() if old.status in TERMINAL_STATUSES)
+            for job_id in list(islice(finished, excess)):
+                self._jobs.pop(job_id)
+
+    # ------------------------------------------------------------------ #
+    #  Spooling                                                            #
+    # ------------------------------------------------------------------ #
+
+    def _spool_path(self, job_id: str) -> Path:
+        return self.spool_dir / f"{job_id}.json"
+
+    def _payload_path(self, job_id: str) -> Path:
+        return self.spool_dir / f"{job_id}.payload"
+
+    def _spool(self, job: Job) -> Optional[asyncio.Future]:
+        """Queue a write of the job's state (without payload)."""
+        if not self.spool_dir:
+            return None
+        return self._queue_spool_write(self._spool_path(job.job_id), json.dumps(job.to_dict(), default=str))
+
+    def _spool_payload(self, job: Job) -> Optional[asyncio.Future]:
+        """Queue a write of the job's payload."""
+        if not self.spool_dir:
+            return None
+        return self._queue_spool_write(self._payload_path(job.job_id), json.dumps(job.payload, default=str))
+
+    def _unspool(self, job_id: str) -> None:
+        if not self.spool_dir:
+            return
+        self._queue_spool_write(self._spool_path(job_id), None)
+        self._queue_spool_write(self._payload_path(job_id), None)
+
+    def _queue_spool_write(self, path: Path, text: Optional[str]) -> Optional[asyncio.Future]:
+        """
+        Hand a spool write to the writer task; only the latest text per path is
+        written. Returns a future that resolves once it is on disk. Without a
+        writer task (queue not started) the write happens inline.
+        """
+        if self._spool_task is None:
+            self._write_spool({path: text})
+            return None
+
+        # Re-adding moves the path to the end, so writes land in the order queued
+        self._spool_pending.pop(path, None)
+        self._spool_pending[path] = text
+        if self._spool_written is None:
+            self._spool_written = asyncio.get_running_loop().create_future()
+        self._spool_wakeup.set()
+        return self._spool_written
+
+    async def _write_spool_periodically(self) -> None:
+        """The single spool writer; exits once stop() asks and nothing is queued."""
+        while True:
+            await self._spool_wakeup.wait()
+            self._spool_wakeup.clear()
+            if self._spool_pending:
+                pending, self._spool_pending = self._spool_pending, {}
+                written, self._spool_written = self._spool_written, None
+                try:
+                    await asyncio.to_thread(self._write_spool, pending)
+                finally:
+                    if written is not None and not written.done():
+                        written.set_result(None)
+            if self._spool_closing and not self._spool_pending:
+                return
+
+    @staticmethod
+    def _write_spool(pending: Dict[Path, Optional[str]]) -> None:
+        """Apply spool writes in order (blocking)."""
+        for path, text in pending.items():
+            try:
+                if text is None:
+                    path.unlink(missing_ok=True)
+                else:
+                    tmp_path = path.with_name(path.name + ".tmp")
+                    tmp_path.write_text(text)
+                    os.replace(tmp_path, path)
+            except Exception as e:
+                logger.error(f"Failed to update job spool file {path.name}: {str(e)}")
+
+    def _load_spool(self) -> List[Job]:
+        jobs = []
+        for path in sorted(self.spool_dir.glob("*.json"), key=lambda p: p.stat().st_mtime):
+            try:
+                data = json.loads(path.read_text())
+                if "payload" not in data:
+                    data["payload"] = json.loads(self._payload_path(data["job_id"]).read_text())
+                job = Job.from_dict(data)
+                # A job that was mid-run when the process died starts over
+                job.status = JobStatus.PENDING
+                jobs.append(job)
+            except Exception as e:
+                logger.error(f"Discarding unreadable spooled job {path.name}: {str(e)}")
+                path.unlink(missing_ok=True)
+                self._payload_path(path.stem).unlink(missing_ok=True)
+
+        # Payloads whose job finished just before a crash
+        for path in self.spool_dir.glob("*.payload"):
+            if not self._spool_path(path.stem).exists():
+                path.unlink(missing_ok=True)
+        return jobs
+
+
+# Global queue instance (lazy-initialized)
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create the global job queue instance."""
+    global _job_queue
+    if _job_queue is None:
+        from app.config.settings import JOB_WORKERS, JOB_SPOOL_DIR
+        _job_queue = JobQueue(workers=JOB_WORKERS, spool_dir=JOB_SPOOL_DIR)
+    return _job_queue
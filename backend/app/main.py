@@ -1,15 +1,18 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Any, List
+from pydantic import BaseModel, Field
+from typing import Optional, Any, List, Literal
+import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 
 # Import config first to load .env file
 from app import config
 
 # Initialize Firebase
 from app.config.firebase_config import FirebaseConfig
+from app.config.settings import COMPRESSION_MIN_BYTES, GZIP_LEVEL, BROTLI_QUALITY
+from app.utils.compression import CompressionMiddleware
 
 from app.orchestrator.agent import PipOrchestrator
 
@@ -30,6 +33,31 @@ async def startup_event():
         logger.error(f"Failed to initialize Firebase: {str(e)}")
         # Continue running - Firebase will initialize on first use
 
+    # Start background workers (re-queues anything left in the spool)
+    await job_queue.start()
+    await get_write_buffer().start()
+    if vector_db is not None:
+        await vector_db.start()
+    if embedding_pipeline is not None:
+        await embedding_pipeline.start()
+    if semantic_cache is not None:
+        await semantic_cache.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Drain background jobs and buffered writes before the process exits."""
+    await job_queue.stop()
+    await get_write_buffer().stop()
+    if embedding_pipeline is not None:
+        await embedding_pipeline.stop()
+    if semantic_cache is not None:
+        await semantic_cache.stop()
+    if vector_db is not None:
+        await vector_db.stop()
+    if image_store is not None:
+        await image_store.close()
+
 # CORS configuration
 ALLOWED_ORIGINS = [
     "https://edu-explorer-9827f.web.app",
@@ -45,6 +73,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
+)
+
+# Compress JSON/text responses and add strong ETags to GET responses
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=COMPRESSION_MIN_BYTES,
+    gzip_level=GZIP_LEVEL,
+    brotli_quality=BROTLI_QUALITY
 )
 
 # Initialize Orchestrator
@@ -52,19 +89,76 @@ orchestrator = PipOrchestrator()
 
 # Import route modules
 from app.routes.user_routes import router as user_router
-from app.repositories.discovery_repository import DiscoveryRepository
-from app.repositories.user_repository import UserRepository
+from app.routes.job_routes import router as job_router
+from app.routes.dashboard_routes import router as dashboard_router
+from app.routes.image_routes import router as image_router
+from app.routes.export_routes import router as export_router
+from app.repositories.discovery_repository import encode_cursor
+from app.repositories.factory import (
+    get_discovery_repository,
+    get_user_repository,
+    get_stats_repository,
+    get_child_context_repository
+)
+from app.repositories.write_buffer import get_write_buffer
 from app.models.discovery_record import DiscoveryRecord
 from app.auth.firebase_auth import verify_firebase_token, optional_auth, get_user_id
+from app.jobs import (
+    get_job_queue,
+    DiscoveryJobHandler,
+    DiscoveryBatchJobHandler,
+    AccountDeletionJobHandler,
+    FINALIZE_DISCOVERY,
+    FINALIZE_DISCOVERY_BATCH,
+    DELETE_ACCOUNT,
+    parse_timestamp
+)
+from app.config.settings import BATCH_MAX_DISCOVERIES, BATCH_IMAGES_PER_CALL
+from app.utils.cancellation import run_until_disconnected, ClientDisconnected
+from app.utils.metrics import metrics
+from app.utils import etag
+from app.utils.json_response import FastJSONResponse
+from app.memory.manager import MemoryManager
+from app.memory.vector_db import get_vector_db
+from app.memory.embedding_pipeline import get_embedding_pipeline
+from app.agents.semantic_cache import get_semantic_cache
+from app.storage import get_image_store
 import uuid
 from datetime import datetime
 
 # Register routers
 app.include_router(user_router)
-
-# Initialize repositories
-discovery_repo = DiscoveryRepository()
-user_repo = UserRepository()
+app.include_router(job_router)
+app.include_router(dashboard_router)
+app.include_router(image_router)
+app.include_router(export_router)
+
+# Initialize repositories (backend chosen by REPOSITORY_BACKEND)
+discovery_repo = get_discovery_repository()
+user_repo = get_user_repository()
+stats_repo = get_stats_repository()
+image_store = get_image_store()
+vector_db = get_vector_db()
+embedding_pipeline = get_embedding_pipeline()
+semantic_cache = get_semantic_cache()
+
+# Background job queue: persistence, enrichment and memory updates
+job_queue = get_job_queue()
+memory_manager = MemoryManager()
+job_queue.register(
+    FINALIZE_DISCOVERY,
+    DiscoveryJobHandler(orchestrator, discovery_repo, user_repo, stats_repo, memory_manager, job_queue, image_store)
+)
+job_queue.register(
+    FINALIZE_DISCOVERY_BATCH,
+    DiscoveryBatchJobHandler(orchestrator, discovery_repo, user_repo, stats_repo, memory_manager, job_queue, image_store)
+)
+job_queue.register(
+    DELETE_ACCOUNT,
+    AccountDeletionJobHandler(
+        user_repo, discovery_repo, stats_repo, get_child_context_repository(), job_queue, image_store, memory_manager
+    )
+)
 
 class DiscoveryInput(BaseModel):
     child_id: Optional[str] = None
@@ -77,6 +171,10 @@ class DiscoveryInput(BaseModel):
     timestamp: Optional[str] = None
     location: Optional[dict] = None  # {"lat": ..., "lng": ...}
 
+
+class BatchDiscoveryInput(BaseModel):
+    discoveries: List[DiscoveryInput] = Field(..., min_length=1, max_length=BATCH_MAX_DISCOVERIES)
+
 @app.get("/")
 async def root():
     return {"message": "Pip System API is running"}
@@ -85,63 +183,92 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """In-process counters (agent/Gemini calls, cancellations, ...)."""
+    return {
+        "since": metrics.started_at.isoformat(),
+        "counters": metrics.snapshot()
+    }
+
 @app.post("/api/discovery")
 async def process_discovery(
     discovery: DiscoveryInput,
+    request: Request,
     save: bool = True,
+    defer_enrichment: bool = False,
     token: dict = Depends(optional_auth)
 ):
     """
     Endpoint for frontend to send discoveries to the Pip System.
     Works with or without authentication.
-    If save=True (default) and authenticated, saves to Firestore.
+    If save=True (default) and authenticated, saves to Firestore in the background.
     If save=False, only returns analysis (for live mode).
+    If defer_enrichment=True, returns as soon as the species is identified;
+    the story and activity follow via /api/jobs/{job_id} (or its SSE stream).
+    If the client disconnects first, all in-flight agent work is cancelled.
     """
     try:
         # Convert Pydantic model to dict
         input_data = discovery.model_dump()
-        
-        # Process via Orchestrator
-        orchestrator_response = await orchestrator.process_discovery(input_data)
-        
-        # If user is authenticated AND save is requested, save to Firestore
-        if token and save:
+        user_id = get_user_id(token) if token else None
+
+        async def analyze():
+            # Identify via Orchestrator (Safety -> Specialist), then enrich inline unless deferred
+            context, required_agents, agent_results = await orchestrator.identify_discovery(input_data, user_id)
+            if not defer_enrichment and not agent_results.get("SafetyAgent", {}).get("is_dangerous", False):
+                agent_results = await orchestrator.enrich_discovery(required_agents, context, agent_results)
+            return context, required_agents, agent_results
+
+        planned_agents = orchestrator.agent_router.route_discovery(input_data)
+        if defer_enrichment:
+            planned_agents = [a for a in planned_agents if a not in ("Storyteller", "Educator")]
+
+        context, required_agents, agent_results = await run_until_disconnected(
+            request, analyze(), expected_agent_calls=len(planned_agents)
+        )
+        is_dangerous = agent_results.get("SafetyAgent", {}).get("is_dangerous", False)
+        enrich_in_background = defer_enrichment and not is_dangerous
+
+        orchestrator_response = orchestrator.response_synthesizer.synthesize_response(agent_results, context)
+
+        persist = bool(user_id and save)
+
+        if persist or enrich_in_background:
+            discovery_id = f"disc_{uuid.uuid4().hex}"
             try:
-                user_id = get_user_id(token)
-                
-                # Update user's last active timestamp
-                await user_repo.update_last_active(user_id)
-                
-                # Create discovery record
-                discovery_id = f"disc_{uuid.uuid4().hex}"
-                discovery_record = DiscoveryRecord(
-                    discovery_id=discovery_id,
-                    user_id=user_id,
-                    child_id=discovery.child_id,
-                    timestamp=datetime.utcnow(),
-                    image_url=None,  # TODO: Upload to Firebase Storage
-                    location=discovery.location,
-                    subject_type=orchestrator_response.get("subject_type", "unknown"),
-                    species_info=orchestrator_response.get("species_info", {}),
-                    safety_assessment=orchestrator_response.get("safety", {}),
-                    story=orchestrator_response.get("story", ""),
-                    learning_activities=orchestrator_response.get("activities", []),
-                    viewed_at=datetime.utcnow()
+                job = await job_queue.submit(
+                    FINALIZE_DISCOVERY,
+                    payload={
+                        "discovery_id": discovery_id,
+                        "user_id": user_id,
+                        "child_id": discovery.child_id,
+                        "location": discovery.location,
+                        "timestamp": datetime.utcnow().isoformat(),
+                        "required_agents": required_agents,
+                        "context": context,
+                        "agent_results": agent_results,
+                        # The job stores the photo, so only saved discoveries carry it
+                        "media_data": discovery.media_data if persist and discovery.media_type == "image" else None,
+                        "enrich": enrich_in_background,
+                        "save": persist
+                    },
+                    owner_id=user_id
                 )
-                
-                # Save to Firestore
-                saved_id = await discovery_repo.save_discovery(discovery_record)
-                logger.info(f"Saved discovery {saved_id} for user {user_id}")
-                
-                # Add discovery_id to response
-                orchestrator_response["discovery_id"] = saved_id
-                orchestrator_response["saved"] = True
-                
+                orchestrator_response["job_id"] = job.job_id
+                if enrich_in_background:
+                    orchestrator_response["enrichment"] = "pending"
+                if persist:
+                    # Add discovery_id to response; the write lands shortly after
+                    orchestrator_response["discovery_id"] = discovery_id
+                    orchestrator_response["saved"] = True
+
             except Exception as save_error:
-                logger.error(f"Failed to save discovery: {str(save_error)}")
+                logger.error(f"Failed to queue discovery: {str(save_error)}")
                 orchestrator_response["saved"] = False
                 orchestrator_response["save_error"] = str(save_error)
-        else:
+
+        if not persist:
             orchestrator_response["saved"] = False
             if not token:
                 orchestrator_response["info"] = "Sign in to save discoveries"
@@ -149,65 +276,252 @@ async def process_discovery(
                 orchestrator_response["info"] = "Live mode - analysis only"
         
         return orchestrator_response
+
+    except ClientDisconnected:
+        # Nobody is listening; 499 is the conventional "client closed request" code
+        raise HTTPException(status_code=499, detail="Client closed request")
         
     except Exception as e:
         logger.error(f"Discovery processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/discoveries/batch")
+async def process_discovery_batch(
+    batch: BatchDiscoveryInput,
+    save: bool = True,
+    token: dict = Depends(verify_firebase_token)
+):
+    """
+    Ingest a list of discoveries in one round trip (e.g. the end of a live
+    session, or an offline PWA queue being flushed).
+
+    Duplicates (same image, or same identified species) are collapsed onto the
+    first occurrence. Identification results are returned immediately; stories,
+    activities and the batched Firestore write happen in one background job.
+    """
+    user_id = get_user_id(token)
+
+    try:
+        inputs = [d.model_dump() for d in batch.discoveries]
+        entries = await orchestrator.identify_batch(inputs, images_per_call=BATCH_IMAGES_PER_CALL, user_id=user_id)
+
+        results = []
+        job_items = []
+        discovery_ids: dict = {}
+        now = datetime.utcnow()
+
+        for entry, discovery in zip(entries, batch.discoveries):
+            if entry["duplicate_of"] is not None:
+                continue
+            discovery_ids[entry["index"]] = f"disc_{uuid.uuid4().hex}"
+            job_items.append({
+                "discovery_id": discovery_ids[entry["index"]],
+                "child_id": discovery.child_id,
+                "location": discovery.location,
+                # Naive UTC like the single-discovery path, whatever form the client sent
+                "timestamp": (parse_timestamp(discovery.timestamp) or now).isoformat(),
+                "required_agents": entry["required_agents"],
+                "context": entry["context"],
+                "agent_results": entry["agent_results"],
+                "media_data": discovery.media_data if save and discovery.media_type == "image" else None
+            })
+
+        for entry in entries:
+            canonical = entry["duplicate_of"]
+            if canonical is None:
+                result = orchestrator.response_synthesizer.synthesize_response(
+                    entry["agent_results"], entry["context"]
+                )
+                result["discovery_id"] = discovery_ids[entry["index"]]
+            else:
+                result = {"discovery_id": discovery_ids[canonical]}
+            result["duplicate_of"] = canonical
+            results.append(result)
+
+        job = await job_queue.submit(
+            FINALIZE_DISCOVERY_BATCH,
+            payload={"user_id": user_id, "save": save, "items": job_items},
+            owner_id=user_id
+        )
+
+        return {
+            "results": results,
+            "received": len(entries),
+            "unique": len(job_items),
+            "job_id": job.job_id,
+            "saved": save
+        }
+
+    except Exception as e:
+        logger.error(f"Batch discovery processing error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/discoveries")
 async def get_discoveries(
+    request: Request,
     child_id: Optional[str] = None,
     limit: int = 50,
     page: int = 1,
+    cursor: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
     token: dict = Depends(verify_firebase_token)
 ):
-    """Get user's discovery history."""
+    """
+    Get user's discovery history.
+    Pass the returned next_cursor as `cursor` to fetch the following page;
+    `page` is kept for older clients (pages past 1 cost extra reads).
+    view=summary returns DiscoverySummary items (no story/safety/activities).
+    
+    `version` is the user's change version when the page was read; poll
+    /api/discoveries/changes from it to stay current. Responses carry an
+    ETag derived from it, so unchanged pages revalidate with a 304.
+    """
     user_id = get_user_id(token)
     
-    discoveries = await discovery_repo.get_user_discoveries(
-        user_id=user_id,
-        limit=limit,
-        child_id=child_id,
-        page=page
-    )
+    version = await discovery_repo.get_version(user_id)
+    tag = etag.version_etag(user_id, version, "history", child_id, limit, page, cursor, view)
+    if etag.matches(request, tag):
+        return etag.not_modified(tag)
     
-    total = await discovery_repo.count_user_discoveries(user_id)
+    if cursor or page <= 1:
+        page_query = discovery_repo.get_user_discoveries_page(
+            user_id=user_id,
+            limit=limit,
+            child_id=child_id,
+            cursor=cursor,
+            summary=view == "summary"
+        )
+    else:
+        async def legacy_page():
+            discoveries = await discovery_repo.get_user_discoveries(
+                user_id=user_id,
+                limit=limit,
+                child_id=child_id,
+                page=page,
+                summary=view == "summary"
+            )
+            next_cursor = encode_cursor(discoveries[-1]) if len(discoveries) == limit else None
+            return discoveries, next_cursor
+        page_query = legacy_page()
     
-    return {
-        "discoveries": [d.model_dump() for d in discoveries],
+    try:
+        # Independent reads: run them concurrently
+        (discoveries, next_cursor), total = await asyncio.gather(
+            page_query,
+            discovery_repo.count_user_discoveries(user_id, child_id=child_id)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    response = FastJSONResponse({
+        "discoveries": discoveries,
         "total": total,
         "page": page,
-        "page_size": limit
-    }
+        "page_size": limit,
+        "next_cursor": next_cursor,
+        "version": version
+    })
+    etag.set_etag(response, tag)
+    return response
+
+
+@app.get("/api/discoveries/changes")
+async def get_discovery_changes(
+    request: Request,
+    since: int = 0,
+    limit: int = 500,
+    token: dict = Depends(verify_firebase_token)
+):
+    """
+    Change feed for offline clients: discoveries saved or updated, and
+    tombstones for discoveries deleted, after version `since`, oldest first.
+    
+    Apply the changes in order, then store `version` and pass it as `since`
+    next time; repeat while has_more is true. Start from the `version` of a
+    full /api/discoveries listing. `reset` means the client's version is
+    ahead of the server's, so its cache should be dropped and rebuilt.
+    """
+    user_id = get_user_id(token)
+    
+    version = await discovery_repo.get_version(user_id)
+    tag = etag.version_etag(user_id, version, "changes", since, limit)
+    if etag.matches(request, tag):
+        return etag.not_modified(tag)
+    
+    discoveries, tombstones, has_more = [], [], False
+    if since < version:
+        discoveries, tombstones, has_more = await discovery_repo.get_changes(user_id, since, max(limit, 1))
+    
+    # The last version applied while more remain, else the current version
+    versions = [change.version for change in (*discoveries, *tombstones)]
+    next_version = max(versions) if has_more else max([version, *versions])
+    
+    response = FastJSONResponse({
+        "discoveries": discoveries,
+        "deleted": tombstones,
+        "version": next_version,
+        "has_more": has_more,
+        "reset": since > version
+    })
+    etag.set_etag(response, tag)
+    return response
 
 
 @app.get("/api/discoveries/recent")
 async def get_recent_discoveries(
     days: int = 7,
+    view: Literal["full", "summary"] = "full",
     token: dict = Depends(verify_firebase_token)
 ):
     """Get discoveries from the last N days."""
     user_id = get_user_id(token)
     
-    discoveries = await discovery_repo.get_recent_discoveries(user_id, days)
+    discoveries = await discovery_repo.get_recent_discoveries(user_id, days, summary=view == "summary")
     
-    return {
-        "discoveries": [d.model_dump() for d in discoveries],
+    return FastJSONResponse({
+        "discoveries": discoveries,
         "days": days
-    }
+    })
 
 
 @app.get("/api/discoveries/favorites")
-async def get_favorite_discoveries(token: dict = Depends(verify_firebase_token)):
-    """Get user's favorite discoveries."""
+async def get_favorite_discoveries(
+    request: Request,
+    view: Literal["full", "summary"] = "full",
+    token: dict = Depends(verify_firebase_token)
+):
+    """Get user's favorite discoveries (ETag revalidation as for /api/discoveries)."""
     user_id = get_user_id(token)
     
-    discoveries = await discovery_repo.get_favorites(user_id)
+    version = await discovery_repo.get_version(user_id)
+    tag = etag.version_etag(user_id, version, "favorites", view)
+    if etag.matches(request, tag):
+        return etag.not_modified(tag)
     
-    return {
-        "favorites": [d.model_dump() for d in discoveries]
-    }
+    discoveries = await discovery_repo.get_favorites(user_id, summary=view == "summary")
+    
+    response = FastJSONResponse({
+        "favorites": discoveries
+    })
+    etag.set_etag(response, tag)
+    return response
+
+
+@app.get("/api/discoveries/{discovery_id}")
+async def get_discovery_detail(
+    discovery_id: str,
+    token: dict = Depends(verify_firebase_token)
+):
+    """Get the full record for one discovery (lazy detail for summary lists)."""
+    user_id = get_user_id(token)
+    
+    discovery = await discovery_repo.get_discovery(discovery_id)
+    if discovery is None or discovery.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Discovery not found")
+    
+    return FastJSONResponse(discovery)
 
 
 @app.post("/api/discoveries/{discovery_id}/favorite")
@@ -216,12 +530,45 @@ async def toggle_favorite(
     favorite: bool = True,
     token: dict = Depends(verify_firebase_token)
 ):
-    """Mark or unmark a discovery as favorite."""
-    await discovery_repo.mark_favorite(discovery_id, favorite)
+    """Mark or unmark one of the user's discoveries as favorite."""
+    user_id = get_user_id(token)
+    
+    try:
+        await discovery_repo.mark_favorite(discovery_id, favorite, user_id=user_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Discovery not found")
     
     return {"success": True, "discovery_id": discovery_id, "favorite": favorite}
 
 
+@app.delete("/api/discoveries/{discovery_id}")
+async def delete_discovery(
+    discovery_id: str,
+    token: dict = Depends(verify_firebase_token)
+):
+    """
+    Delete a discovery. A tombstone stays behind so other devices pick up
+    the deletion from /api/discoveries/changes.
+    """
+    user_id = get_user_id(token)
+    
+    tombstone = await discovery_repo.delete_discovery(discovery_id, user_id=user_id)
+    if tombstone is None:
+        raise HTTPException(status_code=404, detail="Discovery not found")
+    
+    # Stats and Pip's context are folded from history; rebuild them without it
+    try:
+        await asyncio.gather(
+            stats_repo.rebuild(user_id),
+            orchestrator.context_loader.rebuild(user_id),
+            memory_manager.forget_episodes(user_id, [discovery_id])
+        )
+    except Exception as e:
+        logger.error(f"Failed to rebuild rollups after deleting {discovery_id}: {str(e)}")
+    
+    return {"success": True, "discovery_id": discovery_id, "version": tombstone.version}
+
+
 # --------------------------------------------------------------------------- #
 #  CHAT ENDPOINT                                                                #
 # --------------------------------------------------------------------------- #
@@ -291,44 +638,9 @@ async def get_user_stats(token: dict = Depends(optional_auth)):
 
     try:
         user_id = get_user_id(token)
-        today = datetime.utcnow().date()
-
-        # Discoveries in last 7 days for streak/species calculation
-        recent = await discovery_repo.get_recent_discoveries(user_id, days=30)
 
-        # Count today's discoveries
-        discoveries_today = sum(
-            1 for d in recent
-            if d.timestamp and d.timestamp.date() == today
-        )
-
-        # Count unique species this week
-        week_ago = today - timedelta(days=7)
-        seen_species = set()
-        for d in recent:
-            if d.timestamp and d.timestamp.date() >= week_ago:
-                name = ""
-                if d.species_info:
-                    name = d.species_info.get("common_name", "")
-                if name:
-                    seen_species.add(name.lower())
-        new_species = len(seen_species)
-
-        # Calculate streak: consecutive days with >= 1 discovery
-        days_with_discoveries = set(
-            d.timestamp.date() for d in recent if d.timestamp
-        )
-        streak = 0
-        check_date = today
-        while check_date in days_with_discoveries:
-            streak += 1
-            check_date -= timedelta(days=1)
-
-        return {
-            "discoveries_today": discoveries_today,
-            "new_species": new_species,
-            "streak_days": streak
-        }
+        # One read of the user's incrementally maintained rollup document
+        return await stats_repo.get_stats(user_id)
 
     except Exception as e:
         logger.error(f"Stats error: {e}")
@@ -0,0 +1,163 @@
+"""
+Embedding Pipeline
+Collects new discovery memories and embeds them in batches in the background,
+then upserts the vectors into the per-user vector index.
+"""
+from app.utils.metrics import metrics
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (user_id, vector_id) -> (text, metadata)
+PendingItem = Tuple[Tuple[str, str], Tuple[str, Dict[str, Any]]]
+
+
+class EmbeddingPipeline:
+    """
+    Write-behind queue of texts to embed.
+
+    Items are embedded `batch_size` at a time, on an interval or as soon as a
+    batch fills. Re-adding an item before it is embedded replaces it. Pending
+    items live in memory: a crash loses those not yet embedded, which
+    `python -m app.tools.backfill_embeddings` restores.
+    """
+
+    def __init__(self, embedder, vector_db, batch_size: int = 64, flush_interval: float = 2.0):
+        """
+        Initialize pipeline.
+
+        Args:
+            embedder: HashingEmbedder or GeminiEmbedder
+            vector_db: VectorDBClient receiving the vectors
+            batch_size: Texts per embedding call
+            flush_interval: Seconds between background flushes
+        """
+        self.embedder = embedder
+        self.vector_db = vector_db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str], Tuple[str, Dict[str, Any]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._flush_task is not None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def add(self, user_id: str, vector_id: str, text: str, metadata: Dict[str, Any]) -> None:
+        """
+        Queue a text for embedding.
+        Embeds immediately if the pipeline hasn't been started.
+
+        Args:
+            user_id: Vector index partition
+            vector_id: ID within the partition (e.g. discovery_id)
+            text: Text to embed
+            metadata: Stored alongside the vector
+        """
+        item = ((user_id, vector_id), (text, metadata))
+        if not self.running:
+            await self._embed([item])
+            return
+
+        self._pending[item[0]] = item[1]
+        if len(self._pending) >= self.batch_size:
+            asyncio.create_task(self.flush())
+
+    def discard(self, user_id: str, vector_ids: Optional[Iterable[str]] = None) -> None:
+        """Drop pending items for some of a user's IDs, or all of the user's when None."""
+        if vector_ids is None:
+            keys = [key for key in self._pending if key[0] == user_id]
+        else:
+            keys = [(user_id, vector_id) for vector_id in vector_ids]
+        for key in keys:
+            self._pending.pop(key, None)
+
+    async def flush(self) -> int:
+        """
+        Embed and store everything pending.
+
+        Returns:
+            Number of items embedded
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            pending, self._pending = list(self._pending.items()), {}
+            embedded = 0
+
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start:start + self.batch_size]
+                try:
+                    embedded += await self._embed(chunk)
+                except Exception as e:
+                    # The embedder already retried; the backfill picks these up later
+                    logger.error(f"Dropped {len(chunk)} memory embeddings: {str(e)}")
+
+            logger.debug(f"Embedded {embedded} memories")
+            return embedded
+
+    async def _embed(self, items: List[PendingItem]) -> int:
+        vectors = await self.embedder.embed([text for _, (text, _) in items])
+
+        by_user: Dict[str, list] = defaultdict(list)
+        for ((user_id, vector_id), (_, metadata)), vector in zip(items, vectors):
+            by_user[user_id].append((vector_id, vector, metadata))
+        await asyncio.gather(*(
+            self.vector_db.store_many(user_id, rows) for user_id, rows in by_user.items()
+        ))
+
+        metrics.increment("memory_embeddings", len(items))
+        return len(items)
+
+    async def start(self) -> None:
+        """Start the periodic flush task."""
+        if self.running:
+            return
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush task and embed everything still pending."""
+        if not self.running:
+            return
+        self._flush_task.cancel()
+        await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._flush_task = None
+        await self.flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Embedding flush failed: {str(e)}")
+
+
+# Global pipeline instance (lazy-initialized)
+_embedding_pipeline: Optional[EmbeddingPipeline] = None
+
+
+def get_embedding_pipeline() -> Optional[EmbeddingPipeline]:
+    """The shared embedding pipeline, or None when there is no vector index (numpy missing)."""
+    global _embedding_pipeline
+    if _embedding_pipeline is None:
+        from app.memory.vector_db import get_vector_db
+        vector_db = get_vector_db()
+        if vector_db is None:
+            return None
+
+        from app.config.settings import EMBEDDING_BATCH_SIZE, EMBEDDING_FLUSH_SECONDS
+        from app.memory.embeddings import get_embedder
+        _embedding_pipeline = EmbeddingPipeline(
+            get_embedder(), vector_db, EMBEDDING_BATCH_SIZE, EMBEDDING_FLUSH_SECONDS
+        )
+    return _embedding_pipeline
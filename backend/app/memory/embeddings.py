@@ -0,0 +1,124 @@
+"""
+Embeddings
+Text embeddings for discovery memories: the Gemini embedding API, or a local
+hashing embedder that needs no network (development, offline runs, tests).
+"""
+from app.models.discovery_record import DiscoveryRecord
+from typing import Any, Dict, List, Optional
+import hashlib
+import math
+import re
+
+# Memory.embedding in app/models/context.py is 768-dimensional
+EMBEDDING_DIM = 768
+
+
+def memory_text(record: DiscoveryRecord) -> str:
+    """The text a discovery is remembered (and found again) by."""
+    info = record.species_info or {}
+    name = info.get("common_name") or info.get("species") or "something"
+    if info.get("scientific_name"):
+        name += f" ({info['scientific_name']})"
+
+    parts = [name, record.subject_type]
+    if info.get("species") and info.get("species") != info.get("common_name"):
+        parts.append(info["species"])
+    text = ", ".join(parts)
+    if info.get("habitat"):
+        text += f". Lives in {info['habitat']}"
+    return text
+
+
+def memory_metadata(record: DiscoveryRecord) -> Dict[str, Any]:
+    """What a memory search hit carries back, without rereading the discovery."""
+    info = record.species_info or {}
+    return {
+        "child_id": record.child_id,
+        "common_name": info.get("common_name") or info.get("species"),
+        "subject_type": record.subject_type,
+        "timestamp": record.timestamp.isoformat() if record.timestamp else None
+    }
+
+
+class HashingEmbedder:
+    """
+    Local stand-in for the embedding API.
+
+    Words and their character trigrams are hashed into signed buckets, so
+    texts sharing words or word pieces ("ladybug", "lady bird") land close
+    together. It captures no meaning beyond spelling, but is deterministic,
+    free and fast.
+    """
+
+    name = "hashing"
+    batch_size = 256
+
+    def __init__(self, dimensions: int = EMBEDDING_DIM):
+        self.dimensions = dimensions
+
+    def _features(self, text: str):
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            yield word, 1.0
+            padded = f"<{word}>"
+            for start in range(len(padded) - 2):
+                yield "#" + padded[start:start + 3], 0.5
+
+    def embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for feature, weight in self._features(text):
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += weight if digest >> 63 else -weight
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+    async def embed(self, texts: List[str], task_type: str = "RETRIEVAL_DOCUMENT") -> List[List[float]]:
+        return [self.embed_one(text) for text in texts]
+
+
+class GeminiEmbedder:
+    """Embeddings from the Gemini API, up to `batch_size` texts per request."""
+
+    name = "gemini"
+    batch_size = 100
+
+    def __init__(self, model: str, dimensions: int = EMBEDDING_DIM):
+        from app.utils.gemini_client import get_gemini_client
+        self.client = get_gemini_client()
+        self.model = model
+        self.dimensions = dimensions
+
+    async def embed(self, texts: List[str], task_type: str = "RETRIEVAL_DOCUMENT") -> List[List[float]]:
+        """
+        Args:
+            texts: Texts to embed
+            task_type: RETRIEVAL_DOCUMENT for stored memories, RETRIEVAL_QUERY
+                for searches, SEMANTIC_SIMILARITY to compare like with like
+
+        Returns:
+            One vector per text, in order
+        """
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(await self.client.embed_texts(
+                texts[start:start + self.batch_size], self.model, task_type, self.dimensions
+            ))
+        return vectors
+
+
+# Global embedder instance (lazy-initialized)
+_embedder: Optional[Any] = None
+
+
+def get_embedder():
+    """The configured embedder (EMBEDDING_BACKEND)."""
+    global _embedder
+    if _embedder is None:
+        from app.config.settings import EMBEDDING_BACKEND, EMBEDDING_MODEL
+        if EMBEDDING_BACKEND == "gemini":
+            _embedder = GeminiEmbedder(EMBEDDING_MODEL)
+        elif EMBEDDING_BACKEND == "hashing":
+            _embedder = HashingEmbedder()
+        else:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND {EMBEDDING_BACKEND!r}; expected gemini or hashing")
+    return _embedder
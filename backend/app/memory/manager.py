@@ -1,13 +1,34 @@
 """
 Memory Manager
-Persistent episodic and semantic memory using Firestore via DiscoveryRepository.
+Persistent episodic and semantic memory using Firestore via DiscoveryRepository,
+with episodes embedded into the per-user vector index for similarity search.
 """
-from typing import Dict, Any, List, Optional
-from app.repositories.discovery_repository import DiscoveryRepository
+from typing import Dict, Any, Iterable, List, Optional
+from app.memory.embedding_pipeline import get_embedding_pipeline
+from app.memory.embeddings import get_embedder, memory_metadata, memory_text
+from app.memory.vector_db import get_vector_db
+from app.models.discovery_record import DiscoveryRecord
+from app.repositories.factory import get_discovery_repository
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Vector hits read per memory wanted, so filtering by child still fills the limit
+CHILD_OVERSAMPLE = 4
+
+
+def episode_from_record(record: DiscoveryRecord) -> Dict[str, Any]:
+    """The memory_data passed to MemoryManager.store_memory for a saved discovery."""
+    return {
+        "discovery_id": record.discovery_id,
+        "user_id": record.user_id,
+        "child_id": record.child_id,
+        "common_name": record.species_info.get("common_name"),
+        "species": record.species_info.get("species"),
+        "text": memory_text(record),
+        "metadata": memory_metadata(record)
+    }
+
 
 class MemoryManager:
     """
@@ -28,52 +49,110 @@ class MemoryManager:
     async def retrieve_memories(
         self,
         query: str,
-        context: Dict[str, Any],
-        limit: int = 5
+        user_id: Optional[str],
+        child_id: Optional[str] = None,
+        limit: int = 5,
+        recent_fallback: bool = True
     ) -> List[Dict[str, Any]]:
         """
-        Retrieve relevant past memories for the current discovery context.
+        Retrieve relevant past memories for the current discovery.
         Args:
-            query: Search query (e.g. species name)
-            context: Loaded child context (contains child_id)
+            query: Search query (e.g. the child's description or a species name)
+            user_id: Firebase UID (the vector index partition)
+            child_id: Only return this child's memories, if given
             limit: Max memories to return
+            recent_fallback: Return recent discoveries when the index has no hits
         Returns:
             List of memory dicts
         """
-        user_id = context.get("child_profile", {}).get("id")
-        return await self.episodic.search(query, user_id=user_id, limit=limit)
+        return await self.episodic.search(
+            query, user_id=user_id, child_id=child_id, limit=limit, recent_fallback=recent_fallback
+        )
+
+    async def forget_episodes(self, user_id: str, discovery_ids: Iterable[str]) -> None:
+        """Remove deleted discoveries from the vector index."""
+        await self.episodic.forget(user_id, list(discovery_ids))
+
+    async def forget_user(self, user_id: str) -> None:
+        """Remove everything remembered for a user (account deletion)."""
+        await self.episodic.forget(user_id, None)
 
 
 class EpisodicMemoryManager:
-    """Handles episode-level memories using Firestore discovery records."""
+    """
+    Handles episode-level memories using Firestore discovery records.
+    Episodes are embedded in the background and searched by similarity; without
+    a vector index (numpy missing) search falls back to the most recent ones.
+    """
 
     def __init__(self):
-        self.discovery_repo = DiscoveryRepository()
+        self.discovery_repo = get_discovery_repository()
+        self.vector_db = get_vector_db()
+        self.pipeline = get_embedding_pipeline()
 
     async def add_episode(self, episode: Dict[str, Any]):
         """
-        Episodes are stored as DiscoveryRecords by the main pipeline.
-        This is a no-op here — called for completeness but saves happen upstream.
+        Queue an episode for embedding. The DiscoveryRecord itself is saved
+        upstream by the discovery jobs; see episode_from_record.
         """
         discovery_id = episode.get("id") or episode.get("discovery_id")
-        logger.debug(f"EpisodicMemory: episode {discovery_id} already stored by pipeline")
+        if self.pipeline is None or not episode.get("text") or not episode.get("user_id"):
+            logger.debug(f"EpisodicMemory: episode {discovery_id} not embedded")
+            return
+
+        await self.pipeline.add(episode["user_id"], discovery_id, episode["text"], episode.get("metadata") or {})
+
+    async def forget(self, user_id: str, discovery_ids: Optional[List[str]]) -> None:
+        """Drop episodes from the index (all of the user's when discovery_ids is None)."""
+        if self.vector_db is None:
+            return
+        self.pipeline.discard(user_id, discovery_ids)
+        if discovery_ids is None:
+            await self.vector_db.delete_user(user_id)
+        else:
+            await self.vector_db.delete(user_id, discovery_ids)
 
     async def search(
         self,
         query: str,
         user_id: Optional[str] = None,
-        limit: int = 5
+        child_id: Optional[str] = None,
+        limit: int = 5,
+        recent_fallback: bool = True
     ) -> List[Dict[str, Any]]:
         """
-        Return recent discoveries as episodic memories.
-        In future this will use vector similarity; for now returns last N by date.
+        Return the user's episodes most similar to the query (only child_id's
+        when given), or the most recent ones when the vector index has none.
         """
         if not user_id or user_id in ("anonymous", "default_child"):
             return []
 
+        if self.vector_db is not None and query:
+            try:
+                embedding = (await get_embedder().embed([query], task_type="RETRIEVAL_QUERY"))[0]
+                top_k = limit * CHILD_OVERSAMPLE if child_id else limit
+                hits = await self.vector_db.search(user_id, embedding, top_k=top_k)
+                if child_id:
+                    hits = [hit for hit in hits if hit["metadata"].get("child_id") == child_id][:limit]
+                if hits:
+                    return [
+                        {
+                            "id": hit["id"],
+                            "content": f"Found a {hit['metadata'].get('common_name') or 'discovery'}",
+                            "timestamp": hit["metadata"].get("timestamp"),
+                            "score": hit["score"]
+                        }
+                        for hit in hits
+                    ]
+            except Exception as e:
+                logger.error(f"EpisodicMemory vector search error, using recent discoveries: {e}")
+
+        if not recent_fallback:
+            return []
+
         try:
             discoveries = await self.discovery_repo.get_user_discoveries(
-                user_id=user_id, limit=limit
+                user_id=user_id, limit=limit, child_id=child_id
             )
             memories = []
             for d in discoveries:
@@ -1,9 +1,549 @@
+"""
+Vector Index
+Per-user in-process vector search for episodic memory, backed by NumPy.
+
+Each user's vectors form a partition of unit-length float32 rows compared by
+cosine similarity. Small partitions are scanned exactly (flat); once one holds
+VECTOR_IVF_THRESHOLD vectors it gets an IVF index: k-means centroids with an
+inverted list per centroid, of which the VECTOR_IVF_NPROBE closest are searched.
+
+Partitions are saved under VECTOR_DIR/<partition>/<generation>/ as .npy files
+and reopened memory-mapped, so a restart reads only the ID list and pages
+vectors in as searches touch them. New vectors go to an in-memory tail that is
+flushed (dropping deleted rows) every VECTOR_FLUSH_SECONDS and at shutdown;
+the CURRENT file switches generations atomically, so a crash loses at most
+the unflushed tail and never leaves a half-written partition.
+
+numpy is optional: without it get_vector_db() returns None.
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# k-means training for IVF: Lloyd iterations and the most rows sampled
+IVF_TRAIN_ITERATIONS = 10
+IVF_TRAIN_SAMPLE = 20000
+
+# Rows scored per matrix product when assigning rows to centroids
+ASSIGN_CHUNK = 8192
+
+# An IVF partition is retrained once it has doubled since the last training
+IVF_RETRAIN_GROWTH = 2
+
+
+def _normalize(vectors):
+    """Scale rows to unit length (zero rows stay zero)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _partition_name(user_id: str) -> str:
+    """Directory name for a user's partition (UIDs never reach the filesystem)."""
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+
+
+class IVFIndex:
+    """Inverted lists over a partition's saved rows, keyed by nearest centroid."""
+
+    def __init__(self, centroids, assignments):
+        self.centroids = centroids
+        self.assignments = assignments
+        self._order = np.argsort(assignments, kind="stable")
+        self._offsets = np.searchsorted(assignments[self._order], np.arange(len(centroids) + 1))
+
+    @staticmethod
+    def assign(centroids, vectors):
+        """Nearest centroid for each row."""
+        chunks = [
+            np.argmax(vectors[start:start + ASSIGN_CHUNK] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), ASSIGN_CHUNK)
+        ]
+        return np.concatenate(chunks).astype(np.int32) if chunks else np.empty(0, dtype=np.int32)
+
+    @classmethod
+    def train(cls, vectors, seed: int = 0) -> "IVFIndex":
+        """Spherical k-means with about sqrt(n) lists, trained on a sample of the rows."""
+        rng = np.random.default_rng(seed)
+        nlist = max(1, int(np.sqrt(len(vectors))))
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), min(len(vectors), IVF_TRAIN_SAMPLE), replace=False))])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+        for _ in range(IVF_TRAIN_ITERATIONS):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            # Lists that lost every row keep their old centroid
+            filled = np.linalg.norm(sums, axis=1) > 0
+            centroids[filled] = _normalize(sums[filled])
+
+        return cls(centroids, cls.assign(centroids, vectors))
+
+    def candidates(self, query, nprobe: int):
+        """Rows in the nprobe lists closest to the query, in row order."""
+        probe = np.argsort(-(self.centroids @ query))[:nprobe]
+        rows = [self._order[self._offsets[c]:self._offsets[c + 1]] for c in probe]
+        return np.sort(np.concatenate(rows))
+
+
+class _Snapshot(NamedTuple):
+    """What a search reads, captured on the event loop before it moves to a thread."""
+    saved: Any
+    tail: Any
+    dead: Any
+    ivf: Optional[IVFIndex]
+    ids: List[str]
+    metadata: List[Dict[str, Any]]
+
+
+class _Partition:
+    """
+    One user's vectors: a saved (memory-mapped) block plus an in-memory tail.
+
+    Rows are numbered saved-first, then tail, matching `ids`. Replaced and
+    deleted rows are marked dead and dropped at the next flush. Changes and
+    flushes hold `lock`; searches work on a snapshot and never wait.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.loaded = False
+        self.lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.generation = 0
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}
+        self.saved = None
+        self.tail: List[Any] = []
+        self._tail_array = None
+        self.dead: set = set()
+        self.ivf: Optional[IVFIndex] = None
+        self.trained_size = 0
+        self.dirty = False
+
+    @property
+    def size(self) -> int:
+        return len(self.rows)
+
+    @property
+    def dim(self) -> Optional[int]:
+        if self.saved is not None:
+            return self.saved.shape[1]
+        return len(self.tail[0]) if self.tail else None
+
+    def load(self) -> None:
+        """Open the current generation, if one was saved."""
+        current = self.path / "CURRENT"
+        if not current.exists():
+            return
+
+        name = current.read_text().strip()
+        directory = self.path / name
+        rows = json.loads((directory / "rows.json").read_text())
+        self.generation = int(name[1:])
+        self.ids = rows["ids"]
+        self.metadata = rows["metadata"]
+        self.trained_size = rows.get("trained_size", 0)
+        self.rows = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        self.saved = np.load(directory / "vectors.npy", mmap_mode="r")
+        if (directory / "centroids.npy").exists():
+            self.ivf = IVFIndex(np.load(directory / "centroids.npy"), np.load(directory / "assignments.npy"))
+
+    def add(self, vector_id: str, vector, metadata: Dict[str, Any]) -> None:
+        """Append a row, replacing any earlier row with the same ID."""
+        if vector_id in self.rows:
+            self.dead.add(self.rows[vector_id])
+        self.rows[vector_id] = len(self.ids)
+        self.ids.append(vector_id)
+        self.metadata.append(metadata)
+        self.tail.append(vector)
+        self._tail_array = None
+        self.dirty = True
+
+    def remove(self, vector_id: str) -> bool:
+        row = self.rows.pop(vector_id, None)
+        if row is None:
+            return False
+        self.dead.add(row)
+        self.dirty = True
+        return True
+
+    def snapshot(self) -> _Snapshot:
+        if self.tail and self._tail_array is None:
+            self._tail_array = np.vstack(self.tail)
+        dead = np.fromiter(self.dead, dtype=np.int64, count=len(self.dead))
+        return _Snapshot(self.saved, self._tail_array, dead, self.ivf, self.ids, self.metadata)
+
+    def adopt(self, other: "_Partition") -> None:
+        """Take over the state of a freshly loaded copy."""
+        for name in ("generation", "ids", "metadata", "rows", "saved", "tail", "_tail_array",
+                     "dead", "ivf", "trained_size", "dirty"):
+            setattr(self, name, getattr(other, name))
+
+    def save(self, ivf_threshold: int) -> "_Partition":
+        """
+        Write live rows as a new generation, switch to it and return it freshly
+        loaded (for adopt()). Runs in a worker thread while `lock` is held, and
+        leaves this object untouched so searches can keep using it meanwhile.
+        """
+        saved_partition = _Partition(self.path)
+        live = np.array([row for row in range(len(self.ids)) if row not in self.dead], dtype=np.int64)
+        if len(live) == 0:
+            shutil.rmtree(self.path, ignore_errors=True)
+            return saved_partition
+
+        dim = self.dim
+        saved_count = len(self.saved) if self.saved is not None else 0
+        saved_keep = live[live < saved_count]
+        tail_keep = live[live >= saved_count] - saved_count
+        saved = self.saved[saved_keep] if saved_count else np.empty((0, dim), dtype=np.float32)
+        tail = np.vstack(self.tail)[tail_keep] if self.tail else np.empty((0, dim), dtype=np.float32)
+        vectors = np.concatenate([saved, tail]).astype(np.float32, copy=False)
+
+        ivf, trained_size = None, 0
+        if len(vectors) >= ivf_threshold:
+            if self.ivf is None or len(vectors) >= IVF_RETRAIN_GROWTH * self.trained_size:
+                ivf, trained_size = IVFIndex.train(vectors), len(vectors)
+            else:
+                assignments = np.concatenate([
+                    self.ivf.assignments[saved_keep] if saved_count else np.empty(0, dtype=np.int32),
+                    IVFIndex.assign(self.ivf.centroids, tail)
+                ])
+                ivf, trained_size = IVFIndex(self.ivf.centroids, assignments), self.trained_size
+
+        ids = [self.ids[row] for row in live]
+        metadata = [self.metadata[row] for row in live]
+        name = f"g{self.generation + 1}"
+        directory = self.path / name
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "vectors.npy", vectors)
+        if ivf is not None:
+            np.save(directory / "centroids.npy", ivf.centroids)
+            np.save(directory / "assignments.npy", ivf.assignments)
+        (directory / "rows.json").write_text(json.dumps({
+            "ids": ids,
+            "metadata": metadata,
+            "trained_size": trained_size
+        }))
+
+        pointer = self.path / "CURRENT.tmp"
+        pointer.write_text(name)
+        os.replace(pointer, self.path / "CURRENT")
+        for old in self.path.iterdir():
+            if old.is_dir() and old.name != name:
+                shutil.rmtree(old, ignore_errors=True)
+
+        saved_partition.load()
+        return saved_partition
+
+
+def _search(snapshot: _Snapshot, queries, top_k: int, nprobe: int) -> List[List[Tuple[int, float]]]:
+    """Top-k (row, score) pairs per query. Runs in a worker thread."""
+    saved, tail, dead, ivf = snapshot.saved, snapshot.tail, snapshot.dead, snapshot.ivf
+    saved_count = len(saved) if saved is not None else 0
+
+    # Exact scores for everything flat, in one product per block
+    saved_scores = queries @ saved.T if saved_count and ivf is None else None
+    tail_scores = queries @ tail.T if tail is not None else None
+    tail_rows = np.arange(saved_count, saved_count + len(tail)) if tail is not None else None
+
+    results = []
+    for i, query in enumerate(queries):
+        rows, scores = [], []
+        if saved_scores is not None:
+            rows.append(np.arange(saved_count))
+            scores.append(saved_scores[i])
+        elif saved_count:
+            candidates = ivf.candidates(query, nprobe)
+            rows.append(candidates)
+            scores.append(saved[candidates] @ query)
+        if tail_scores is not None:
+            rows.append(tail_rows)
+            scores.append(tail_scores[i])
+
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+        if len(dead):
+            keep = ~np.isin(rows, dead)
+            rows, scores = rows[keep], scores[keep]
+
+        k = min(top_k, len(rows))
+        if k == 0:
+            results.append([])
+            continue
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        results.append([(int(rows[j]), float(scores[j])) for j in best])
+
+    return results
+
+
 class VectorDBClient:
-    def __init__(self):
-        pass
+    """
+    Per-user vector index (see module docstring).
+
+    Vector IDs are unique within a user; storing an existing ID replaces it.
+    Every vector in a partition must have the same dimension.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ivf_threshold: int = 4096,
+        nprobe: int = 8,
+        flush_interval: float = 10.0,
+        max_partitions: int = 256
+    ):
+        """
+        Args:
+            directory: Root directory for saved partitions
+            ivf_threshold: Vectors at which a partition gets an IVF index
+            nprobe: Inverted lists searched per query
+            flush_interval: Seconds between background flushes
+            max_partitions: Partitions kept open; flushed ones beyond it are closed
+        """
+        if np is None:
+            raise RuntimeError("VectorDBClient needs numpy")
+        self.directory = Path(directory)
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.flush_interval = flush_interval
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._flush_task is not None
+
+    async def _partition(self, user_id: str) -> _Partition:
+        """Open (loading on first use) a user's partition and mark it recently used."""
+        partition = self._partitions.get(user_id)
+        if partition is None:
+            partition = _Partition(self.directory / _partition_name(user_id))
+            self._partitions[user_id] = partition
+            self._evict(keep=user_id)
+        else:
+            self._partitions.move_to_end(user_id)
+
+        if not partition.loaded:
+            async with partition.lock:
+                if not partition.loaded:
+                    await asyncio.to_thread(partition.load)
+                    partition.loaded = True
+        return partition
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """
+        Close least recently used partitions that have nothing unflushed.
+        `keep` (a partition just opened) is never closed, since its caller is
+        about to write to it.
+        """
+        for user_id in list(self._partitions):
+            if len(self._partitions) <= self.max_partitions:
+                return
+            partition = self._partitions[user_id]
+            if user_id != keep and not partition.dirty and not partition.lock.locked():
+                del self._partitions[user_id]
+
+    def _vectors(self, embeddings: Sequence[Sequence[float]], partition: _Partition):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2:
+            raise ValueError("Embeddings must be equal-length sequences of numbers")
+        if partition.dim is not None and vectors.shape[1] != partition.dim:
+            raise ValueError(f"Expected {partition.dim}-dimensional embeddings, got {vectors.shape[1]}")
+        return _normalize(vectors)
+
+    async def store(
+        self,
+        user_id: str,
+        vector_id: str,
+        embedding: Sequence[float],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Add or replace one vector.
+
+        Args:
+            user_id: Partition owner
+            vector_id: ID unique within the user (e.g. discovery_id)
+            embedding: Vector (normalized here)
+            metadata: JSON-serializable data returned with search hits
+        """
+        await self.store_many(user_id, [(vector_id, embedding, metadata)])
+
+    async def store_many(
+        self,
+        user_id: str,
+        items: Sequence[Tuple[str, Sequence[float], Optional[Dict[str, Any]]]]
+    ) -> int:
+        """
+        Add or replace several vectors in one step.
+
+        Args:
+            user_id: Partition owner
+            items: (vector_id, embedding, metadata) tuples
+
+        Returns:
+            Number of vectors stored
+        """
+        if not items:
+            return 0
+        partition = await self._partition(user_id)
+        async with partition.lock:
+            vectors = self._vectors([embedding for _, embedding, _ in items], partition)
+            for (vector_id, _, metadata), vector in zip(items, vectors):
+                partition.add(vector_id, vector, metadata or {})
+        return len(items)
+
+    async def search(self, user_id: str, embedding: Sequence[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Most similar vectors in a user's partition.
+
+        Returns:
+            Up to top_k hits ({"id", "score", "metadata"}), best first
+        """
+        return (await self.search_batch(user_id, [embedding], top_k))[0]
+
+    async def search_batch(
+        self,
+        user_id: str,
+        embeddings: Sequence[Sequence[float]],
+        top_k: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search a user's partition for several queries at once.
+
+        Args:
+            user_id: Partition owner
+            embeddings: Query vectors
+            top_k: Hits per query
+
+        Returns:
+            One hit list per query, in query order
+        """
+        partition = await self._partition(user_id)
+        if partition.size == 0 or len(embeddings) == 0:
+            return [[] for _ in embeddings]
+
+        queries = self._vectors(embeddings, partition)
+        snapshot = partition.snapshot()
+        hits = await asyncio.to_thread(_search, snapshot, queries, top_k, self.nprobe)
+        return [
+            [{"id": snapshot.ids[row], "score": score, "metadata": snapshot.metadata[row]} for row, score in query_hits]
+            for query_hits in hits
+        ]
+
+    async def delete(self, user_id: str, vector_ids: Sequence[str]) -> int:
+        """
+        Remove vectors by ID.
+
+        Returns:
+            Number of vectors that existed
+        """
+        partition = await self._partition(user_id)
+        async with partition.lock:
+            return sum(partition.remove(vector_id) for vector_id in vector_ids)
+
+    async def delete_user(self, user_id: str) -> None:
+        """Drop a user's partition, in memory and on disk."""
+        partition = self._partitions.pop(user_id, None)
+        path = self.directory / _partition_name(user_id)
+        if partition is None:
+            await asyncio.to_thread(shutil.rmtree, path, True)
+            return
+        async with partition.lock:
+            await asyncio.to_thread(shutil.rmtree, path, True)
+            partition._reset()
+
+    async def contains(self, user_id: str, vector_ids: Sequence[str]) -> List[str]:
+        """The given IDs that are stored for a user."""
+        partition = await self._partition(user_id)
+        return [vector_id for vector_id in vector_ids if vector_id in partition.rows]
+
+    async def entries(self, user_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Every (vector_id, metadata) stored for a user, oldest first."""
+        partition = await self._partition(user_id)
+        return [(vector_id, partition.metadata[row]) for vector_id, row in sorted(partition.rows.items(), key=lambda item: item[1])]
+
+    async def count(self, user_id: str) -> int:
+        """Number of vectors stored for a user."""
+        return (await self._partition(user_id)).size
+
+    async def flush(self) -> int:
+        """
+        Save every partition with unflushed changes.
+
+        Returns:
+            Number of partitions written
+        """
+        written = 0
+        for user_id, partition in list(self._partitions.items()):
+            if not partition.dirty:
+                continue
+            async with partition.lock:
+                if not partition.dirty:
+                    continue
+                try:
+                    partition.adopt(await asyncio.to_thread(partition.save, self.ivf_threshold))
+                    written += 1
+                except Exception as e:
+                    logger.error(f"Failed to save vector partition for user {user_id}: {str(e)}")
+        self._evict()
+        if written:
+            logger.debug(f"Flushed {written} vector partitions")
+        return written
+
+    async def start(self) -> None:
+        """Start the periodic flush task."""
+        if self.running:
+            return
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush task and save everything still unflushed."""
+        if not self.running:
+            return
+        self._flush_task.cancel()
+        await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._flush_task = None
+        await self.flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Vector index flush failed: {str(e)}")
+
+
+# Global client instance (lazy-initialized)
+_vector_db: Optional[VectorDBClient] = None
 
-    async def search(self, embedding: List[float], top_k: int = 5):
-        pass
 
-    async def stored(self, embedding: List[float], metadata: Dict):
-        pass
+def get_vector_db() -> Optional[VectorDBClient]:
+    """The shared vector index, or None when numpy isn't installed."""
+    global _vector_db
+    if _vector_db is None and np is not None:
+        from app.config.settings import (
+            VECTOR_DIR, VECTOR_IVF_THRESHOLD, VECTOR_IVF_NPROBE, VECTOR_FLUSH_SECONDS, VECTOR_MAX_PARTITIONS
+        )
+        _vector_db = VectorDBClient(
+            VECTOR_DIR, VECTOR_IVF_THRESHOLD, VECTOR_IVF_NPROBE, VECTOR_FLUSH_SECONDS, VECTOR_MAX_PARTITIONS
+        )
+    return _vector_db
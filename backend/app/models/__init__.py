@@ -14,7 +14,7 @@ from .discovery import (
     DangerLevel
 )
 from .user_profile import UserProfile, CreateUserRequest, AddChildRequest, UserRole
-from .discovery_record import DiscoveryRecord, CreateDiscoveryRequest, DiscoveryListResponse
+from .discovery_record import DiscoveryRecord, DiscoverySummary, DiscoveryTombstone, CreateDiscoveryRequest, DiscoveryListResponse
 
 __all__ = [
     "AgentMessage",
@@ -35,6 +35,8 @@ __all__ = [
     "AddChildRequest",
     "UserRole",
     "DiscoveryRecord",
+    "DiscoverySummary",
+    "DiscoveryTombstone",
     "CreateDiscoveryRequest",
     "DiscoveryListResponse"
 ]
@@ -3,7 +3,7 @@ Discovery Record Data Models
 Defines Pydantic models for storing and retrieving discovery records.
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, ClassVar
 from datetime import datetime
 
 
@@ -17,7 +17,8 @@ class DiscoveryRecord(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="When the discovery was made")
     
     # Captured data
-    image_url: Optional[str] = Field(None, description="Firebase Storage URL for the captured image")
+    image_url: Optional[str] = Field(None, description="URL of the captured image (display size)")
+    thumbnail_url: Optional[str] = Field(None, description="URL of the captured image's thumbnail")
     location: Optional[Dict[str, float]] = Field(
         None, 
         description="Geographic location {'lat': ..., 'lng': ...}"
@@ -39,10 +40,14 @@ class DiscoveryRecord(BaseModel):
     )
     favorite: bool = Field(default=False, description="Whether user marked as favorite")
     
+    # Sync
+    version: int = Field(0, description="Per-user change version of the last write (0 if never stamped)")
+    
     def to_firestore(self) -> dict:
         """
         Convert to Firestore document format.
-        Excludes discovery_id as it's the document ID.
+        Excludes discovery_id as it's the document ID, and version, which
+        the repository stamps on each write.
         
         Returns:
             Dict suitable for Firestore document
@@ -52,6 +57,7 @@ class DiscoveryRecord(BaseModel):
             "child_id": self.child_id,
             "timestamp": self.timestamp,
             "image_url": self.image_url,
+            "thumbnail_url": self.thumbnail_url,
             "location": self.location,
             "subject_type": self.subject_type,
             "species_info": self.species_info,
@@ -65,23 +71,27 @@ class DiscoveryRecord(BaseModel):
         }
     
     @classmethod
-    def from_firestore(cls, discovery_id: str, data: dict) -> "DiscoveryRecord":
+    def from_firestore(cls, discovery_id: str, data: dict, trusted: bool = False) -> "DiscoveryRecord":
         """
         Create DiscoveryRecord from Firestore document.
         
         Args:
             discovery_id: Document ID
             data: Firestore document data
+            trusted: Skip validation (model_construct). Only for documents
+                this app wrote, with native types (datetimes, not strings)
             
         Returns:
             DiscoveryRecord instance
         """
-        return cls(
+        build = cls.model_construct if trusted else cls
+        return build(
             discovery_id=discovery_id,
             user_id=data["user_id"],
             child_id=data.get("child_id"),
             timestamp=data.get("timestamp", datetime.utcnow()),
             image_url=data.get("image_url"),
+            thumbnail_url=data.get("thumbnail_url"),
             location=data.get("location"),
             subject_type=data["subject_type"],
             species_info=data["species_info"],
@@ -91,7 +101,8 @@ class DiscoveryRecord(BaseModel):
             viewed_at=data.get("viewed_at", datetime.utcnow()),
             time_spent_seconds=data.get("time_spent_seconds"),
             activities_completed=data.get("activities_completed", []),
-            favorite=data.get("favorite", False)
+            favorite=data.get("favorite", False),
+            version=data.get("version", 0)
         )
     
     class Config:
@@ -124,6 +135,94 @@ class DiscoveryRecord(BaseModel):
         }
 
 
+class DiscoverySummary(BaseModel):
+    """
+    Lightweight view of a discovery for list/grid screens.
+    Omits the story, safety reasoning and activities; fetch the full
+    DiscoveryRecord from /api/discoveries/{discovery_id} when needed.
+    """
+    discovery_id: str = Field(..., description="Unique discovery identifier")
+    child_id: Optional[str] = Field(None, description="Child ID if discovery was for a specific child")
+    timestamp: datetime = Field(..., description="When the discovery was made")
+    subject_type: str = Field("unknown", description="Type of subject: plant, insect, animal, etc.")
+    common_name: Optional[str] = Field(None, description="Common name from the specialist agent")
+    scientific_name: Optional[str] = Field(None, description="Scientific name from the specialist agent")
+    image_url: Optional[str] = Field(None, description="URL of the captured image (display size)")
+    thumbnail_url: Optional[str] = Field(None, description="URL of the captured image's thumbnail")
+    favorite: bool = Field(default=False, description="Whether user marked as favorite")
+    
+    # Firestore field paths needed to build a summary (used with select())
+    FIRESTORE_FIELDS: ClassVar[List[str]] = [
+        "child_id",
+        "timestamp",
+        "subject_type",
+        "species_info.common_name",
+        "species_info.scientific_name",
+        "image_url",
+        "thumbnail_url",
+        "favorite"
+    ]
+    
+    @classmethod
+    def from_firestore(cls, discovery_id: str, data: dict, trusted: bool = False) -> "DiscoverySummary":
+        """
+        Create DiscoverySummary from a (projected) Firestore document.
+        
+        Args:
+            discovery_id: Document ID
+            data: Firestore document data
+            trusted: Skip validation (see DiscoveryRecord.from_firestore)
+            
+        Returns:
+            DiscoverySummary instance
+        """
+        species_info = data.get("species_info") or {}
+        build = cls.model_construct if trusted else cls
+        return build(
+            discovery_id=discovery_id,
+            child_id=data.get("child_id"),
+            timestamp=data.get("timestamp", datetime.utcnow()),
+            subject_type=data.get("subject_type", "unknown"),
+            common_name=species_info.get("common_name"),
+            scientific_name=species_info.get("scientific_name"),
+            image_url=data.get("image_url"),
+            thumbnail_url=data.get("thumbnail_url"),
+            favorite=data.get("favorite", False)
+        )
+
+
+class DiscoveryTombstone(BaseModel):
+    """
+    Record of a deleted discovery, kept so offline clients can sync the
+    deletion from the change feed.
+    """
+    discovery_id: str = Field(..., description="ID of the deleted discovery")
+    user_id: str = Field(..., description="Firebase UID of the owner")
+    child_id: Optional[str] = Field(None, description="Child ID of the deleted discovery")
+    version: int = Field(..., description="Per-user change version of the deletion")
+    deleted_at: datetime = Field(default_factory=datetime.utcnow, description="When it was deleted")
+    
+    def to_firestore(self) -> dict:
+        """Convert to Firestore document format (keyed by discovery_id)."""
+        return {
+            "user_id": self.user_id,
+            "child_id": self.child_id,
+            "version": self.version,
+            "deleted_at": self.deleted_at
+        }
+    
+    @classmethod
+    def from_firestore(cls, discovery_id: str, data: dict) -> "DiscoveryTombstone":
+        """Create DiscoveryTombstone from a Firestore document."""
+        return cls(
+            discovery_id=discovery_id,
+            user_id=data["user_id"],
+            child_id=data.get("child_id"),
+            version=data["version"],
+            deleted_at=data.get("deleted_at", datetime.utcnow())
+        )
+
+
 class CreateDiscoveryRequest(BaseModel):
     """Request model for creating a new discovery."""
     child_id: Optional[str] = None
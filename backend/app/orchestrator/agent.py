@@ -1,3 +1,6 @@
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
 from app.orchestrator.context_loader import ContextLoader
 from app.orchestrator.prompt_builder import PromptBuilder
 from app.orchestrator.agent_router import AgentRouter
@@ -13,14 +16,33 @@ class PipOrchestrator:
         self.execution_coordinator = ExecutionCoordinator()
         self.response_synthesizer = ResponseSynthesizer()
         
-    async def process_discovery(self, discovery_input: dict):
+    async def process_discovery(self, discovery_input: dict, user_id: Optional[str] = None):
         """
         Main entry point for processing a child's discovery.
         """
+        context, required_agents, agent_results = await self.identify_discovery(discovery_input, user_id)
+
+        if not agent_results.get("SafetyAgent", {}).get("is_dangerous", False):
+            agent_results = await self.enrich_discovery(required_agents, context, agent_results)
+
+        # 5. Response Synthesis
+        response = self.response_synthesizer.synthesize_response(agent_results, context)
+        
+        return response
+
+    async def identify_discovery(self, discovery_input: dict, user_id: Optional[str] = None):
+        """
+        Runs everything up to and including species identification.
+        Pip's context comes from user_id's context document (defaults when None).
+
+        Returns:
+            Tuple of (context, required_agents, agent_results). The support
+            agents have not run yet; pass the tuple to enrich_discovery().
+        """
         child_id = discovery_input.get("child_id", "default_child")
         
         # 1. Context Loading
-        context = await self.context_loader.load_context(child_id)
+        context = await self.context_loader.load_context(user_id, child_id, discovery_input.get("description"))
         
         # 2. Prompt Construction (Optional for this flow if using specific agents, 
         # but good for the Synthesizer or a Generalist agent)
@@ -31,12 +53,102 @@ class PipOrchestrator:
         required_agents = self.agent_router.route_discovery(discovery_input)
         print(f"Routing to agents: {required_agents}")
         
-        # 4. Execution Coordination
-        agent_results = await self.execution_coordinator.execute_agents(
+        # 4. Execution Coordination (Safety -> Specialist)
+        agent_results = await self.execution_coordinator.execute_identification(
             required_agents, context, discovery_input
         )
-        
-        # 5. Response Synthesis
-        response = self.response_synthesizer.synthesize_response(agent_results, context)
-        
-        return response
+
+        return context, required_agents, agent_results
+
+    async def enrich_discovery(self, required_agents: list, context: dict, agent_results: dict) -> dict:
+        """
+        Runs the support agents (story + activity) for an identified discovery.
+        Safe to call from a background job; returns the merged agent results.
+        """
+        return await self.execution_coordinator.execute_support(
+            required_agents, context, agent_results
+        )
+
+    async def identify_batch(
+        self,
+        discovery_inputs: List[dict],
+        images_per_call: int = 4,
+        user_id: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Identify several discoveries at once (e.g. a finished live session).
+
+        Exact duplicate images are identified once, contexts are loaded once per
+        child, and images are packed into shared specialist calls. After
+        identification, discoveries of an already-seen species are marked as
+        duplicates of the first one. Both kinds of duplicate are per child: the
+        same photo or species from two children stays two discoveries.
+
+        Returns:
+            One dict per input, in order: {"index", "duplicate_of", "context",
+            "required_agents", "agent_results"}. "duplicate_of" is the index of
+            the entry that holds the canonical result, or None.
+        """
+        entries = [{"index": i, "duplicate_of": None} for i in range(len(discovery_inputs))]
+
+        # Deduplicate by image hash before spending any model calls. Duplicates
+        # are only folded within one child, so each child keeps their own discovery.
+        first_by_hash: Dict[Tuple[Optional[str], str], int] = {}
+        for i, discovery_input in enumerate(discovery_inputs):
+            digest = image_digest(discovery_input.get("media_data"))
+            if digest is None:
+                continue
+            key = (discovery_input.get("child_id"), digest)
+            if key in first_by_hash:
+                entries[i]["duplicate_of"] = first_by_hash[key]
+            else:
+                first_by_hash[key] = i
+
+        unique = [i for i, entry in enumerate(entries) if entry["duplicate_of"] is None]
+
+        # Context Loading (once per child)
+        child_ids = {discovery_inputs[i].get("child_id", "default_child") for i in unique}
+        loaded = await asyncio.gather(*(self.context_loader.load_context(user_id, c) for c in child_ids))
+        contexts = dict(zip(child_ids, loaded))
+        for context in contexts.values():
+            context["system_instruction"] = self.prompt_builder.build_system_instruction(context)
+
+        # Routing + batched Safety -> Specialist
+        agents_per_input = [self.agent_router.route_discovery(discovery_inputs[i]) for i in unique]
+        results = await self.execution_coordinator.execute_identification_batch(
+            agents_per_input, [discovery_inputs[i] for i in unique], images_per_call=images_per_call
+        )
+
+        # Deduplicate by identified species
+        first_by_species: Dict[Tuple[Optional[str], str], int] = {}
+        for i, agents, agent_results in zip(unique, agents_per_input, results):
+            entries[i]["context"] = contexts[discovery_inputs[i].get("child_id", "default_child")]
+            entries[i]["required_agents"] = agents
+            entries[i]["agent_results"] = agent_results
+
+            species = (agent_results.get("Specialist", {}).get("common_name") or "").strip().lower()
+            if not species or species == "mystery discovery":
+                continue
+            key = (discovery_inputs[i].get("child_id"), species)
+            if key in first_by_species:
+                entries[i]["duplicate_of"] = first_by_species[key]
+            else:
+                first_by_species[key] = i
+
+        # Point every duplicate straight at its canonical entry
+        for entry in entries:
+            root = entry["duplicate_of"]
+            while root is not None and entries[root]["duplicate_of"] is not None:
+                root = entries[root]["duplicate_of"]
+            entry["duplicate_of"] = root
+
+        return entries
+
+
+def image_digest(media_data: Optional[str]) -> Optional[str]:
+    """SHA-256 of a base64 image payload (data: prefix ignored), or None if empty."""
+    if not media_data:
+        return None
+    if "," in media_data:
+        media_data = media_data.split(",", 1)[1]
+    return hashlib.sha256(media_data.strip().encode("ascii", "ignore")).hexdigest()
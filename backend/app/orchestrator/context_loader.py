@@ -1,62 +1,133 @@
-from typing import Dict, Any
-from app.repositories.user_repository import UserRepository
-from app.repositories.discovery_repository import DiscoveryRepository
+from typing import Dict, Any, List, Optional
+from app.repositories.factory import get_child_context_repository
+from app.repositories.child_context_repository import child_key
+from app.memory.manager import MemoryManager
+from app.agents.semantic_cache import PLACEHOLDER_DESCRIPTIONS
+from app.config.settings import CONTEXT_CACHE_TTL_SECONDS, CONTEXT_CACHE_MAX_ENTRIES
+from app.models.discovery_record import DiscoveryRecord
+from app.utils.ttl_cache import TTLCache
+import copy
+
+# Recent discoveries included as memories
+RECENT_MEMORIES = 3
+# Most-explored subject types passed to the prompt
+FAVORITE_TOPICS = 3
+# Past discoveries similar to the current one (vector search)
+RELATED_MEMORIES = 3
+
+# Per-user context documents, shared by every ContextLoader so profile
+# changes can invalidate them (see invalidate_context)
+_snapshots: TTLCache[Dict[str, Any]] = TTLCache(
+    CONTEXT_CACHE_TTL_SECONDS,
+    max_entries=CONTEXT_CACHE_MAX_ENTRIES,
+    name="context"
+)
+
+
+def invalidate_context(user_id: str) -> None:
+    """Drop a cached context snapshot (call after the profile behind it changes)."""
+    _snapshots.invalidate(user_id)
 
 
 class ContextLoader:
     def __init__(self):
-        self.user_repo = UserRepository()
-        self.discovery_repo = DiscoveryRepository()
+        self.child_context_repo = get_child_context_repository()
+        self.memory_manager = MemoryManager()
 
-    async def load_context(self, child_id: str) -> Dict[str, Any]:
+    async def load_context(
+        self,
+        user_id: Optional[str],
+        child_id: Optional[str] = None,
+        query: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Loads the complete context for a child, including profile and recent memories.
-        Falls back to safe defaults if child_id is missing or not found.
+        Falls back to safe defaults for anonymous requests or unknown users.
+        With a query (the child's description), the child's most similar past
+        discoveries are added as "related_memories".
+
+        Everything comes from the user's denormalized context document (one
+        point read), cached per user and kept current by record_discoveries(),
+        so active sessions don't re-query anything. The profile is the one
+        matching child_id, else the document's default profile.
         """
-        child_profile = {
+        if not user_id:
+            return self._build(child_id, {})
+
+        snapshot = _snapshots.get(user_id)
+        if snapshot is None:
+            try:
+                snapshot = await self.child_context_repo.get_context(user_id)
+                _snapshots.set(user_id, snapshot)
+            except Exception as e:
+                print(f"ContextLoader: Could not load profile for {user_id}: {e}")
+                # Fall through to defaults
+                snapshot = {}
+
+        context = self._build(child_id, snapshot)
+        if query and query.strip().lower() not in PLACEHOLDER_DESCRIPTIONS:
+            context["related_memories"] = await self._related_memories(user_id, child_id, query, context)
+        return context
+
+    async def _related_memories(
+        self,
+        user_id: str,
+        child_id: Optional[str],
+        query: str,
+        context: Dict[str, Any]
+    ) -> List[str]:
+        """Similar past discoveries from the memory index, minus those already listed as recent."""
+        try:
+            memories = await self.memory_manager.retrieve_memories(
+                query, user_id, child_id, limit=RELATED_MEMORIES, recent_fallback=False
+            )
+        except Exception as e:
+            print(f"ContextLoader: Could not retrieve memories for {user_id}: {e}")
+            return []
+        return [m["content"] for m in memories if m["content"] not in context["recent_memories"]]
+
+    async def record_discoveries(self, user_id: str, discoveries: List[DiscoveryRecord]) -> None:
+        """
+        Fold newly saved discoveries into the user's context document and the
+        cached snapshot. Call after the discoveries are saved.
+        """
+        updated = await self.child_context_repo.record_discoveries(user_id, discoveries)
+        if updated is not None:
+            _snapshots.set(user_id, updated)
+        else:
+            _snapshots.invalidate(user_id)
+
+    async def rebuild(self, user_id: str) -> None:
+        """
+        Regenerate the user's context document from history and refresh the
+        cached snapshot. Call after discoveries are deleted.
+        """
+        _snapshots.set(user_id, await self.child_context_repo.rebuild(user_id))
+
+    @staticmethod
+    def _build(child_id: Optional[str], snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Fresh context dict (callers add keys to it) from the child's part of a context document."""
+        profile = (snapshot.get("children") or {}).get(child_id) or snapshot.get("profile")
+        section = (snapshot.get("by_child") or {}).get(child_key(child_id), {})
+        child_profile = copy.deepcopy(profile) or {
             "id": child_id or "anonymous",
             "name": "Explorer",
             "age": 7,
             "interests": ["nature", "space"]
         }
-        recent_memories = []
 
-        # Try to load real child profile from Firestore
-        if child_id and child_id != "default_child":
-            try:
-                # child_id may be a user_id or a child sub-id depending on flow
-                user = await self.user_repo.get_user(child_id)
-                if user:
-                    # Use the parent user's first child profile if available
-                    if user.children:
-                        child = user.children[0]
-                        child_profile = {
-                            "id": child.child_id,
-                            "name": child.name,
-                            "age": child.age,
-                            "interests": child.interests or ["nature"]
-                        }
-                    else:
-                        # Use the authenticated user's display name
-                        child_profile["name"] = user.display_name or "Explorer"
-
-                # Load last 3 discoveries as memory context
-                discoveries = await self.discovery_repo.get_user_discoveries(
-                    user_id=child_id, limit=3
-                )
-                for d in discoveries:
-                    species = d.species_info.get("common_name", "") if d.species_info else ""
-                    if species:
-                        recent_memories.append(f"Found a {species}")
-            except Exception as e:
-                print(f"ContextLoader: Could not load profile for {child_id}: {e}")
-                # Fall through to defaults already set above
+        interest_counts = section.get("interest_counts", {})
+        favorite_topics = sorted(interest_counts, key=interest_counts.get, reverse=True)[:FAVORITE_TOPICS]
 
         return {
             "child_profile": child_profile,
-            "recent_memories": recent_memories,
+            "recent_memories": [
+                f"Found a {entry['common_name']}"
+                for entry in section.get("recent", [])[:RECENT_MEMORIES]
+            ],
+            "favorite_topics": [t for t in favorite_topics if t != "unknown"],
             "personality_state": {
                 "mood": "enthusiastic",
-                "relationship_level": 1
+                "relationship_level": section.get("relationship_level", 1)
             }
         }
@@ -3,6 +3,7 @@ import asyncio
 from app.agents.safety_agent import SafetyAgent
 from app.agents.specialist_agent import BotanistAgent, EntomologistAgent, ZoologistAgent
 from app.agents.support_agent import StorytellerAgent, EducatorAgent
+from app.utils.cancellation import track_agent
 
 class ExecutionCoordinator:
     def __init__(self):
@@ -22,12 +23,24 @@ class ExecutionCoordinator:
         Orchestrates the execution of selected agents.
         Enforces the C4 flow: Safety -> Specialist -> Support
         """
+        results = await self.execute_identification(agents, context, discovery_input)
+
+        if results.get("SafetyAgent", {}).get("is_dangerous", False):
+            return results
+
+        return await self.execute_support(agents, context, results)
+
+    async def execute_identification(self, agents: List[str], context: Dict[str, Any], discovery_input: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Runs the Safety -> Specialist half of the flow.
+        This is all the child needs to see the identification result.
+        """
         results = {}
         
         # 1. Safety Check (Blocking)
         if "SafetyAgent" in agents:
             # safety_result = await self._mock_agent_call("SafetyAgent", context, discovery_input)
-            safety_result = await self.safety_agent.evaluate_safety(discovery_input)
+            safety_result = await track_agent("SafetyAgent", self.safety_agent.evaluate_safety(discovery_input))
             results["SafetyAgent"] = safety_result
             
             if safety_result.get("is_dangerous", False):
@@ -39,10 +52,11 @@ class ExecutionCoordinator:
         specialist_names = []
         for agent_name in agents:
             if agent_name in self.specialists:
-                specialist_tasks.append(self.specialists[agent_name].analyze(discovery_input))
+                specialist_tasks.append(track_agent(agent_name, self.specialists[agent_name].analyze(discovery_input)))
                 specialist_names.append(agent_name)
         
         if specialist_tasks:
+            # Cancelling this coroutine cancels every pending specialist call
             specialist_results = await asyncio.gather(*specialist_tasks)
             # Store primary specialist result (assuming one major specialist for now)
             # In C4, we might have multiple, but efficient synthesis usually relies on one primary identification
@@ -51,6 +65,67 @@ class ExecutionCoordinator:
                 # If multiple, we might want to merge them or store list
                 results["AllSpecialists"] = dict(zip(specialist_names, specialist_results))
 
+        return results
+
+    async def execute_identification_batch(
+        self,
+        agents_per_input: List[List[str]],
+        discovery_inputs: List[Dict[str, Any]],
+        images_per_call: int = 4
+    ) -> List[Dict[str, Any]]:
+        """
+        Batched Safety -> Specialist for several discoveries.
+        Safety checks run concurrently; each specialist then identifies all of
+        its safe discoveries together, packing images into shared calls.
+        Returns one results dict per input, in input order.
+        """
+        batch_results: List[Dict[str, Any]] = [{} for _ in discovery_inputs]
+
+        # 1. Safety Check (Blocking, per discovery)
+        safety_indexes = [i for i, agents in enumerate(agents_per_input) if "SafetyAgent" in agents]
+        safety_results = await asyncio.gather(*(
+            track_agent("SafetyAgent", self.safety_agent.evaluate_safety(discovery_inputs[i]))
+            for i in safety_indexes
+        ))
+        for i, safety_result in zip(safety_indexes, safety_results):
+            batch_results[i]["SafetyAgent"] = safety_result
+
+        # 2. Specialist Consultation (grouped by specialist)
+        groups: Dict[str, List[int]] = {}
+        for i, agents in enumerate(agents_per_input):
+            if batch_results[i].get("SafetyAgent", {}).get("is_dangerous", False):
+                continue
+            for agent_name in agents:
+                if agent_name in self.specialists:
+                    groups.setdefault(agent_name, []).append(i)
+
+        outputs_per_input: List[Dict[str, Dict[str, Any]]] = [{} for _ in discovery_inputs]
+
+        async def run_group(agent_name: str, indexes: List[int]) -> None:
+            outputs = await track_agent(agent_name, self.specialists[agent_name].analyze_batch(
+                [discovery_inputs[i] for i in indexes], images_per_call=images_per_call
+            ))
+            for i, output in zip(indexes, outputs):
+                outputs_per_input[i][agent_name] = output
+
+        await asyncio.gather(*(run_group(name, indexes) for name, indexes in groups.items()))
+
+        # Same as the single path: the primary specialist is the first in routing order
+        for i, agents in enumerate(agents_per_input):
+            ordered = {name: outputs_per_input[i][name] for name in agents if name in outputs_per_input[i]}
+            if ordered:
+                batch_results[i]["Specialist"] = next(iter(ordered.values()))
+                batch_results[i]["AllSpecialists"] = ordered
+
+        return batch_results
+
+    async def execute_support(self, agents: List[str], context: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Runs the Support half of the flow (story + activity) on top of
+        identification results. Returns the merged results.
+        """
+        results = dict(results)
+
         # 3. Support Agents (Parallel)
         # Using specialist output to inform support agents
         support_tasks = []
@@ -59,10 +134,10 @@ class ExecutionCoordinator:
         
         for agent_name in agents:
             if agent_name == "Storyteller":
-                support_tasks.append(self.support_agents["Storyteller"].generate_story(specialist_data, context))
+                support_tasks.append(track_agent("Storyteller", self.support_agents["Storyteller"].generate_story(specialist_data, context)))
                 support_names.append("Storyteller")
             elif agent_name == "Educator":
-                support_tasks.append(self.support_agents["Educator"].generate_activity(specialist_data))
+                support_tasks.append(track_agent("Educator", self.support_agents["Educator"].generate_activity(specialist_data)))
                 support_names.append("Educator")
                 
         if support_tasks:
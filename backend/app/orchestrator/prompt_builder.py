@@ -26,10 +26,20 @@ Guidelines:
 - Use emojis to make the text friendly 🌿🔍.
 
 """
+        # Add what the child explores most, if known
+        if context.get("favorite_topics"):
+            base_prompt += f"\nFavourite things to explore: {', '.join(context['favorite_topics'])}\n"
+
         # Add memory references if available
         if context["recent_memories"]:
             base_prompt += "\nRecent adventures:\n"
             for memory in context["recent_memories"]:
                 base_prompt += f"- {memory}\n"
 
+        # Past discoveries similar to this one, if any
+        if context.get("related_memories"):
+            base_prompt += "\nEarlier finds that may be related:\n"
+            for memory in context["related_memories"]:
+                base_prompt += f"- {memory}\n"
+
         return base_prompt
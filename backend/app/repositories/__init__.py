@@ -1,5 +1,32 @@
 """Repositories package."""
 from .user_repository import UserRepository
 from .discovery_repository import DiscoveryRepository
+from .stats_repository import StatsRepository
+from .child_context_repository import ChildContextRepository
+from .base import (
+    UserRepositoryProtocol,
+    DiscoveryRepositoryProtocol,
+    StatsRepositoryProtocol,
+    ChildContextRepositoryProtocol
+)
+from .factory import (
+    get_user_repository,
+    get_discovery_repository,
+    get_stats_repository,
+    get_child_context_repository
+)
 
-__all__ = ['UserRepository', 'DiscoveryRepository']
+__all__ = [
+    'UserRepository',
+    'DiscoveryRepository',
+    'StatsRepository',
+    'ChildContextRepository',
+    'UserRepositoryProtocol',
+    'DiscoveryRepositoryProtocol',
+    'StatsRepositoryProtocol',
+    'ChildContextRepositoryProtocol',
+    'get_user_repository',
+    'get_discovery_repository',
+    'get_stats_repository',
+    'get_child_context_repository'
+]
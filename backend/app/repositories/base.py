@@ -0,0 +1,141 @@
+"""
+Repository Interfaces
+Protocols implemented by every storage backend (Firestore, SQLite, in-memory).
+
+Application code should depend on these rather than on a concrete backend and
+get its instances from app.repositories.factory.
+"""
+from app.models.discovery_record import DiscoveryRecord, DiscoverySummary, DiscoveryTombstone
+from app.models.user_profile import UserProfile, ChildProfile
+from typing import Callable, Dict, Iterable, List, Optional, Protocol, Tuple, Union, runtime_checkable
+from datetime import datetime, timezone
+
+
+def utc_naive(timestamp: datetime) -> datetime:
+    """Normalize a datetime to naive UTC so stored timestamps compare and sort consistently."""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+@runtime_checkable
+class UserRepositoryProtocol(Protocol):
+    """User profile storage."""
+
+    async def create_user(self, user_profile: UserProfile) -> UserProfile: ...
+
+    async def get_user(self, user_id: str) -> Optional[UserProfile]: ...
+
+    async def update_last_active(self, user_id: str) -> None: ...
+
+    async def add_child(self, user_id: str, child_profile: ChildProfile) -> None: ...
+
+    async def get_or_create_user(
+        self,
+        user_id: str,
+        email: str,
+        display_name: Optional[str] = None
+    ) -> UserProfile: ...
+
+    async def update_preferences(self, user_id: str, preferences: dict) -> None: ...
+
+    async def delete_user(self, user_id: str) -> bool: ...
+
+
+@runtime_checkable
+class DiscoveryRepositoryProtocol(Protocol):
+    """Discovery record storage."""
+
+    async def save_discovery(self, discovery: DiscoveryRecord) -> str: ...
+
+    async def save_discoveries(self, discoveries: List[DiscoveryRecord]) -> List[str]: ...
+
+    async def get_discovery(self, discovery_id: str) -> Optional[DiscoveryRecord]: ...
+
+    async def get_user_discoveries(
+        self,
+        user_id: str,
+        limit: int = 50,
+        child_id: Optional[str] = None,
+        page: int = 1,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]: ...
+
+    async def get_user_discoveries_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        child_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        summary: bool = False
+    ) -> Tuple[List[Union[DiscoveryRecord, DiscoverySummary]], Optional[str]]: ...
+
+    async def get_recent_discoveries(
+        self,
+        user_id: str,
+        days: int = 7,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]: ...
+
+    async def get_favorites(
+        self,
+        user_id: str,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]: ...
+
+    async def update_discovery(self, discovery_id: str, updates: dict, user_id: Optional[str] = None) -> None: ...
+
+    async def mark_favorite(self, discovery_id: str, favorite: bool = True, user_id: Optional[str] = None) -> None: ...
+
+    async def count_user_discoveries(self, user_id: str, child_id: Optional[str] = None) -> int: ...
+
+    async def delete_discovery(
+        self,
+        discovery_id: str,
+        user_id: Optional[str] = None
+    ) -> Optional[DiscoveryTombstone]: ...
+
+    async def delete_user_discoveries(
+        self,
+        user_id: str,
+        on_page: Optional[Callable[[List[str]], None]] = None
+    ) -> int: ...
+
+    async def image_in_use(self, image_url: str) -> bool: ...
+
+    async def get_version(self, user_id: str) -> int: ...
+
+    async def get_changes(
+        self,
+        user_id: str,
+        since: int,
+        limit: int = 500
+    ) -> Tuple[List[DiscoveryRecord], List[DiscoveryTombstone], bool]: ...
+
+
+@runtime_checkable
+class StatsRepositoryProtocol(Protocol):
+    """Per-user stats rollup storage."""
+
+    async def record_discoveries(self, user_id: str, discoveries: Iterable[DiscoveryRecord]) -> None: ...
+
+    async def get_stats(self, user_id: str) -> Dict[str, int]: ...
+
+    async def rebuild(self, user_id: str) -> dict: ...
+
+    async def delete(self, user_id: str) -> None: ...
+
+
+@runtime_checkable
+class ChildContextRepositoryProtocol(Protocol):
+    """Denormalized child context document storage."""
+
+    async def get_context(self, context_id: str) -> dict: ...
+
+    async def record_discoveries(self, context_id: str, discoveries: Iterable[DiscoveryRecord]) -> Optional[dict]: ...
+
+    async def update_profile(self, context_id: str, user: Optional[UserProfile]) -> None: ...
+
+    async def rebuild(self, context_id: str) -> dict: ...
+
+    async def delete(self, context_id: str) -> None: ...
@@ -0,0 +1,268 @@
+"""
+Child Context Repository
+Denormalized context documents for Pip, maintained on write.
+
+Each context is one small `child_contexts/{uid}` document per user (one
+point read per session), with a section per child so siblings' discoveries
+stay apart:
+    version:            CONTEXT_VERSION (older documents are rebuilt on read)
+    profile:            {"id", "name", "age", "interests"} or None (default profile)
+    children:           {child_id: profile} for each child profile
+    by_child:           {child_key(child_id): section}, each section holding
+        recent:             [{"discovery_id", "common_name"}] newest first, RECENT_SPECIES long
+        interest_counts:    {subject_type: n}
+        discovery_count:    discoveries applied
+        relationship_level: 1..MAX_RELATIONSHIP_LEVEL, grows with discovery_count
+    applied_ids:        last APPLIED_IDS discovery IDs applied (makes retries idempotent)
+"""
+from app.config.firebase_config import FirebaseConfig
+from app.config.settings import FIRESTORE_LAYOUT
+from app.models.discovery_record import DiscoveryRecord
+from app.models.user_profile import UserProfile
+from app.repositories.base import utc_naive
+from app.repositories.discovery_layout import merge_streams, user_discovery_queries
+from google.cloud.firestore import async_transactional
+from google.api_core.exceptions import NotFound
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Species kept for "recent adventures"
+RECENT_SPECIES = 10
+# Discovery IDs remembered for de-duplication
+APPLIED_IDS = 100
+# Discoveries per relationship level, and the top level
+RELATIONSHIP_STEP = 10
+MAX_RELATIONSHIP_LEVEL = 5
+# Document format; documents with another version are rebuilt from history
+CONTEXT_VERSION = 2
+# by_child key for discoveries and requests without a child_id
+ACCOUNT_KEY = "_account"
+
+
+def child_key(child_id: Optional[str]) -> str:
+    """The by_child section a child_id's discoveries go to."""
+    return child_id if child_id and child_id != "default_child" else ACCOUNT_KEY
+
+
+def is_current(context: dict) -> bool:
+    """Whether a stored context document has the current format."""
+    return context.get("version") == CONTEXT_VERSION
+
+
+def context_profiles(context_id: str, user: Optional[UserProfile]) -> Dict[str, Any]:
+    """
+    Profile fields Pip needs, from the user document.
+    "children" maps each child_id to its profile; "profile" is the default for
+    requests without a known child (the first child, else the user's display name).
+    """
+    if user is None:
+        return {"profile": None, "children": {}}
+
+    children = {
+        child.child_id: {
+            "id": child.child_id,
+            "name": child.name,
+            "age": child.age,
+            "interests": child.interests or ["nature"]
+        }
+        for child in user.children
+    }
+
+    if user.children:
+        profile = children[user.children[0].child_id]
+    else:
+        profile = {
+            "id": context_id,
+            "name": user.display_name or "Explorer",
+            "age": 7,
+            "interests": ["nature", "space"]
+        }
+    return {"profile": profile, "children": children}
+
+
+def relationship_level(discovery_count: int) -> int:
+    return min(1 + discovery_count // RELATIONSHIP_STEP, MAX_RELATIONSHIP_LEVEL)
+
+
+def apply_discovery(context: dict, discovery: DiscoveryRecord) -> bool:
+    """
+    Fold one discovery into its child's section of a context document, in
+    place. Apply discoveries oldest first.
+
+    Returns:
+        False if the discovery had already been applied, True otherwise
+    """
+    applied_ids = context.setdefault("applied_ids", [])
+    if discovery.discovery_id in applied_ids:
+        return False
+    applied_ids.append(discovery.discovery_id)
+    del applied_ids[:-APPLIED_IDS]
+
+    section = context.setdefault("by_child", {}).setdefault(child_key(discovery.child_id), {})
+    section["discovery_count"] = section.get("discovery_count", 0) + 1
+    section["relationship_level"] = relationship_level(section["discovery_count"])
+
+    subject_type = discovery.subject_type or "unknown"
+    interest_counts = section.setdefault("interest_counts", {})
+    interest_counts[subject_type] = interest_counts.get(subject_type, 0) + 1
+
+    common_name = (discovery.species_info or {}).get("common_name")
+    if common_name:
+        recent = section.setdefault("recent", [])
+        recent.insert(0, {"discovery_id": discovery.discovery_id, "common_name": common_name})
+        del recent[RECENT_SPECIES:]
+
+    context["updated_at"] = datetime.utcnow()
+    return True
+
+
+def build_context(
+    context_id: str,
+    user: Optional[UserProfile],
+    discoveries_oldest_first: Iterable[DiscoveryRecord]
+) -> dict:
+    """Build a context document from scratch (rebuilds and backfills)."""
+    context: dict = {"version": CONTEXT_VERSION, "by_child": {}, **context_profiles(context_id, user)}
+    for discovery in discoveries_oldest_first:
+        apply_discovery(context, discovery)
+    context["updated_at"] = datetime.utcnow()
+    return context
+
+
+@async_transactional
+async def _apply_in_transaction(transaction, context_ref, discoveries: List[DiscoveryRecord]) -> Optional[dict]:
+    snapshot = await context_ref.get(transaction=transaction)
+    if not snapshot.exists or not is_current(snapshot.to_dict()):
+        # Built from history on next read, which will include these
+        return None
+
+    context = snapshot.to_dict()
+    applied = [apply_discovery(context, discovery) for discovery in discoveries]
+    if any(applied):
+        transaction.set(context_ref, context)
+    return context
+
+
+class ChildContextRepository:
+    """Repository for denormalized child context documents."""
+
+    def __init__(self):
+        """Initialize repository with async Firestore client."""
+        self.db = FirebaseConfig.get_async_firestore()
+        self.contexts_ref = self.db.collection('child_contexts')
+        self.users_ref = self.db.collection('users')
+        self.layout = FIRESTORE_LAYOUT
+
+    async def get_context(self, context_id: str) -> dict:
+        """
+        Get a context document with one point read.
+        Builds it from the user document and history the first time.
+
+        Args:
+            context_id: Context document ID (the user's UID)
+
+        Returns:
+            Context document data
+        """
+        doc = await self.contexts_ref.document(context_id).get()
+        if doc.exists and is_current(doc.to_dict()):
+            return doc.to_dict()
+        return await self.rebuild(context_id)
+
+    async def record_discoveries(self, context_id: str, discoveries: Iterable[DiscoveryRecord]) -> Optional[dict]:
+        """
+        Fold newly saved discoveries into a context document (one transaction).
+
+        Args:
+            context_id: Context document ID (the discoveries' user_id)
+            discoveries: Saved DiscoveryRecord instances
+
+        Returns:
+            The updated context, or None if the document doesn't exist yet
+        """
+        discoveries = sorted(discoveries, key=lambda d: utc_naive(d.timestamp))
+        if not discoveries:
+            return None
+
+        try:
+            return await _apply_in_transaction(
+                self.db.transaction(),
+                self.contexts_ref.document(context_id),
+                discoveries
+            )
+
+        except Exception as e:
+            logger.error(f"Failed to update child context {context_id}: {str(e)}")
+            raise
+
+    async def update_profile(self, context_id: str, user: Optional[UserProfile]) -> None:
+        """
+        Refresh the profile fields after the user document changed.
+        Contexts that haven't been built yet are left alone.
+
+        Args:
+            context_id: Context document ID
+            user: Current user profile
+        """
+        try:
+            await self.contexts_ref.document(context_id).update({
+                **context_profiles(context_id, user),
+                "updated_at": datetime.utcnow()
+            })
+
+        except NotFound:
+            pass
+        except Exception as e:
+            logger.error(f"Failed to update child context profile {context_id}: {str(e)}")
+            raise
+
+    async def rebuild(self, context_id: str) -> dict:
+        """
+        Regenerate a context document from the user document and full history.
+        Streams only the fields the context needs. Only stored for IDs that
+        belong to a user, so arbitrary child_ids don't create documents.
+
+        Args:
+            context_id: Context document ID
+
+        Returns:
+            The rebuilt context data
+        """
+        try:
+            user_doc = await self.users_ref.document(context_id).get()
+            user = UserProfile.from_firestore(context_id, user_doc.to_dict()) if user_doc.exists else None
+
+            queries = [
+                query.order_by('timestamp').select(['timestamp', 'child_id', 'subject_type', 'species_info.common_name'])
+                for query in await user_discovery_queries(self.db, self.layout, context_id)
+            ]
+
+            discoveries = []
+            async for doc in merge_streams(queries, key=lambda doc: doc.get('timestamp')):
+                data = doc.to_dict()
+                discoveries.append(DiscoveryRecord.model_construct(
+                    discovery_id=doc.id,
+                    timestamp=data["timestamp"],
+                    child_id=data.get("child_id"),
+                    subject_type=data.get("subject_type"),
+                    species_info=data.get("species_info") or {}
+                ))
+
+            context = build_context(context_id, user, discoveries)
+            if user is not None:
+                await self.contexts_ref.document(context_id).set(context)
+
+            logger.info(f"Rebuilt child context {context_id} from {len(discoveries)} discoveries")
+            return context
+
+        except Exception as e:
+            logger.error(f"Failed to rebuild child context {context_id}: {str(e)}")
+            raise
+
+    async def delete(self, context_id: str) -> None:
+        """Delete a context document."""
+        await self.contexts_ref.document(context_id).delete()
+        logger.info(f"Deleted child context {context_id}")
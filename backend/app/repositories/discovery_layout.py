@@ -0,0 +1,69 @@
+"""
+Discovery Layout
+Where discovery documents live in Firestore (FIRESTORE_LAYOUT).
+
+    flat    discoveries/{discovery_id}, filtered by user_id (and child_id)
+    nested  users/{uid}/children/{child_id}/discoveries/{discovery_id}
+
+In the nested layout each child's history is its own small collection, so
+queries need only single-field indexes and never scan other users'
+documents. Discoveries without a child go under UNASSIGNED_CHILD. Change
+versions, tombstones and counters stay in their top-level per-user
+collections in both layouts.
+
+Copy an existing flat collection across with app/tools/migrate_layout.py.
+"""
+from typing import Any, AsyncIterator, Callable, List, Optional
+import asyncio
+
+LAYOUTS = ("flat", "nested")
+
+# Child document ID for discoveries saved without a child_id
+UNASSIGNED_CHILD = "_unassigned"
+
+
+def child_discoveries_ref(db, user_id: str, child_id: Optional[str]):
+    """The nested discoveries collection of one child."""
+    return (db.collection('users').document(user_id)
+            .collection('children').document(child_id or UNASSIGNED_CHILD)
+            .collection('discoveries'))
+
+
+async def user_discovery_queries(db, layout: str, user_id: str, child_id: Optional[str] = None) -> List[Any]:
+    """
+    Base queries that together cover a user's discoveries (optionally one child's).
+
+    Flat: one query on the shared collection. Nested: one collection per
+    child, found by listing users/{uid}/children (child documents needn't exist).
+    """
+    if layout == "nested":
+        if child_id:
+            return [child_discoveries_ref(db, user_id, child_id)]
+        children = db.collection('users').document(user_id).collection('children')
+        return [child.collection('discoveries') async for child in children.list_documents()]
+
+    query = db.collection('discoveries').where('user_id', '==', user_id)
+    if child_id:
+        query = query.where('child_id', '==', child_id)
+    return [query]
+
+
+async def merge_streams(queries: List[Any], key: Callable, reverse: bool = False) -> AsyncIterator:
+    """
+    Stream documents from several queries, each already ordered by `key`,
+    as one ordered stream. Stops reading a query as soon as the caller stops,
+    so early exits (e.g. a streak walk) read only what they use.
+    """
+    streams = [query.stream().__aiter__() for query in queries]
+    firsts = await asyncio.gather(*(anext(stream, None) for stream in streams))
+    heads = {i: doc for i, doc in enumerate(firsts) if doc is not None}
+    pick = max if reverse else min
+
+    while heads:
+        i = pick(heads, key=lambda index: key(heads[index]))
+        yield heads[i]
+        following = await anext(streams[i], None)
+        if following is None:
+            del heads[i]
+        else:
+            heads[i] = following
@@ -1,23 +1,292 @@
 """
 Discovery Repository
 Data access layer for discovery records in Firestore.
+
+DiscoveryRepository uses the flat layout and NestedDiscoveryRepository the
+per-child one (see app/repositories/discovery_layout.py).
 """
 from app.config.firebase_config import FirebaseConfig
-from app.models.discovery_record import DiscoveryRecord
-from typing import List, Optional
+from app.config.settings import DISCOVERY_COUNTERS
+from app.models.discovery_record import DiscoveryRecord, DiscoverySummary, DiscoveryTombstone
+from app.repositories.discovery_layout import child_discoveries_ref, user_discovery_queries
+from google.cloud.firestore import Increment, async_transactional
+from google.cloud.firestore_v1.field_path import FieldPath
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from collections import defaultdict
 from datetime import datetime, timedelta
+import asyncio
+import base64
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Firestore caps a batched write (and a transaction) at 500 operations
+BATCH_WRITE_LIMIT = 500
+# Batched deletes kept in flight by delete_matching()
+DELETE_CONCURRENCY = 4
+
+
+def encode_cursor(discovery: Union[DiscoveryRecord, DiscoverySummary]) -> str:
+    """Opaque page cursor pointing just past the given discovery."""
+    payload = json.dumps({"t": discovery.timestamp.isoformat(), "id": discovery.discovery_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor produced by encode_cursor().
+    
+    Returns:
+        Tuple of (timestamp, discovery_id)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def _counter_increments(child_counts: Dict[Optional[str], int]) -> dict:
+    """Counter document update adding the given per-child discovery counts."""
+    children = {
+        child_id: Increment(count)
+        for child_id, count in child_counts.items()
+        if child_id
+    }
+    update = {"total": Increment(sum(child_counts.values()))}
+    if children:
+        update["children"] = children
+    return update
+
+
+def newest_first(discoveries: List[Union[DiscoveryRecord, DiscoverySummary]]) -> list:
+    """History order: newest timestamp first, document ID as the tie-breaker."""
+    return sorted(discoveries, key=lambda d: (d.timestamp, d.discovery_id), reverse=True)
+
+
+def merge_changes(
+    discoveries: List[DiscoveryRecord],
+    tombstones: List[DiscoveryTombstone],
+    limit: int
+) -> Tuple[List[DiscoveryRecord], List[DiscoveryTombstone], bool]:
+    """
+    Keep the `limit` lowest-versioned changes from two version-ordered lists.
+    Each list should hold up to limit + 1 entries so has_more is exact.
+
+    Returns:
+        Tuple of (discoveries, tombstones, has_more)
+    """
+    changes = sorted([*discoveries, *tombstones], key=lambda change: change.version)
+    kept = changes[:limit]
+    return (
+        [c for c in kept if isinstance(c, DiscoveryRecord)],
+        [c for c in kept if isinstance(c, DiscoveryTombstone)],
+        len(changes) > limit
+    )
+
+
+async def delete_matching(
+    db,
+    query,
+    fields: Optional[List[str]] = None,
+    on_page: Optional[Callable[[list], None]] = None,
+    concurrency: int = DELETE_CONCURRENCY
+) -> int:
+    """
+    Delete every document a query matches.
+    
+    References are streamed in pages of BATCH_WRITE_LIMIT, ordered by
+    document ID and projected to `fields` (or to none). Each page is deleted in
+    one batched write, with up to `concurrency` commits in flight while the
+    next page is read. Deleting is idempotent, so an interrupted run can
+    simply be repeated.
+    
+    Args:
+        db: Async Firestore client
+        query: Query or collection reference
+        fields: Fields on_page needs
+        on_page: Called with each page of snapshots before it is deleted
+        concurrency: Maximum batched writes in flight
+        
+    Returns:
+        Number of documents deleted
+    """
+    query = (query
+            .select(fields or [FieldPath.document_id()])
+            .order_by(FieldPath.document_id())
+            .limit(BATCH_WRITE_LIMIT))
+    slots = asyncio.Semaphore(concurrency)
+    commits: List[asyncio.Task] = []
+    
+    async def commit(batch) -> None:
+        try:
+            await batch.commit()
+        finally:
+            slots.release()
+    
+    deleted = 0
+    last = None
+    try:
+        while True:
+            page_query = query.start_after(last) if last is not None else query
+            page = [doc async for doc in page_query.stream()]
+            if not page:
+                break
+            if on_page is not None:
+                on_page(page)
+            
+            batch = db.batch()
+            for doc in page:
+                batch.delete(doc.reference)
+            await slots.acquire()
+            commits.append(asyncio.create_task(commit(batch)))
+            
+            deleted += len(page)
+            if len(page) < BATCH_WRITE_LIMIT:
+                break
+            last = page[-1]
+    finally:
+        await asyncio.gather(*commits)
+    return deleted
+
+
+async def _current_version(transaction, version_ref) -> int:
+    """Read a user's change version inside a transaction."""
+    snapshot = await version_ref.get(transaction=transaction)
+    return (snapshot.to_dict() or {}).get("version", 0) if snapshot.exists else 0
+
+
+@async_transactional
+async def _save_versioned(
+    transaction,
+    repo: "DiscoveryRepository",
+    user_id: str,
+    discoveries: List[DiscoveryRecord]
+) -> None:
+    """
+    Write one user's discoveries, stamping consecutive versions.
+    Counters only count documents that didn't exist, so retries stay idempotent.
+    """
+    refs = [repo._document_ref(d) for d in discoveries]
+    version_ref = repo.versions_ref.document(user_id)
+
+    version = await _current_version(transaction, version_ref)
+    existing = set()
+    if repo.use_counters:
+        existing = {snap.id async for snap in await transaction.get_all(refs) if snap.exists}
+
+    for ref, discovery in zip(refs, discoveries):
+        version += 1
+        transaction.set(ref, {**repo._document_data(discovery), "version": version})
+    transaction.set(version_ref, {"version": version, "updated_at": datetime.utcnow()})
+
+    if repo.use_counters:
+        counts: Dict[Optional[str], int] = defaultdict(int)
+        for discovery in discoveries:
+            if discovery.discovery_id not in existing:
+                counts[discovery.child_id] += 1
+        if counts:
+            transaction.set(repo.counters_ref.document(user_id), _counter_increments(counts), merge=True)
+
+
+@async_transactional
+async def _update_versioned(
+    transaction,
+    repo: "DiscoveryRepository",
+    doc_ref,
+    updates: dict,
+    owner_id: Optional[str] = None
+) -> None:
+    """Update fields of a discovery and stamp the owner's next version."""
+    snapshot = await doc_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        raise ValueError(f"Discovery {doc_ref.id} not found")
+
+    user_id = snapshot.get("user_id")
+    if owner_id is not None and user_id != owner_id:
+        raise ValueError(f"Discovery {doc_ref.id} not found")
+    version_ref = repo.versions_ref.document(user_id)
+    version = await _current_version(transaction, version_ref) + 1
+
+    transaction.update(doc_ref, {**updates, "version": version})
+    transaction.set(version_ref, {"version": version, "updated_at": datetime.utcnow()})
+
+
+@async_transactional
+async def _delete_versioned(
+    transaction,
+    repo: "DiscoveryRepository",
+    doc_ref,
+    user_id: Optional[str]
+) -> Optional[DiscoveryTombstone]:
+    """Replace a discovery with a tombstone at the owner's next version."""
+    snapshot = await doc_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        return None
+
+    data = snapshot.to_dict()
+    if user_id is not None and data.get("user_id") != user_id:
+        return None
+
+    version_ref = repo.versions_ref.document(data["user_id"])
+    version = await _current_version(transaction, version_ref) + 1
+
+    tombstone = DiscoveryTombstone(
+        discovery_id=doc_ref.id,
+        user_id=data["user_id"],
+        child_id=data.get("child_id"),
+        version=version
+    )
+    transaction.delete(doc_ref)
+    transaction.set(repo.tombstones_ref.document(doc_ref.id), tombstone.to_firestore())
+    transaction.set(version_ref, {"version": version, "updated_at": datetime.utcnow()})
+    if repo.use_counters:
+        transaction.set(
+            repo.counters_ref.document(data["user_id"]),
+            _counter_increments({data.get("child_id"): -1}),
+            merge=True
+        )
+    return tombstone
+
 
 class DiscoveryRepository:
-    """Repository for discovery record operations."""
+    """Repository for discovery record operations (flat layout)."""
+    
+    layout = "flat"
     
     def __init__(self):
-        """Initialize repository with Firestore client."""
-        self.db = FirebaseConfig.get_firestore()
+        """Initialize repository with async Firestore client."""
+        self.db = FirebaseConfig.get_async_firestore()
         self.discoveries_ref = self.db.collection('discoveries')
+        # Per-user {total, children: {child_id: n}} maintained on save (optional)
+        self.counters_ref = self.db.collection('discovery_counters')
+        self.use_counters = DISCOVERY_COUNTERS
+        # Per-user {version} bumped by every write, and deleted-discovery records (change feed)
+        self.versions_ref = self.db.collection('sync_versions')
+        self.tombstones_ref = self.db.collection('discovery_tombstones')
+    
+    # Layout hooks, overridden by NestedDiscoveryRepository
+    
+    def _document_ref(self, discovery: DiscoveryRecord):
+        """Where a discovery document is written."""
+        return self.discoveries_ref.document(discovery.discovery_id)
+    
+    def _document_data(self, discovery: DiscoveryRecord) -> dict:
+        """Document contents for a discovery (without its version)."""
+        return discovery.to_firestore()
+    
+    async def _locate(self, discovery_id: str):
+        """Reference to the document of a discovery known only by ID, or None."""
+        return self.discoveries_ref.document(discovery_id)
+    
+    async def _user_queries(self, user_id: str, child_id: Optional[str] = None) -> list:
+        """Base queries that together cover a user's discoveries."""
+        return await user_discovery_queries(self.db, self.layout, user_id, child_id)
     
     async def save_discovery(self, discovery: DiscoveryRecord) -> str:
         """
@@ -33,9 +302,8 @@ class DiscoveryRepository:
             Exception: If save fails
         """
         try:
-            # Use discovery_id as document ID
-            doc_ref = self.discoveries_ref.document(discovery.discovery_id)
-            doc_ref.set(discovery.to_firestore())
+            # Use discovery_id as document ID; transactional to stamp the next version
+            await _save_versioned(self.db.transaction(), self, discovery.user_id, [discovery])
             
             logger.info(f"Saved discovery {discovery.discovery_id} for user {discovery.user_id}")
             return discovery.discovery_id
@@ -44,6 +312,39 @@ class DiscoveryRepository:
             logger.error(f"Failed to save discovery: {str(e)}")
             raise
     
+    async def save_discoveries(self, discoveries: List[DiscoveryRecord]) -> List[str]:
+        """
+        Save several discoveries, one transaction per user and chunk.
+        
+        Args:
+            discoveries: DiscoveryRecord instances
+            
+        Returns:
+            Discovery IDs in input order
+            
+        Raises:
+            Exception: If a commit fails (earlier chunks stay committed)
+        """
+        try:
+            # Leave room for the version and counter documents in each transaction
+            chunk_size = BATCH_WRITE_LIMIT - 2
+            
+            by_user: Dict[str, List[DiscoveryRecord]] = defaultdict(list)
+            for discovery in discoveries:
+                by_user[discovery.user_id].append(discovery)
+            
+            for user_id, user_discoveries in by_user.items():
+                for start in range(0, len(user_discoveries), chunk_size):
+                    chunk = user_discoveries[start:start + chunk_size]
+                    await _save_versioned(self.db.transaction(), self, user_id, chunk)
+            
+            logger.info(f"Saved {len(discoveries)} discoveries in batched writes")
+            return [d.discovery_id for d in discoveries]
+            
+        except Exception as e:
+            logger.error(f"Failed to save discovery batch: {str(e)}")
+            raise
+    
     async def get_discovery(self, discovery_id: str) -> Optional[DiscoveryRecord]:
         """
         Retrieve single discovery by ID.
@@ -55,14 +356,15 @@ class DiscoveryRepository:
             DiscoveryRecord if found, None otherwise
         """
         try:
-            doc = self.discoveries_ref.document(discovery_id).get()
+            doc_ref = await self._locate(discovery_id)
+            doc = await doc_ref.get() if doc_ref is not None else None
             
-            if not doc.exists:
+            if doc is None or not doc.exists:
                 logger.debug(f"Discovery {discovery_id} not found")
                 return None
             
             data = doc.to_dict()
-            discovery = DiscoveryRecord.from_firestore(discovery_id, data)
+            discovery = DiscoveryRecord.from_firestore(discovery_id, data, trusted=True)
             
             return discovery
             
@@ -75,79 +377,161 @@ class DiscoveryRepository:
         user_id: str, 
         limit: int = 50,
         child_id: Optional[str] = None,
-        page: int = 1
-    ) -> List[DiscoveryRecord]:
+        page: int = 1,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
         """
         Retrieve user's discoveries with optional filtering.
         
+        Page-number compatibility shim over get_user_discoveries_page().
+        Page 1 is a keyset query; later pages fall back to offset pagination,
+        which Firestore bills for every skipped document — prefer cursors.
+        
         Args:
             user_id: Firebase UID
             limit: Maximum number of discoveries to return
             child_id: Optional filter by specific child
             page: Page number for pagination (1-indexed)
+            summary: Fetch only the fields of DiscoverySummary
             
         Returns:
-            List of DiscoveryRecord instances
+            List of DiscoveryRecord (or DiscoverySummary) instances
         """
+        if page <= 1:
+            discoveries, _ = await self.get_user_discoveries_page(
+                user_id, limit=limit, child_id=child_id, summary=summary
+            )
+            return discoveries
+        
         try:
-            query = self.discoveries_ref.where('user_id', '==', user_id)
-            
-            # Filter by child if specified
-            if child_id:
-                query = query.where('child_id', '==', child_id)
-            
-            # Order by timestamp (newest first)
-            query = query.order_by('timestamp', direction='DESCENDING')
-            
             # Apply pagination
             offset = (page - 1) * limit
-            query = query.limit(limit).offset(offset)
+            queries = [self._history_order(query) for query in await self._user_queries(user_id, child_id)]
             
             # Execute query
-            docs = query.stream()
+            if len(queries) == 1:
+                discoveries = await self._fetch(queries[0].limit(limit).offset(offset), summary)
+            else:
+                # An offset can't be split across collections; read each one up to the page end
+                discoveries = await self._fetch_all([query.limit(offset + limit) for query in queries], summary)
+                discoveries = newest_first(discoveries)[offset:offset + limit]
+            
+            logger.info(f"Retrieved {len(discoveries)} discoveries for user {user_id} (offset {offset})")
+            return discoveries
             
-            discoveries = [
-                DiscoveryRecord.from_firestore(doc.id, doc.to_dict())
-                for doc in docs
-            ]
+        except Exception as e:
+            logger.error(f"Failed to get discoveries for user {user_id}: {str(e)}")
+            raise
+    
+    async def get_user_discoveries_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        child_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        summary: bool = False
+    ) -> Tuple[List[Union[DiscoveryRecord, DiscoverySummary]], Optional[str]]:
+        """
+        Retrieve one page of a user's discoveries using keyset pagination.
+        
+        Each page costs exactly `limit` document reads, however deep it is.
+        
+        Args:
+            user_id: Firebase UID
+            limit: Maximum number of discoveries to return
+            child_id: Optional filter by specific child
+            cursor: Opaque token from a previous page (None for the first page)
+            summary: Fetch only the fields of DiscoverySummary
+            
+        Returns:
+            Tuple of (discoveries, next_cursor); next_cursor is None on the last page
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        start_after = None
+        if cursor:
+            timestamp, discovery_id = decode_cursor(cursor)
+            start_after = {"timestamp": timestamp, "__name__": discovery_id}
+        
+        try:
+            queries = []
+            for query in await self._user_queries(user_id, child_id):
+                query = self._history_order(query)
+                if start_after:
+                    query = query.start_after(start_after)
+                queries.append(query.limit(limit))
+            
+            discoveries = await self._fetch_all(queries, summary)
+            if len(queries) > 1:
+                discoveries = newest_first(discoveries)[:limit]
+            
+            next_cursor = encode_cursor(discoveries[-1]) if len(discoveries) == limit else None
             
             logger.info(f"Retrieved {len(discoveries)} discoveries for user {user_id}")
-            return discoveries
+            return discoveries, next_cursor
             
         except Exception as e:
             logger.error(f"Failed to get discoveries for user {user_id}: {str(e)}")
             raise
     
+    async def _fetch(self, query, summary: bool = False) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        """Run a discovery query, projecting to summary fields if requested."""
+        if summary:
+            return [
+                DiscoverySummary.from_firestore(doc.id, doc.to_dict(), trusted=True)
+                async for doc in query.select(DiscoverySummary.FIRESTORE_FIELDS).stream()
+            ]
+        
+        return [
+            DiscoveryRecord.from_firestore(doc.id, doc.to_dict(), trusted=True)
+            async for doc in query.stream()
+        ]
+    
+    async def _fetch_all(self, queries: list, summary: bool = False) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        """Run several discovery queries concurrently and concatenate the results."""
+        if len(queries) == 1:
+            return await self._fetch(queries[0], summary)
+        results = await asyncio.gather(*(self._fetch(query, summary) for query in queries))
+        return [discovery for result in results for discovery in result]
+    
+    @staticmethod
+    def _history_order(query):
+        """Order a discovery query newest first, with a document-ID tie-breaker."""
+        # The ID makes the order total for cursors
+        return (query
+                .order_by('timestamp', direction='DESCENDING')
+                .order_by(FieldPath.document_id(), direction='DESCENDING'))
+    
     async def get_recent_discoveries(
         self, 
         user_id: str, 
-        days: int = 7
-    ) -> List[DiscoveryRecord]:
+        days: int = 7,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
         """
         Get discoveries from the last N days.
         
         Args:
             user_id: Firebase UID
             days: Number of days to look back
+            summary: Fetch only the fields of DiscoverySummary
             
         Returns:
-            List of DiscoveryRecord instances
+            List of DiscoveryRecord (or DiscoverySummary) instances
         """
         try:
             since = datetime.utcnow() - timedelta(days=days)
             
-            query = (self.discoveries_ref
-                    .where('user_id', '==', user_id)
-                    .where('timestamp', '>=', since)
-                    .order_by('timestamp', direction='DESCENDING'))
-            
-            docs = query.stream()
-            
-            discoveries = [
-                DiscoveryRecord.from_firestore(doc.id, doc.to_dict())
-                for doc in docs
+            queries = [
+                query.where('timestamp', '>=', since).order_by('timestamp', direction='DESCENDING')
+                for query in await self._user_queries(user_id)
             ]
             
+            discoveries = await self._fetch_all(queries, summary)
+            if len(queries) > 1:
+                discoveries = newest_first(discoveries)
+            
             logger.info(f"Retrieved {len(discoveries)} recent discoveries for user {user_id}")
             return discoveries
             
@@ -155,29 +539,30 @@ class DiscoveryRepository:
             logger.error(f"Failed to get recent discoveries for {user_id}: {str(e)}")
             raise
     
-    async def get_favorites(self, user_id: str) -> List[DiscoveryRecord]:
+    async def get_favorites(
+        self,
+        user_id: str,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
         """
         Get user's favorite discoveries.
         
         Args:
             user_id: Firebase UID
+            summary: Fetch only the fields of DiscoverySummary
             
         Returns:
-            List of favorite DiscoveryRecord instances
+            List of favorite DiscoveryRecord (or DiscoverySummary) instances
         """
         try:
-            query = (self.discoveries_ref
-                    .where('user_id', '==', user_id)
-                    .where('favorite', '==', True)
-                    .order_by('timestamp', direction='DESCENDING'))
-            
-            docs = query.stream()
-            
-            discoveries = [
-                DiscoveryRecord.from_firestore(doc.id, doc.to_dict())
-                for doc in docs
+            # Equality filters only (no composite index); favorites are few, so sort here
+            queries = [
+                query.where('favorite', '==', True)
+                for query in await self._user_queries(user_id)
             ]
             
+            discoveries = newest_first(await self._fetch_all(queries, summary))
+            
             logger.info(f"Retrieved {len(discoveries)} favorite discoveries for user {user_id}")
             return discoveries
             
@@ -188,50 +573,206 @@ class DiscoveryRepository:
     async def update_discovery(
         self, 
         discovery_id: str, 
-        updates: dict
+        updates: dict,
+        user_id: Optional[str] = None
     ) -> None:
         """
-        Update specific fields of a discovery.
+        Update specific fields of a discovery (stamps the owner's next version).
         
         Args:
             discovery_id: Discovery document ID
             updates: Dict of fields to update
+            user_id: Only update it if it belongs to this user
             
         Raises:
+            ValueError: If the discovery doesn't exist (for user_id)
             Exception: If update fails
         """
         try:
-            self.discoveries_ref.document(discovery_id).update(updates)
+            doc_ref = await self._locate(discovery_id)
+            if doc_ref is None:
+                raise ValueError(f"Discovery {discovery_id} not found")
+            await _update_versioned(self.db.transaction(), self, doc_ref, updates, user_id)
             logger.info(f"Updated discovery {discovery_id}")
             
         except Exception as e:
             logger.error(f"Failed to update discovery {discovery_id}: {str(e)}")
             raise
     
-    async def mark_favorite(self, discovery_id: str, favorite: bool = True) -> None:
+    async def mark_favorite(self, discovery_id: str, favorite: bool = True, user_id: Optional[str] = None) -> None:
         """
         Mark/unmark discovery as favorite.
         
         Args:
             discovery_id: Discovery document ID
             favorite: True to mark as favorite, False to unmark
+            user_id: Only change it if it belongs to this user
+        """
+        await self.update_discovery(discovery_id, {'favorite': favorite}, user_id)
+    
+    async def delete_discovery(
+        self,
+        discovery_id: str,
+        user_id: Optional[str] = None
+    ) -> Optional[DiscoveryTombstone]:
+        """
+        Delete a discovery, leaving a tombstone for the change feed.
+        
+        Args:
+            discovery_id: Discovery document ID
+            user_id: Only delete it if it belongs to this user
+            
+        Returns:
+            The tombstone, or None if there was no such discovery (for user_id)
+        """
+        try:
+            doc_ref = await self._locate(discovery_id)
+            if doc_ref is None:
+                return None
+            tombstone = await _delete_versioned(self.db.transaction(), self, doc_ref, user_id)
+            if tombstone is not None:
+                logger.info(f"Deleted discovery {discovery_id} (version {tombstone.version})")
+            return tombstone
+            
+        except Exception as e:
+            logger.error(f"Failed to delete discovery {discovery_id}: {str(e)}")
+            raise
+    
+    async def delete_user_discoveries(
+        self,
+        user_id: str,
+        on_page: Optional[Callable[[List[str]], None]] = None
+    ) -> int:
         """
-        await self.update_discovery(discovery_id, {'favorite': favorite})
+        Delete all of a user's discoveries, tombstones, change version and
+        counter (account deletion), in batched writes. No tombstones are left.
+        
+        Args:
+            user_id: Firebase UID
+            on_page: Called with the image URLs of each page before it is deleted
+            
+        Returns:
+            Number of discoveries deleted
+        """
+        def collect_images(page: list) -> None:
+            if on_page is not None:
+                on_page([url for url in ((doc.to_dict() or {}).get('image_url') for doc in page) if url])
+        
+        try:
+            deleted = 0
+            for query in await self._user_queries(user_id):
+                deleted += await delete_matching(self.db, query, fields=['image_url'], on_page=collect_images)
+            
+            await delete_matching(self.db, self.tombstones_ref.where('user_id', '==', user_id))
+            batch = self.db.batch()
+            batch.delete(self.versions_ref.document(user_id))
+            batch.delete(self.counters_ref.document(user_id))
+            await batch.commit()
+            
+            logger.info(f"Deleted {deleted} discoveries of user {user_id}")
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"Failed to delete discoveries of {user_id}: {str(e)}")
+            raise
+    
+    async def image_in_use(self, image_url: str) -> bool:
+        """
+        Whether any discovery (of any user, in either layout) references an image.
+        
+        Args:
+            image_url: Stored image URL
+        """
+        query = self.db.collection_group('discoveries').where('image_url', '==', image_url).limit(1)
+        async for _ in query.select([FieldPath.document_id()]).stream():
+            return True
+        return False
     
-    async def count_user_discoveries(self, user_id: str) -> int:
+    async def get_version(self, user_id: str) -> int:
         """
-        Count total discoveries for a user.
+        Current change version for a user's discoveries (one point read).
+        Every save, update and delete increases it.
         
         Args:
             user_id: Firebase UID
             
+        Returns:
+            The version, 0 if the user has never written anything
+        """
+        doc = await self.versions_ref.document(user_id).get()
+        return (doc.to_dict() or {}).get("version", 0) if doc.exists else 0
+    
+    async def get_changes(
+        self,
+        user_id: str,
+        since: int,
+        limit: int = 500
+    ) -> Tuple[List[DiscoveryRecord], List[DiscoveryTombstone], bool]:
+        """
+        Discoveries written and deleted after version `since`, oldest change first.
+        
+        Args:
+            user_id: Firebase UID
+            since: Last version the client has applied
+            limit: Maximum number of changes to return
+            
+        Returns:
+            Tuple of (discoveries, tombstones, has_more)
+        """
+        try:
+            discovery_queries = [
+                query.where('version', '>', since).order_by('version').limit(limit + 1)
+                for query in await self._user_queries(user_id)
+            ]
+            tombstone_query = (self.tombstones_ref
+                    .where('user_id', '==', user_id)
+                    .where('version', '>', since)
+                    .order_by('version')
+                    .limit(limit + 1))
+            
+            discoveries, tombstones = await asyncio.gather(
+                self._fetch_all(discovery_queries),
+                self._stream_tombstones(tombstone_query)
+            )
+            
+            changes = merge_changes(discoveries, tombstones, limit)
+            logger.info(f"Retrieved {len(changes[0]) + len(changes[1])} changes for user {user_id} since {since}")
+            return changes
+            
+        except Exception as e:
+            logger.error(f"Failed to get changes for {user_id}: {str(e)}")
+            raise
+    
+    @staticmethod
+    async def _stream_tombstones(query) -> List[DiscoveryTombstone]:
+        return [DiscoveryTombstone.from_firestore(doc.id, doc.to_dict()) async for doc in query.stream()]
+    
+    async def count_user_discoveries(self, user_id: str, child_id: Optional[str] = None) -> int:
+        """
+        Count total discoveries for a user (optionally for one child).
+        
+        Reads the maintained counter document when counters are enabled,
+        otherwise runs a server-side aggregation query. Neither downloads
+        the discovery documents themselves.
+        
+        Args:
+            user_id: Firebase UID
+            child_id: Optional filter by specific child
+            
         Returns:
             Total count of discoveries
         """
         try:
-            query = self.discoveries_ref.where('user_id', '==', user_id)
-            docs = list(query.stream())
-            count = len(docs)
+            if self.use_counters:
+                counter = await self._get_counter(user_id)
+                if child_id:
+                    count = counter.get("children", {}).get(child_id, 0)
+                else:
+                    count = counter.get("total", 0)
+            else:
+                queries = await self._user_queries(user_id, child_id)
+                results = await asyncio.gather(*(query.count(alias="total").get() for query in queries))
+                count = sum(int(result[0][0].value) for result in results if result)
             
             logger.debug(f"User {user_id} has {count} total discoveries")
             return count
@@ -239,3 +780,88 @@ class DiscoveryRepository:
         except Exception as e:
             logger.error(f"Failed to count discoveries for {user_id}: {str(e)}")
             raise
+    
+    async def _get_counter(self, user_id: str) -> dict:
+        """Read the user's counter document, rebuilding it if it was never seeded."""
+        doc = await self.counters_ref.document(user_id).get()
+        if doc.exists:
+            data = doc.to_dict()
+            if data.get("seeded"):
+                return data
+        
+        return await self.rebuild_counter(user_id)
+    
+    async def rebuild_counter(self, user_id: str) -> dict:
+        """
+        Recompute a user's counter document from their discoveries.
+        
+        Streams only the child_id field of each discovery. Saves that land
+        while this runs may be missed, so run it when the user is idle
+        (it is also run automatically the first time an unseeded counter is read).
+        
+        Args:
+            user_id: Firebase UID
+            
+        Returns:
+            The rebuilt counter data
+        """
+        try:
+            total = 0
+            children: Dict[str, int] = defaultdict(int)
+            for query in await self._user_queries(user_id):
+                async for doc in query.select(['child_id']).stream():
+                    total += 1
+                    child_id = (doc.to_dict() or {}).get('child_id')
+                    if child_id:
+                        children[child_id] += 1
+            
+            counter = {
+                "total": total,
+                "children": dict(children),
+                "seeded": True,
+                "rebuilt_at": datetime.utcnow()
+            }
+            await self.counters_ref.document(user_id).set(counter)
+            
+            logger.info(f"Rebuilt discovery counter for user {user_id}: {total}")
+            return counter
+            
+        except Exception as e:
+            logger.error(f"Failed to rebuild counter for {user_id}: {str(e)}")
+            raise
+
+
+class NestedDiscoveryRepository(DiscoveryRepository):
+    """
+    Repository for discovery records in the nested layout
+    (users/{uid}/children/{child_id}/discoveries/{discovery_id}).
+    
+    Reads run per child collection and are merged here. Discoveries are
+    found by ID through a collection group lookup on their discovery_id
+    field. A discovery can't move between children with update_discovery.
+    """
+    
+    layout = "nested"
+    
+    def __init__(self):
+        """Initialize repository with async Firestore client."""
+        super().__init__()
+        self.discoveries_group = self.db.collection_group('discoveries')
+    
+    def _document_ref(self, discovery: DiscoveryRecord):
+        return child_discoveries_ref(self.db, discovery.user_id, discovery.child_id).document(discovery.discovery_id)
+    
+    def _document_data(self, discovery: DiscoveryRecord) -> dict:
+        # The ID is stored too, so a discovery can be located without its path
+        return {**discovery.to_firestore(), "discovery_id": discovery.discovery_id}
+    
+    async def _locate(self, discovery_id: str):
+        query = self.discoveries_group.where('discovery_id', '==', discovery_id).limit(1)
+        async for doc in query.stream():
+            return doc.reference
+        return None
+    
+    async def update_discovery(self, discovery_id: str, updates: dict, user_id: Optional[str] = None) -> None:
+        if 'child_id' in updates:
+            raise ValueError("child_id is part of the document path in the nested layout")
+        await super().update_discovery(discovery_id, updates, user_id)
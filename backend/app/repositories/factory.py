@@ -0,0 +1,119 @@
+"""
+Repository Factory
+Shared repository instances for the backend selected by REPOSITORY_BACKEND.
+
+Every caller gets the same instances, which the in-memory backend relies on
+(its state lives in the objects) and which saves re-opening Firestore clients
+or SQLite files elsewhere.
+"""
+from app.repositories.base import (
+    UserRepositoryProtocol,
+    DiscoveryRepositoryProtocol,
+    StatsRepositoryProtocol,
+    ChildContextRepositoryProtocol
+)
+from typing import Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("firestore", "sqlite", "memory")
+
+_repositories: Dict[str, object] = {}
+_sqlite_db = None
+
+
+def _backend() -> str:
+    from app.config.settings import REPOSITORY_BACKEND
+    if REPOSITORY_BACKEND not in BACKENDS:
+        raise ValueError(f"Unknown REPOSITORY_BACKEND '{REPOSITORY_BACKEND}' (expected one of {BACKENDS})")
+    return REPOSITORY_BACKEND
+
+
+def _firestore_layout() -> str:
+    from app.config.settings import FIRESTORE_LAYOUT
+    from app.repositories.discovery_layout import LAYOUTS
+    if FIRESTORE_LAYOUT not in LAYOUTS:
+        raise ValueError(f"Unknown FIRESTORE_LAYOUT '{FIRESTORE_LAYOUT}' (expected one of {LAYOUTS})")
+    return FIRESTORE_LAYOUT
+
+
+def _get_sqlite_db():
+    global _sqlite_db
+    if _sqlite_db is None:
+        from app.config.settings import SQLITE_PATH
+        from app.repositories.sqlite_backend import SQLiteDatabase
+        _sqlite_db = SQLiteDatabase(SQLITE_PATH)
+    return _sqlite_db
+
+
+def get_user_repository() -> UserRepositoryProtocol:
+    """Get or create the shared user repository."""
+    if "user" not in _repositories:
+        backend = _backend()
+        if backend == "sqlite":
+            from app.repositories.sqlite_backend import SQLiteUserRepository
+            _repositories["user"] = SQLiteUserRepository(_get_sqlite_db())
+        elif backend == "memory":
+            from app.repositories.memory_backend import InMemoryUserRepository
+            _repositories["user"] = InMemoryUserRepository()
+        else:
+            from app.repositories.user_repository import UserRepository
+            _repositories["user"] = UserRepository()
+    return _repositories["user"]
+
+
+def get_discovery_repository() -> DiscoveryRepositoryProtocol:
+    """Get or create the shared discovery repository."""
+    if "discovery" not in _repositories:
+        backend = _backend()
+        if backend == "sqlite":
+            from app.repositories.sqlite_backend import SQLiteDiscoveryRepository
+            _repositories["discovery"] = SQLiteDiscoveryRepository(_get_sqlite_db())
+        elif backend == "memory":
+            from app.repositories.memory_backend import InMemoryDiscoveryRepository
+            _repositories["discovery"] = InMemoryDiscoveryRepository()
+        elif _firestore_layout() == "nested":
+            from app.repositories.discovery_repository import NestedDiscoveryRepository
+            _repositories["discovery"] = NestedDiscoveryRepository()
+        else:
+            from app.repositories.discovery_repository import DiscoveryRepository
+            _repositories["discovery"] = DiscoveryRepository()
+        logger.info(f"Using {backend} repository backend")
+    return _repositories["discovery"]
+
+
+def get_stats_repository() -> StatsRepositoryProtocol:
+    """Get or create the shared stats repository."""
+    if "stats" not in _repositories:
+        backend = _backend()
+        if backend == "sqlite":
+            from app.repositories.sqlite_backend import SQLiteStatsRepository
+            _repositories["stats"] = SQLiteStatsRepository(_get_sqlite_db(), get_discovery_repository())
+        elif backend == "memory":
+            from app.repositories.memory_backend import InMemoryStatsRepository
+            _repositories["stats"] = InMemoryStatsRepository(get_discovery_repository())
+        else:
+            from app.repositories.stats_repository import StatsRepository
+            _repositories["stats"] = StatsRepository()
+    return _repositories["stats"]
+
+
+def get_child_context_repository() -> ChildContextRepositoryProtocol:
+    """Get or create the shared child context repository."""
+    if "child_context" not in _repositories:
+        backend = _backend()
+        if backend == "sqlite":
+            from app.repositories.sqlite_backend import SQLiteChildContextRepository
+            _repositories["child_context"] = SQLiteChildContextRepository(
+                _get_sqlite_db(), get_user_repository(), get_discovery_repository()
+            )
+        elif backend == "memory":
+            from app.repositories.memory_backend import InMemoryChildContextRepository
+            _repositories["child_context"] = InMemoryChildContextRepository(
+                get_user_repository(), get_discovery_repository()
+            )
+        else:
+            from app.repositories.child_context_repository import ChildContextRepository
+            _repositories["child_context"] = ChildContextRepository()
+    return _repositories["child_context"]
@@ -0,0 +1,346 @@
+"""
+In-Memory Repository Backend
+Process-local implementations of the repository protocols.
+
+Nothing is persisted. Use it for local development, profiling the request
+path and load tests without Firebase credentials (REPOSITORY_BACKEND=memory).
+"""
+from app.models.discovery_record import DiscoveryRecord, DiscoverySummary, DiscoveryTombstone
+from app.models.user_profile import UserProfile, ChildProfile, UserRole
+from app.repositories.base import utc_naive
+from app.repositories.discovery_repository import encode_cursor, decode_cursor, merge_changes
+from app.repositories.stats_repository import ROLLUP_DAYS, apply_discovery, build_rollup, summarize
+from app.repositories import child_context_repository as child_context
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+from collections import defaultdict
+from datetime import datetime, timedelta
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _history_key(discovery: DiscoveryRecord) -> Tuple[datetime, str]:
+    """Sort key matching the Firestore history order (timestamp, then document ID)."""
+    return utc_naive(discovery.timestamp), discovery.discovery_id
+
+
+class InMemoryUserRepository:
+    """User profiles held in a dict."""
+
+    def __init__(self):
+        self._users: Dict[str, UserProfile] = {}
+
+    async def create_user(self, user_profile: UserProfile) -> UserProfile:
+        if user_profile.user_id in self._users:
+            logger.warning(f"User {user_profile.user_id} already exists")
+            raise ValueError(f"User with ID {user_profile.user_id} already exists")
+
+        self._users[user_profile.user_id] = user_profile.model_copy(deep=True)
+        logger.info(f"Created user profile for {user_profile.user_id}")
+        return user_profile
+
+    async def get_user(self, user_id: str) -> Optional[UserProfile]:
+        user = self._users.get(user_id)
+        return user.model_copy(deep=True) if user else None
+
+    async def update_last_active(self, user_id: str) -> None:
+        user = self._users.get(user_id)
+        if user is None:
+            logger.error(f"Failed to update last_active for {user_id}: user not found")
+            return
+        user.last_active = datetime.utcnow()
+
+    async def add_child(self, user_id: str, child_profile: ChildProfile) -> None:
+        user = self._require(user_id)
+        if child_profile not in user.children:
+            user.children.append(child_profile.model_copy(deep=True))
+        logger.info(f"Added child {child_profile.name} to user {user_id}")
+
+    async def get_or_create_user(
+        self,
+        user_id: str,
+        email: str,
+        display_name: Optional[str] = None
+    ) -> UserProfile:
+        user = await self.get_user(user_id)
+        if user is not None:
+            await self.update_last_active(user_id)
+            return user
+
+        return await self.create_user(UserProfile(
+            user_id=user_id,
+            email=email,
+            display_name=display_name,
+            role=UserRole.PARENT,
+            children=[],
+            created_at=datetime.utcnow(),
+            last_active=datetime.utcnow(),
+            preferences={}
+        ))
+
+    async def update_preferences(self, user_id: str, preferences: dict) -> None:
+        self._require(user_id).preferences = copy.deepcopy(preferences)
+        logger.info(f"Updated preferences for user {user_id}")
+
+    async def delete_user(self, user_id: str) -> bool:
+        deleted = self._users.pop(user_id, None) is not None
+        if deleted:
+            logger.info(f"Deleted user profile {user_id}")
+        return deleted
+
+    def _require(self, user_id: str) -> UserProfile:
+        user = self._users.get(user_id)
+        if user is None:
+            raise ValueError(f"User {user_id} not found")
+        return user
+
+
+class InMemoryDiscoveryRepository:
+    """Discovery records held in a dict, indexed by user."""
+
+    def __init__(self):
+        self._discoveries: Dict[str, DiscoveryRecord] = {}
+        self._by_user: Dict[str, Set[str]] = defaultdict(set)
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._tombstones: Dict[str, DiscoveryTombstone] = {}
+
+    async def save_discovery(self, discovery: DiscoveryRecord) -> str:
+        previous = self._discoveries.get(discovery.discovery_id)
+        if previous is not None:
+            self._by_user[previous.user_id].discard(previous.discovery_id)
+
+        self._discoveries[discovery.discovery_id] = discovery.model_copy(
+            update={"version": self._next_version(discovery.user_id)},
+            deep=True
+        )
+        self._by_user[discovery.user_id].add(discovery.discovery_id)
+
+        logger.info(f"Saved discovery {discovery.discovery_id} for user {discovery.user_id}")
+        return discovery.discovery_id
+
+    async def save_discoveries(self, discoveries: List[DiscoveryRecord]) -> List[str]:
+        return [await self.save_discovery(discovery) for discovery in discoveries]
+
+    async def get_discovery(self, discovery_id: str) -> Optional[DiscoveryRecord]:
+        discovery = self._discoveries.get(discovery_id)
+        return discovery.model_copy(deep=True) if discovery else None
+
+    async def get_user_discoveries(
+        self,
+        user_id: str,
+        limit: int = 50,
+        child_id: Optional[str] = None,
+        page: int = 1,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        offset = (max(page, 1) - 1) * limit
+        history = self._history(user_id, child_id)
+        return self._project(history[offset:offset + limit], summary=summary)
+
+    async def get_user_discoveries_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        child_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        summary: bool = False
+    ) -> Tuple[List[Union[DiscoveryRecord, DiscoverySummary]], Optional[str]]:
+        history = self._history(user_id, child_id)
+
+        if cursor:
+            timestamp, discovery_id = decode_cursor(cursor)
+            after = (utc_naive(timestamp), discovery_id)
+            history = [d for d in history if _history_key(d) < after]
+
+        discoveries = self._project(history[:limit], summary)
+        next_cursor = encode_cursor(discoveries[-1]) if len(discoveries) == limit else None
+        return discoveries, next_cursor
+
+    async def get_recent_discoveries(
+        self,
+        user_id: str,
+        days: int = 7,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        since = datetime.utcnow() - timedelta(days=days)
+        recent = [d for d in self._history(user_id) if utc_naive(d.timestamp) >= since]
+        return self._project(recent, summary)
+
+    async def get_favorites(
+        self,
+        user_id: str,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        favorites = [d for d in self._history(user_id) if d.favorite]
+        return self._project(favorites, summary)
+
+    async def update_discovery(self, discovery_id: str, updates: dict, user_id: Optional[str] = None) -> None:
+        discovery = self._discoveries.get(discovery_id)
+        if discovery is None or (user_id is not None and discovery.user_id != user_id):
+            raise ValueError(f"Discovery {discovery_id} not found")
+
+        updates = {**copy.deepcopy(updates), "version": self._next_version(discovery.user_id)}
+        self._discoveries[discovery_id] = discovery.model_copy(update=updates)
+        logger.info(f"Updated discovery {discovery_id}")
+
+    async def mark_favorite(self, discovery_id: str, favorite: bool = True, user_id: Optional[str] = None) -> None:
+        await self.update_discovery(discovery_id, {'favorite': favorite}, user_id)
+
+    async def count_user_discoveries(self, user_id: str, child_id: Optional[str] = None) -> int:
+        if child_id is None:
+            return len(self._by_user.get(user_id, ()))
+        return len(self._history(user_id, child_id))
+
+    async def delete_discovery(
+        self,
+        discovery_id: str,
+        user_id: Optional[str] = None
+    ) -> Optional[DiscoveryTombstone]:
+        discovery = self._discoveries.get(discovery_id)
+        if discovery is None or (user_id is not None and discovery.user_id != user_id):
+            return None
+
+        del self._discoveries[discovery_id]
+        self._by_user[discovery.user_id].discard(discovery_id)
+        tombstone = DiscoveryTombstone(
+            discovery_id=discovery_id,
+            user_id=discovery.user_id,
+            child_id=discovery.child_id,
+            version=self._next_version(discovery.user_id)
+        )
+        self._tombstones[discovery_id] = tombstone
+        logger.info(f"Deleted discovery {discovery_id} (version {tombstone.version})")
+        return tombstone.model_copy()
+
+    async def delete_user_discoveries(
+        self,
+        user_id: str,
+        on_page: Optional[Callable[[List[str]], None]] = None
+    ) -> int:
+        discovery_ids = list(self._by_user.pop(user_id, ()))
+        if on_page is not None:
+            on_page([self._discoveries[i].image_url for i in discovery_ids if self._discoveries[i].image_url])
+        for discovery_id in discovery_ids:
+            del self._discoveries[discovery_id]
+
+        self._tombstones = {i: t for i, t in self._tombstones.items() if t.user_id != user_id}
+        self._versions.pop(user_id, None)
+        logger.info(f"Deleted {len(discovery_ids)} discoveries of user {user_id}")
+        return len(discovery_ids)
+
+    async def image_in_use(self, image_url: str) -> bool:
+        return any(d.image_url == image_url for d in self._discoveries.values())
+
+    async def get_version(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    async def get_changes(
+        self,
+        user_id: str,
+        since: int,
+        limit: int = 500
+    ) -> Tuple[List[DiscoveryRecord], List[DiscoveryTombstone], bool]:
+        discoveries = sorted(
+            (d for d in self._history(user_id) if d.version > since),
+            key=lambda d: d.version
+        )
+        tombstones = sorted(
+            (t for t in self._tombstones.values() if t.user_id == user_id and t.version > since),
+            key=lambda t: t.version
+        )
+        return merge_changes(
+            self._project(discoveries[:limit + 1], summary=False),
+            [t.model_copy() for t in tombstones[:limit + 1]],
+            limit
+        )
+
+    def _next_version(self, user_id: str) -> int:
+        self._versions[user_id] += 1
+        return self._versions[user_id]
+
+    def _history(self, user_id: str, child_id: Optional[str] = None) -> List[DiscoveryRecord]:
+        """A user's discoveries, newest first."""
+        discoveries = [self._discoveries[i] for i in self._by_user.get(user_id, ())]
+        if child_id:
+            discoveries = [d for d in discoveries if d.child_id == child_id]
+        return sorted(discoveries, key=_history_key, reverse=True)
+
+    @staticmethod
+    def _project(
+        discoveries: List[DiscoveryRecord],
+        summary: bool
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        if summary:
+            return [DiscoverySummary.from_firestore(d.discovery_id, d.to_firestore(), trusted=True) for d in discoveries]
+        return [d.model_copy(deep=True) for d in discoveries]
+
+
+class InMemoryStatsRepository:
+    """Stats rollups held in a dict, rebuilt from an in-memory discovery store."""
+
+    def __init__(self, discovery_repo: InMemoryDiscoveryRepository):
+        self.discovery_repo = discovery_repo
+        self._rollups: Dict[str, dict] = {}
+
+    async def record_discoveries(self, user_id: str, discoveries: Iterable[DiscoveryRecord]) -> None:
+        rollup = self._rollups.setdefault(user_id, {})
+        for discovery in sorted(discoveries, key=lambda d: utc_naive(d.timestamp)):
+            apply_discovery(rollup, discovery)
+
+    async def get_stats(self, user_id: str) -> Dict[str, int]:
+        rollup = self._rollups.get(user_id)
+        if rollup is None:
+            rollup = await self.rebuild(user_id)
+        return summarize(rollup)
+
+    async def rebuild(self, user_id: str) -> dict:
+        history = self.discovery_repo._history(user_id)
+        since = datetime.utcnow() - timedelta(days=ROLLUP_DAYS)
+        recent = [d for d in reversed(history) if utc_naive(d.timestamp) >= since]
+
+        rollup = build_rollup(recent, (utc_naive(d.timestamp).date() for d in history))
+        self._rollups[user_id] = rollup
+        return rollup
+
+    async def delete(self, user_id: str) -> None:
+        self._rollups.pop(user_id, None)
+
+
+class InMemoryChildContextRepository:
+    """Child context documents held in a dict."""
+
+    def __init__(self, user_repo: InMemoryUserRepository, discovery_repo: InMemoryDiscoveryRepository):
+        self.user_repo = user_repo
+        self.discovery_repo = discovery_repo
+        self._contexts: Dict[str, dict] = {}
+
+    async def get_context(self, context_id: str) -> dict:
+        context = self._contexts.get(context_id)
+        if context is None or not child_context.is_current(context):
+            context = await self.rebuild(context_id)
+        return copy.deepcopy(context)
+
+    async def record_discoveries(self, context_id: str, discoveries: Iterable[DiscoveryRecord]) -> Optional[dict]:
+        context = self._contexts.get(context_id)
+        if context is None or not child_context.is_current(context):
+            return None
+        for discovery in sorted(discoveries, key=lambda d: utc_naive(d.timestamp)):
+            child_context.apply_discovery(context, discovery)
+        return copy.deepcopy(context)
+
+    async def update_profile(self, context_id: str, user: Optional[UserProfile]) -> None:
+        context = self._contexts.get(context_id)
+        if context is not None:
+            context.update(child_context.context_profiles(context_id, user))
+
+    async def rebuild(self, context_id: str) -> dict:
+        user = await self.user_repo.get_user(context_id)
+        history = self.discovery_repo._history(context_id)
+        context = child_context.build_context(context_id, user, reversed(history))
+        if user is not None:
+            self._contexts[context_id] = context
+        return copy.deepcopy(context)
+
+    async def delete(self, context_id: str) -> None:
+        self._contexts.pop(context_id, None)
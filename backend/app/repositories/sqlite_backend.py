@@ -0,0 +1,745 @@
+"""
+SQLite Repository Backend
+Single-node implementations of the repository protocols on one SQLite file.
+
+The database runs in WAL mode so readers never wait on the writer. Queries run
+on worker threads (one connection per thread) to keep the event loop free.
+Documents are stored as JSON next to the indexed columns each query needs, so
+history pages, time ranges, favourites and counts are all index scans.
+"""
+from app.models.discovery_record import DiscoveryRecord, DiscoverySummary, DiscoveryTombstone
+from app.models.user_profile import UserProfile, ChildProfile, UserRole
+from app.repositories.base import utc_naive
+from app.repositories.discovery_repository import encode_cursor, decode_cursor, merge_changes
+from app.repositories.stats_repository import ROLLUP_DAYS, apply_discovery, build_rollup, summarize
+from app.repositories import child_context_repository as child_context
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar, Union
+from datetime import date, datetime, timedelta
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Discoveries deleted per write transaction by delete_user_discoveries()
+DELETE_PAGE_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    data    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS discoveries (
+    discovery_id TEXT PRIMARY KEY,
+    user_id      TEXT NOT NULL,
+    child_id     TEXT,
+    timestamp    TEXT NOT NULL,
+    favorite     INTEGER NOT NULL DEFAULT 0,
+    version      INTEGER NOT NULL DEFAULT 0,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_discoveries_user_history
+    ON discoveries (user_id, timestamp DESC, discovery_id DESC);
+CREATE INDEX IF NOT EXISTS idx_discoveries_child_history
+    ON discoveries (user_id, child_id, timestamp DESC, discovery_id DESC);
+CREATE INDEX IF NOT EXISTS idx_discoveries_favorites
+    ON discoveries (user_id, favorite, timestamp DESC);
+
+CREATE TABLE IF NOT EXISTS sync_versions (
+    user_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS discovery_tombstones (
+    discovery_id TEXT PRIMARY KEY,
+    user_id      TEXT NOT NULL,
+    child_id     TEXT,
+    version      INTEGER NOT NULL,
+    deleted_at   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tombstones_changes
+    ON discovery_tombstones (user_id, version);
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id TEXT PRIMARY KEY,
+    data    TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS child_contexts (
+    context_id TEXT PRIMARY KEY,
+    data       TEXT NOT NULL
+);
+"""
+
+# Columns added after a table was first released: (table, column, definition)
+ADDED_COLUMNS = [
+    ("discoveries", "version", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+# Indexes on added columns, created once the columns exist
+ADDED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_discoveries_changes
+    ON discoveries (user_id, version);
+"""
+
+# Columns needed to build a DiscoverySummary without parsing the whole document
+SUMMARY_COLUMNS = """
+    discovery_id, child_id, timestamp, favorite,
+    json_extract(data, '$.subject_type') AS subject_type,
+    json_extract(data, '$.image_url') AS image_url,
+    json_extract(data, '$.thumbnail_url') AS thumbnail_url,
+    json_extract(data, '$.species_info.common_name') AS common_name,
+    json_extract(data, '$.species_info.scientific_name') AS scientific_name
+"""
+
+
+def _timestamp(value: datetime) -> str:
+    """Fixed-width UTC timestamp, so text order matches time order."""
+    return utc_naive(value).isoformat(timespec="microseconds")
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, default=lambda v: v.isoformat() if isinstance(v, (datetime, date)) else str(v))
+
+
+def _native(row: sqlite3.Row) -> dict:
+    """Discovery document from a row, with datetimes parsed back from JSON strings."""
+    data = json.loads(row["data"])
+    data["version"] = row["version"]
+    for field in ("timestamp", "viewed_at"):
+        if isinstance(data.get(field), str):
+            data[field] = datetime.fromisoformat(data[field])
+    return data
+
+
+class SQLiteDatabase:
+    """Shared SQLite file with per-thread connections."""
+
+    def __init__(self, path: str):
+        """
+        Open (and if needed create) the database.
+
+        Args:
+            path: Database file path (must be a file; ":memory:" isn't shared between threads)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        for table, column, definition in ADDED_COLUMNS:
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        conn.executescript(ADDED_INDEXES)
+        logger.info(f"SQLite repository backend at {self.path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    async def run(self, work: Callable[[sqlite3.Connection], T]) -> T:
+        """Run `work(connection)` on a worker thread."""
+        return await asyncio.to_thread(lambda: work(self._connection()))
+
+    @staticmethod
+    def next_version(conn: sqlite3.Connection, user_id: str) -> int:
+        """Bump and return a user's change version (call inside a transaction)."""
+        conn.execute(
+            "INSERT INTO sync_versions (user_id, version) VALUES (?, 1) "
+            "ON CONFLICT (user_id) DO UPDATE SET version = version + 1",
+            (user_id,)
+        )
+        return conn.execute("SELECT version FROM sync_versions WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    @staticmethod
+    @contextmanager
+    def transaction(conn: sqlite3.Connection):
+        """Write transaction that takes the write lock up front."""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class SQLiteUserRepository:
+    """User profiles stored as JSON documents."""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def create_user(self, user_profile: UserProfile) -> UserProfile:
+        def insert(conn):
+            try:
+                conn.execute(
+                    "INSERT INTO users (user_id, data) VALUES (?, ?)",
+                    (user_profile.user_id, _dumps(user_profile.to_firestore()))
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"User with ID {user_profile.user_id} already exists")
+
+        try:
+            await self.db.run(insert)
+            logger.info(f"Created user profile for {user_profile.user_id}")
+            return user_profile
+
+        except Exception as e:
+            logger.error(f"Failed to create user {user_profile.user_id}: {str(e)}")
+            raise
+
+    async def get_user(self, user_id: str) -> Optional[UserProfile]:
+        row = await self.db.run(lambda conn: conn.execute(
+            "SELECT data FROM users WHERE user_id = ?", (user_id,)
+        ).fetchone())
+        return UserProfile.from_firestore(user_id, json.loads(row["data"])) if row else None
+
+    async def update_last_active(self, user_id: str) -> None:
+        try:
+            await self.db.run(lambda conn: conn.execute(
+                "UPDATE users SET data = json_set(data, '$.last_active', ?) WHERE user_id = ?",
+                (_timestamp(datetime.utcnow()), user_id)
+            ))
+
+        except Exception as e:
+            logger.error(f"Failed to update last_active for {user_id}: {str(e)}")
+            # Don't raise - this is not critical
+
+    async def add_child(self, user_id: str, child_profile: ChildProfile) -> None:
+        child = {
+            "child_id": child_profile.child_id,
+            "name": child_profile.name,
+            "age": child_profile.age,
+            "interests": child_profile.interests,
+            "created_at": child_profile.created_at,
+            "learning_level": child_profile.learning_level,
+            "avatar_color": child_profile.avatar_color
+        }
+
+        def append(conn):
+            with self.db.transaction(conn):
+                row = conn.execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+                if row is None:
+                    raise ValueError(f"User {user_id} not found")
+                data = json.loads(row["data"])
+                children = data.setdefault("children", [])
+                if json.loads(_dumps(child)) not in children:
+                    children.append(child)
+                conn.execute("UPDATE users SET data = ? WHERE user_id = ?", (_dumps(data), user_id))
+
+        try:
+            await self.db.run(append)
+            logger.info(f"Added child {child_profile.name} to user {user_id}")
+
+        except Exception as e:
+            logger.error(f"Failed to add child to user {user_id}: {str(e)}")
+            raise
+
+    async def get_or_create_user(
+        self,
+        user_id: str,
+        email: str,
+        display_name: Optional[str] = None
+    ) -> UserProfile:
+        user = await self.get_user(user_id)
+        if user is not None:
+            await self.update_last_active(user_id)
+            return user
+
+        return await self.create_user(UserProfile(
+            user_id=user_id,
+            email=email,
+            display_name=display_name,
+            role=UserRole.PARENT,
+            children=[],
+            created_at=datetime.utcnow(),
+            last_active=datetime.utcnow(),
+            preferences={}
+        ))
+
+    async def update_preferences(self, user_id: str, preferences: dict) -> None:
+        try:
+            updated = await self.db.run(lambda conn: conn.execute(
+                "UPDATE users SET data = json_set(data, '$.preferences', json(?)) WHERE user_id = ?",
+                (_dumps(preferences), user_id)
+            ).rowcount)
+            if not updated:
+                raise ValueError(f"User {user_id} not found")
+            logger.info(f"Updated preferences for user {user_id}")
+
+        except Exception as e:
+            logger.error(f"Failed to update preferences for {user_id}: {str(e)}")
+            raise
+
+    async def delete_user(self, user_id: str) -> bool:
+        deleted = await self.db.run(lambda conn: conn.execute(
+            "DELETE FROM users WHERE user_id = ?", (user_id,)
+        ).rowcount)
+        if deleted:
+            logger.info(f"Deleted user profile {user_id}")
+        return bool(deleted)
+
+
+class SQLiteDiscoveryRepository:
+    """Discovery records with indexed user, child, time and favourite columns."""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    async def save_discovery(self, discovery: DiscoveryRecord) -> str:
+        return (await self.save_discoveries([discovery]))[0]
+
+    async def save_discoveries(self, discoveries: List[DiscoveryRecord]) -> List[str]:
+        rows = [
+            (
+                d.discovery_id,
+                d.user_id,
+                d.child_id,
+                _timestamp(d.timestamp),
+                int(d.favorite),
+                _dumps(d.to_firestore())
+            )
+            for d in discoveries
+        ]
+
+        def insert(conn):
+            with self.db.transaction(conn):
+                conn.executemany(
+                    "INSERT OR REPLACE INTO discoveries "
+                    "(discovery_id, user_id, child_id, timestamp, favorite, data, version) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [row + (self.db.next_version(conn, row[1]),) for row in rows]
+                )
+
+        try:
+            await self.db.run(insert)
+            logger.info(f"Saved {len(discoveries)} discoveries")
+            return [d.discovery_id for d in discoveries]
+
+        except Exception as e:
+            logger.error(f"Failed to save discoveries: {str(e)}")
+            raise
+
+    async def get_discovery(self, discovery_id: str) -> Optional[DiscoveryRecord]:
+        rows = await self._select("discovery_id = ?", (discovery_id,), summary=False)
+        return rows[0] if rows else None
+
+    async def get_user_discoveries(
+        self,
+        user_id: str,
+        limit: int = 50,
+        child_id: Optional[str] = None,
+        page: int = 1,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        where, params = self._user_filter(user_id, child_id)
+        offset = (max(page, 1) - 1) * limit
+        return await self._select(
+            where, params, summary=summary,
+            tail="ORDER BY timestamp DESC, discovery_id DESC LIMIT ? OFFSET ?",
+            tail_params=(limit, offset)
+        )
+
+    async def get_user_discoveries_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        child_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        summary: bool = False
+    ) -> Tuple[List[Union[DiscoveryRecord, DiscoverySummary]], Optional[str]]:
+        where, params = self._user_filter(user_id, child_id)
+
+        if cursor:
+            timestamp, discovery_id = decode_cursor(cursor)
+            where += " AND (timestamp < ? OR (timestamp = ? AND discovery_id < ?))"
+            params += (_timestamp(timestamp), _timestamp(timestamp), discovery_id)
+
+        discoveries = await self._select(
+            where, params, summary,
+            tail="ORDER BY timestamp DESC, discovery_id DESC LIMIT ?",
+            tail_params=(limit,)
+        )
+        next_cursor = encode_cursor(discoveries[-1]) if len(discoveries) == limit else None
+        return discoveries, next_cursor
+
+    async def get_recent_discoveries(
+        self,
+        user_id: str,
+        days: int = 7,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        since = _timestamp(datetime.utcnow() - timedelta(days=days))
+        return await self._select(
+            "user_id = ? AND timestamp >= ?", (user_id, since), summary,
+            tail="ORDER BY timestamp DESC, discovery_id DESC"
+        )
+
+    async def get_favorites(
+        self,
+        user_id: str,
+        summary: bool = False
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        return await self._select(
+            "user_id = ? AND favorite = 1", (user_id,), summary,
+            tail="ORDER BY timestamp DESC"
+        )
+
+    async def update_discovery(self, discovery_id: str, updates: dict, user_id: Optional[str] = None) -> None:
+        def update(conn):
+            with self.db.transaction(conn):
+                row = conn.execute(
+                    "SELECT user_id, data FROM discoveries WHERE discovery_id = ?", (discovery_id,)
+                ).fetchone()
+                if row is None or (user_id is not None and row["user_id"] != user_id):
+                    raise ValueError(f"Discovery {discovery_id} not found")
+
+                data = json.loads(row["data"])
+                data.update(json.loads(_dumps(updates)))
+                conn.execute(
+                    "UPDATE discoveries SET child_id = ?, timestamp = ?, favorite = ?, data = ?, version = ? "
+                    "WHERE discovery_id = ?",
+                    (
+                        data.get("child_id"),
+                        _timestamp(datetime.fromisoformat(data["timestamp"])),
+                        int(bool(data.get("favorite"))),
+                        _dumps(data),
+                        self.db.next_version(conn, row["user_id"]),
+                        discovery_id
+                    )
+                )
+
+        try:
+            await self.db.run(update)
+            logger.info(f"Updated discovery {discovery_id}")
+
+        except Exception as e:
+            logger.error(f"Failed to update discovery {discovery_id}: {str(e)}")
+            raise
+
+    async def mark_favorite(self, discovery_id: str, favorite: bool = True, user_id: Optional[str] = None) -> None:
+        await self.update_discovery(discovery_id, {'favorite': favorite}, user_id)
+
+    async def count_user_discoveries(self, user_id: str, child_id: Optional[str] = None) -> int:
+        where, params = self._user_filter(user_id, child_id)
+        return await self.db.run(lambda conn: conn.execute(
+            f"SELECT COUNT(*) FROM discoveries WHERE {where}", params
+        ).fetchone()[0])
+
+    async def delete_discovery(
+        self,
+        discovery_id: str,
+        user_id: Optional[str] = None
+    ) -> Optional[DiscoveryTombstone]:
+        def delete(conn):
+            with self.db.transaction(conn):
+                row = conn.execute(
+                    "SELECT user_id, child_id FROM discoveries WHERE discovery_id = ?", (discovery_id,)
+                ).fetchone()
+                if row is None or (user_id is not None and row["user_id"] != user_id):
+                    return None
+
+                tombstone = DiscoveryTombstone(
+                    discovery_id=discovery_id,
+                    user_id=row["user_id"],
+                    child_id=row["child_id"],
+                    version=self.db.next_version(conn, row["user_id"])
+                )
+                conn.execute("DELETE FROM discoveries WHERE discovery_id = ?", (discovery_id,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO discovery_tombstones "
+                    "(discovery_id, user_id, child_id, version, deleted_at) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        discovery_id,
+                        tombstone.user_id,
+                        tombstone.child_id,
+                        tombstone.version,
+                        _timestamp(tombstone.deleted_at)
+                    )
+                )
+                return tombstone
+
+        try:
+            tombstone = await self.db.run(delete)
+            if tombstone is not None:
+                logger.info(f"Deleted discovery {discovery_id} (version {tombstone.version})")
+            return tombstone
+
+        except Exception as e:
+            logger.error(f"Failed to delete discovery {discovery_id}: {str(e)}")
+            raise
+
+    async def delete_user_discoveries(
+        self,
+        user_id: str,
+        on_page: Optional[Callable[[List[str]], None]] = None
+    ) -> int:
+        # Pages keep each write transaction (and the write lock) short
+        deleted = 0
+        while True:
+            rows = await self.db.run(lambda conn: conn.execute(
+                "SELECT discovery_id, json_extract(data, '$.image_url') AS image_url "
+                "FROM discoveries WHERE user_id = ? LIMIT ?",
+                (user_id, DELETE_PAGE_SIZE)
+            ).fetchall())
+            if not rows:
+                break
+            if on_page is not None:
+                on_page([row["image_url"] for row in rows if row["image_url"]])
+
+            def delete(conn, ids=[row["discovery_id"] for row in rows]):
+                with self.db.transaction(conn):
+                    conn.executemany("DELETE FROM discoveries WHERE discovery_id = ?", ((i,) for i in ids))
+
+            await self.db.run(delete)
+            deleted += len(rows)
+
+        def delete_sync_state(conn):
+            with self.db.transaction(conn):
+                conn.execute("DELETE FROM discovery_tombstones WHERE user_id = ?", (user_id,))
+                conn.execute("DELETE FROM sync_versions WHERE user_id = ?", (user_id,))
+
+        await self.db.run(delete_sync_state)
+        logger.info(f"Deleted {deleted} discoveries of user {user_id}")
+        return deleted
+
+    async def image_in_use(self, image_url: str) -> bool:
+        row = await self.db.run(lambda conn: conn.execute(
+            "SELECT 1 FROM discoveries WHERE json_extract(data, '$.image_url') = ? LIMIT 1", (image_url,)
+        ).fetchone())
+        return row is not None
+
+    async def get_version(self, user_id: str) -> int:
+        row = await self.db.run(lambda conn: conn.execute(
+            "SELECT version FROM sync_versions WHERE user_id = ?", (user_id,)
+        ).fetchone())
+        return row[0] if row else 0
+
+    async def get_changes(
+        self,
+        user_id: str,
+        since: int,
+        limit: int = 500
+    ) -> Tuple[List[DiscoveryRecord], List[DiscoveryTombstone], bool]:
+        discoveries = await self._select(
+            "user_id = ? AND version > ?", (user_id, since), summary=False,
+            tail="ORDER BY version LIMIT ?",
+            tail_params=(limit + 1,)
+        )
+        rows = await self.db.run(lambda conn: conn.execute(
+            "SELECT * FROM discovery_tombstones WHERE user_id = ? AND version > ? ORDER BY version LIMIT ?",
+            (user_id, since, limit + 1)
+        ).fetchall())
+        tombstones = [DiscoveryTombstone(**dict(row)) for row in rows]
+        return merge_changes(discoveries, tombstones, limit)
+
+    async def light_history(self, user_id: str) -> List[DiscoveryRecord]:
+        """
+        A user's discoveries newest first, with only discovery_id, child_id,
+        timestamp, subject_type and species_info set (for rollup rebuilds).
+        """
+        rows = await self.db.run(lambda conn: conn.execute(
+            "SELECT discovery_id, child_id, timestamp, "
+            "json_extract(data, '$.subject_type') AS subject_type, "
+            "json_extract(data, '$.species_info') AS species_info "
+            "FROM discoveries WHERE user_id = ? ORDER BY timestamp DESC, discovery_id DESC",
+            (user_id,)
+        ).fetchall())
+        return [
+            DiscoveryRecord.model_construct(
+                discovery_id=row["discovery_id"],
+                child_id=row["child_id"],
+                timestamp=datetime.fromisoformat(row["timestamp"]),
+                subject_type=row["subject_type"] or "unknown",
+                species_info=json.loads(row["species_info"] or "{}")
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def _user_filter(user_id: str, child_id: Optional[str]) -> Tuple[str, tuple]:
+        if child_id:
+            return "user_id = ? AND child_id = ?", (user_id, child_id)
+        return "user_id = ?", (user_id,)
+
+    async def _select(
+        self,
+        where: str,
+        params: tuple,
+        summary: bool,
+        tail: str = "",
+        tail_params: tuple = ()
+    ) -> List[Union[DiscoveryRecord, DiscoverySummary]]:
+        columns = SUMMARY_COLUMNS if summary else "discovery_id, version, data"
+        rows = await self.db.run(lambda conn: conn.execute(
+            f"SELECT {columns} FROM discoveries WHERE {where} {tail}", params + tail_params
+        ).fetchall())
+
+        # Rows were written by this backend, so skip validation (see from_firestore)
+        if summary:
+            return [
+                DiscoverySummary.model_construct(
+                    discovery_id=row["discovery_id"],
+                    child_id=row["child_id"],
+                    timestamp=datetime.fromisoformat(row["timestamp"]),
+                    subject_type=row["subject_type"] or "unknown",
+                    common_name=row["common_name"],
+                    scientific_name=row["scientific_name"],
+                    image_url=row["image_url"],
+                    thumbnail_url=row["thumbnail_url"],
+                    favorite=bool(row["favorite"])
+                )
+                for row in rows
+            ]
+
+        return [
+            DiscoveryRecord.from_firestore(row["discovery_id"], _native(row), trusted=True)
+            for row in rows
+        ]
+
+
+class SQLiteStatsRepository:
+    """Stats rollups stored as JSON documents."""
+
+    def __init__(self, db: SQLiteDatabase, discovery_repo: SQLiteDiscoveryRepository):
+        self.db = db
+        self.discovery_repo = discovery_repo
+
+    async def record_discoveries(self, user_id: str, discoveries: Iterable[DiscoveryRecord]) -> None:
+        discoveries = sorted(discoveries, key=lambda d: utc_naive(d.timestamp))
+        if not discoveries:
+            return
+
+        def apply(conn):
+            with self.db.transaction(conn):
+                row = conn.execute("SELECT data FROM user_stats WHERE user_id = ?", (user_id,)).fetchone()
+                rollup = json.loads(row["data"]) if row else {}
+                if any([apply_discovery(rollup, discovery) for discovery in discoveries]):
+                    conn.execute(
+                        "INSERT OR REPLACE INTO user_stats (user_id, data) VALUES (?, ?)",
+                        (user_id, _dumps(rollup))
+                    )
+
+        try:
+            await self.db.run(apply)
+
+        except Exception as e:
+            logger.error(f"Failed to update stats rollup for {user_id}: {str(e)}")
+            raise
+
+    async def get_stats(self, user_id: str) -> Dict[str, int]:
+        row = await self.db.run(lambda conn: conn.execute(
+            "SELECT data FROM user_stats WHERE user_id = ?", (user_id,)
+        ).fetchone())
+        rollup = json.loads(row["data"]) if row else await self.rebuild(user_id)
+        return summarize(rollup)
+
+    async def rebuild(self, user_id: str) -> dict:
+        history = await self.discovery_repo.light_history(user_id)
+        since = datetime.utcnow() - timedelta(days=ROLLUP_DAYS)
+        recent = [d for d in reversed(history) if d.timestamp >= since]
+
+        rollup = build_rollup(recent, (d.timestamp.date() for d in history))
+        await self.db.run(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO user_stats (user_id, data) VALUES (?, ?)",
+            (user_id, _dumps(rollup))
+        ))
+        logger.info(f"Rebuilt stats rollup for user {user_id}")
+        return json.loads(_dumps(rollup))
+
+    async def delete(self, user_id: str) -> None:
+        await self.db.run(lambda conn: conn.execute("DELETE FROM user_stats WHERE user_id = ?", (user_id,)))
+
+
+class SQLiteChildContextRepository:
+    """Child context documents stored as JSON."""
+
+    def __init__(
+        self,
+        db: SQLiteDatabase,
+        user_repo: SQLiteUserRepository,
+        discovery_repo: SQLiteDiscoveryRepository
+    ):
+        self.db = db
+        self.user_repo = user_repo
+        self.discovery_repo = discovery_repo
+
+    async def get_context(self, context_id: str) -> dict:
+        row = await self.db.run(lambda conn: conn.execute(
+            "SELECT data FROM child_contexts WHERE context_id = ?", (context_id,)
+        ).fetchone())
+        context = json.loads(row["data"]) if row else None
+        if context is None or not child_context.is_current(context):
+            return await self.rebuild(context_id)
+        return context
+
+    async def record_discoveries(self, context_id: str, discoveries: Iterable[DiscoveryRecord]) -> Optional[dict]:
+        discoveries = sorted(discoveries, key=lambda d: utc_naive(d.timestamp))
+        if not discoveries:
+            return None
+
+        def apply(conn):
+            with self.db.transaction(conn):
+                row = conn.execute(
+                    "SELECT data FROM child_contexts WHERE context_id = ?", (context_id,)
+                ).fetchone()
+                context = json.loads(row["data"]) if row else None
+                if context is None or not child_context.is_current(context):
+                    return None
+                if any([child_context.apply_discovery(context, d) for d in discoveries]):
+                    conn.execute(
+                        "UPDATE child_contexts SET data = ? WHERE context_id = ?",
+                        (_dumps(context), context_id)
+                    )
+                return context
+
+        try:
+            return await self.db.run(apply)
+
+        except Exception as e:
+            logger.error(f"Failed to update child context {context_id}: {str(e)}")
+            raise
+
+    async def update_profile(self, context_id: str, user: Optional[UserProfile]) -> None:
+        profiles = child_context.context_profiles(context_id, user)
+        await self.db.run(lambda conn: conn.execute(
+            "UPDATE child_contexts SET data = json_set(data, '$.profile', json(?), '$.children', json(?)) "
+            "WHERE context_id = ?",
+            (_dumps(profiles["profile"]), _dumps(profiles["children"]), context_id)
+        ))
+
+    async def rebuild(self, context_id: str) -> dict:
+        user, history = await asyncio.gather(
+            self.user_repo.get_user(context_id),
+            self.discovery_repo.light_history(context_id)
+        )
+        context = child_context.build_context(context_id, user, reversed(history))
+        if user is not None:
+            await self.db.run(lambda conn: conn.execute(
+                "INSERT OR REPLACE INTO child_contexts (context_id, data) VALUES (?, ?)",
+                (context_id, _dumps(context))
+            ))
+        logger.info(f"Rebuilt child context {context_id} from {len(history)} discoveries")
+        return json.loads(_dumps(context))
+
+    async def delete(self, context_id: str) -> None:
+        await self.db.run(lambda conn: conn.execute(
+            "DELETE FROM child_contexts WHERE context_id = ?", (context_id,)
+        ))
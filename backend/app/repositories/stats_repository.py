@@ -0,0 +1,298 @@
+"""
+Stats Repository
+Per-user discovery stats rollups in Firestore, maintained incrementally on save.
+
+Each user has one small `user_stats/{uid}` document:
+    days:            {"YYYY-MM-DD": {"count": n, "species": [...]}} for the last ROLLUP_DAYS
+    streak_last_day: last UTC day with a discovery ("YYYY-MM-DD")
+    streak_length:   consecutive days with a discovery ending on streak_last_day
+    recent_ids:      last RECENT_IDS discovery IDs applied (makes retries idempotent)
+"""
+from app.config.firebase_config import FirebaseConfig
+from app.config.settings import FIRESTORE_LAYOUT
+from app.models.discovery_record import DiscoveryRecord
+from app.repositories.base import utc_naive
+from app.repositories.discovery_layout import merge_streams, user_discovery_queries
+from google.cloud.firestore import async_transactional
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Daily buckets kept in the rollup
+ROLLUP_DAYS = 31
+# Distinct species remembered per day
+SPECIES_PER_DAY = 50
+# Discovery IDs remembered for de-duplication
+RECENT_IDS = 100
+
+
+def _utc_date(timestamp: datetime) -> date:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc)
+    return timestamp.date()
+
+
+def _species_key(discovery: DiscoveryRecord) -> str:
+    name = (discovery.species_info or {}).get("common_name") or ""
+    return name.strip().lower()
+
+
+def apply_discovery(rollup: dict, discovery: DiscoveryRecord) -> bool:
+    """
+    Fold one discovery into a rollup dict in place.
+
+    Args:
+        rollup: Rollup document data (may be empty)
+        discovery: The saved discovery
+
+    Returns:
+        False if the discovery had already been applied, True otherwise
+    """
+    recent_ids = rollup.setdefault("recent_ids", [])
+    if discovery.discovery_id in recent_ids:
+        return False
+    recent_ids.append(discovery.discovery_id)
+    del recent_ids[:-RECENT_IDS]
+
+    day = _utc_date(discovery.timestamp)
+    days = rollup.setdefault("days", {})
+    new_day = day.isoformat() not in days
+    bucket = days.setdefault(day.isoformat(), {"count": 0, "species": []})
+    bucket["count"] += 1
+    species = _species_key(discovery)
+    if species and species not in bucket["species"] and len(bucket["species"]) < SPECIES_PER_DAY:
+        bucket["species"].append(species)
+
+    # Keep only the newest ROLLUP_DAYS buckets
+    cutoff = (max(date.fromisoformat(d) for d in days) - timedelta(days=ROLLUP_DAYS - 1)).isoformat()
+    for old_day in [d for d in days if d < cutoff]:
+        del days[old_day]
+
+    # Advance the streak, or extend it backwards for a back-dated day (e.g. an
+    # offline upload) that lands just before it. Runs joined that way are
+    # followed through the daily buckets, so only ROLLUP_DAYS back.
+    last_day = rollup.get("streak_last_day")
+    if last_day is None or day.isoformat() > last_day:
+        if last_day == (day - timedelta(days=1)).isoformat():
+            rollup["streak_length"] = rollup.get("streak_length", 0) + 1
+        else:
+            rollup["streak_length"] = 1
+        rollup["streak_last_day"] = day.isoformat()
+    elif new_day:
+        length = rollup.get("streak_length", 1)
+        if day == date.fromisoformat(last_day) - timedelta(days=length):
+            earlier = day - timedelta(days=1)
+            length += 1
+            while earlier.isoformat() in days:
+                length += 1
+                earlier -= timedelta(days=1)
+            rollup["streak_length"] = length
+
+    rollup["updated_at"] = datetime.utcnow()
+    return True
+
+
+def summarize(rollup: dict, today: Optional[date] = None) -> Dict[str, int]:
+    """
+    Compute the Live Discovery stats from a rollup.
+
+    Returns:
+        {"discoveries_today", "new_species", "streak_days"}
+    """
+    today = today or datetime.utcnow().date()
+    days = rollup.get("days", {})
+
+    week_ago = (today - timedelta(days=7)).isoformat()
+    seen_species = set()
+    for day, bucket in days.items():
+        if day >= week_ago:
+            seen_species.update(bucket.get("species", []))
+
+    streak = rollup.get("streak_length", 0) if rollup.get("streak_last_day") == today.isoformat() else 0
+
+    return {
+        "discoveries_today": days.get(today.isoformat(), {}).get("count", 0),
+        "new_species": len(seen_species),
+        "streak_days": streak
+    }
+
+
+def walk_streak(days_newest_first: Iterable[date]) -> Tuple[Optional[str], int]:
+    """
+    Find the most recent run of consecutive discovery days.
+
+    Args:
+        days_newest_first: UTC days of a user's discoveries, newest first
+
+    Returns:
+        Tuple of (last_day as "YYYY-MM-DD" or None, run length)
+    """
+    last_day: Optional[date] = None
+    current: Optional[date] = None
+    length = 0
+    for day in days_newest_first:
+        if last_day is None:
+            last_day = current = day
+            length = 1
+        elif day == current:
+            continue
+        elif day == current - timedelta(days=1):
+            current = day
+            length += 1
+        else:
+            break
+
+    return (last_day.isoformat() if last_day else None), length
+
+
+def build_rollup(recent: Iterable[DiscoveryRecord], days_newest_first: Iterable[date]) -> dict:
+    """
+    Build a rollup from scratch (used by the SQLite and in-memory backends).
+
+    Args:
+        recent: Discoveries from the last ROLLUP_DAYS, oldest first
+        days_newest_first: UTC days of all the user's discoveries, newest first
+
+    Returns:
+        Rollup document data
+    """
+    rollup: dict = {}
+    for discovery in recent:
+        apply_discovery(rollup, discovery)
+    rollup["streak_last_day"], rollup["streak_length"] = walk_streak(days_newest_first)
+    rollup["updated_at"] = datetime.utcnow()
+    return rollup
+
+
+@async_transactional
+async def _apply_in_transaction(transaction, rollup_ref, discoveries: List[DiscoveryRecord]) -> None:
+    snapshot = await rollup_ref.get(transaction=transaction)
+    rollup = snapshot.to_dict() if snapshot.exists else {}
+
+    applied = [apply_discovery(rollup, discovery) for discovery in discoveries]
+    if any(applied):
+        transaction.set(rollup_ref, rollup)
+
+
+class StatsRepository:
+    """Repository for per-user stats rollups."""
+
+    def __init__(self):
+        """Initialize repository with async Firestore client."""
+        self.db = FirebaseConfig.get_async_firestore()
+        self.stats_ref = self.db.collection('user_stats')
+        self.layout = FIRESTORE_LAYOUT
+
+    async def record_discoveries(self, user_id: str, discoveries: Iterable[DiscoveryRecord]) -> None:
+        """
+        Fold newly saved discoveries into the user's rollup (one transaction).
+
+        Args:
+            user_id: Firebase UID
+            discoveries: Saved DiscoveryRecord instances
+        """
+        discoveries = sorted(discoveries, key=lambda d: utc_naive(d.timestamp))
+        if not discoveries:
+            return
+
+        try:
+            await _apply_in_transaction(
+                self.db.transaction(),
+                self.stats_ref.document(user_id),
+                discoveries
+            )
+            logger.debug(f"Updated stats rollup for user {user_id}")
+
+        except Exception as e:
+            logger.error(f"Failed to update stats rollup for {user_id}: {str(e)}")
+            raise
+
+    async def get_stats(self, user_id: str) -> Dict[str, int]:
+        """
+        Get Live Discovery stats with a single document read.
+        Builds the rollup from history the first time a user is seen.
+
+        Args:
+            user_id: Firebase UID
+
+        Returns:
+            {"discoveries_today", "new_species", "streak_days"}
+        """
+        doc = await self.stats_ref.document(user_id).get()
+        rollup = doc.to_dict() if doc.exists else await self.rebuild(user_id)
+        return summarize(rollup)
+
+    async def rebuild(self, user_id: str) -> dict:
+        """
+        Rebuild a user's rollup from their discovery history (backfill).
+
+        Buckets come from the last ROLLUP_DAYS of discoveries; the streak is
+        walked back through the full history using a timestamp-only projection.
+
+        Args:
+            user_id: Firebase UID
+
+        Returns:
+            The rebuilt rollup data
+        """
+        try:
+            since = datetime.utcnow() - timedelta(days=ROLLUP_DAYS)
+            queries = [
+                query.where('timestamp', '>=', since)
+                    .order_by('timestamp')
+                    .select(['timestamp', 'species_info.common_name'])
+                for query in await user_discovery_queries(self.db, self.layout, user_id)
+            ]
+
+            rollup: dict = {}
+            async for doc in merge_streams(queries, key=lambda doc: doc.get('timestamp')):
+                data = doc.to_dict()
+                apply_discovery(rollup, DiscoveryRecord.model_construct(
+                    discovery_id=doc.id,
+                    timestamp=data["timestamp"],
+                    species_info=data.get("species_info") or {}
+                ))
+
+            rollup["streak_last_day"], rollup["streak_length"] = await self._walk_streak(user_id)
+            rollup["updated_at"] = datetime.utcnow()
+
+            await self.stats_ref.document(user_id).set(rollup)
+            logger.info(f"Rebuilt stats rollup for user {user_id}")
+            return rollup
+
+        except Exception as e:
+            logger.error(f"Failed to rebuild stats rollup for {user_id}: {str(e)}")
+            raise
+
+    async def delete(self, user_id: str) -> None:
+        """Delete a user's rollup document."""
+        await self.stats_ref.document(user_id).delete()
+        logger.info(f"Deleted stats rollup for user {user_id}")
+
+    async def _walk_streak(self, user_id: str):
+        """Return (last_day, length) of the user's most recent run of consecutive days."""
+        queries = [
+            query.order_by('timestamp', direction='DESCENDING').select(['timestamp'])
+            for query in await user_discovery_queries(self.db, self.layout, user_id)
+        ]
+
+        # Stream rather than walk_streak() so only the current run is read
+        last_day: Optional[date] = None
+        current: Optional[date] = None
+        length = 0
+        async for doc in merge_streams(queries, key=lambda doc: doc.get('timestamp'), reverse=True):
+            day = _utc_date(doc.to_dict()["timestamp"])
+            if last_day is None:
+                last_day = current = day
+                length = 1
+            elif day == current:
+                continue
+            elif day == current - timedelta(days=1):
+                current = day
+                length += 1
+            else:
+                break
+
+        return (last_day.isoformat() if last_day else None), length
@@ -4,6 +4,11 @@ Data access layer for user profiles in Firestore.
 """
 from app.config.firebase_config import FirebaseConfig
 from app.models.user_profile import UserProfile, ChildProfile, UserRole
+from app.repositories.base import utc_naive
+from app.repositories.write_buffer import get_write_buffer
+from app.config.settings import USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES
+from app.utils.ttl_cache import TTLCache
+from google.api_core.exceptions import AlreadyExists
 from typing import Optional, List
 from datetime import datetime
 import logging
@@ -11,14 +16,24 @@ import uuid
 
 logger = logging.getLogger(__name__)
 
+# get_or_create_user skips the last_active write when it is fresher than this
+LAST_ACTIVE_RESOLUTION_SECONDS = 60
+
 
 class UserRepository:
     """Repository for user profile operations."""
     
     def __init__(self):
-        """Initialize repository with Firestore client."""
-        self.db = FirebaseConfig.get_firestore()
+        """Initialize repository with async Firestore client."""
+        self.db = FirebaseConfig.get_async_firestore()
         self.users_ref = self.db.collection('users')
+        self.write_buffer = get_write_buffer()
+        # Read-through profile cache; entries are dropped on this instance's writes
+        self.cache: TTLCache[UserProfile] = TTLCache(
+            USER_CACHE_TTL_SECONDS,
+            max_entries=USER_CACHE_MAX_ENTRIES,
+            name="user_profile"
+        )
     
     async def create_user(self, user_profile: UserProfile) -> UserProfile:
         """
@@ -36,14 +51,15 @@ class UserRepository:
         try:
             user_ref = self.users_ref.document(user_profile.user_id)
             
-            # Check if user already exists
-            if user_ref.get().exists:
+            # create() fails if the document exists, so no separate existence read
+            try:
+                await user_ref.create(user_profile.to_firestore())
+            except AlreadyExists:
                 logger.warning(f"User {user_profile.user_id} already exists")
                 raise ValueError(f"User with ID {user_profile.user_id} already exists")
             
-            # Create user document
-            user_ref.set(user_profile.to_firestore())
             logger.info(f"Created user profile for {user_profile.user_id}")
+            self.cache.set(user_profile.user_id, user_profile.model_copy(deep=True))
             
             return user_profile
             
@@ -55,14 +71,21 @@ class UserRepository:
         """
         Retrieve user profile by ID.
         
+        Served from the profile cache when possible; profiles may be up to
+        USER_CACHE_TTL_SECONDS stale for writes made by other instances.
+        
         Args:
             user_id: Firebase UID
             
         Returns:
             UserProfile if found, None otherwise
         """
+        cached = self.cache.get(user_id)
+        if cached is not None:
+            return cached.model_copy(deep=True)
+        
         try:
-            doc = self.users_ref.document(user_id).get()
+            doc = await self.users_ref.document(user_id).get()
             
             if not doc.exists:
                 logger.debug(f"User {user_id} not found")
@@ -72,7 +95,8 @@ class UserRepository:
             user_profile = UserProfile.from_firestore(user_id, data)
             logger.debug(f"Retrieved user profile for {user_id}")
             
-            return user_profile
+            self.cache.set(user_id, user_profile)
+            return user_profile.model_copy(deep=True)
             
         except Exception as e:
             logger.error(f"Failed to get user {user_id}: {str(e)}")
@@ -82,14 +106,22 @@ class UserRepository:
         """
         Update user's last active timestamp.
         
+        Goes through the write-behind buffer: repeated calls within a flush
+        interval collapse into a single batched write. The cached profile is
+        updated in place (its expiry is unchanged).
+        
         Args:
             user_id: Firebase UID
         """
         try:
-            self.users_ref.document(user_id).update({
-                'last_active': datetime.utcnow()
+            now = datetime.utcnow()
+            await self.write_buffer.update(self.users_ref.document(user_id), {
+                'last_active': now
             })
-            logger.debug(f"Updated last_active for user {user_id}")
+            cached = self.cache.get(user_id)
+            if cached is not None:
+                cached.last_active = now
+            logger.debug(f"Queued last_active update for user {user_id}")
             
         except Exception as e:
             logger.error(f"Failed to update last_active for {user_id}: {str(e)}")
@@ -109,7 +141,7 @@ class UserRepository:
         try:
             from google.cloud.firestore import ArrayUnion
             
-            self.users_ref.document(user_id).update({
+            await self.users_ref.document(user_id).update({
                 'children': ArrayUnion([{
                     "child_id": child_profile.child_id,
                     "name": child_profile.name,
@@ -120,6 +152,7 @@ class UserRepository:
                     "avatar_color": child_profile.avatar_color
                 }])
             })
+            self.cache.invalidate(user_id)
             logger.info(f"Added child {child_profile.name} to user {user_id}")
             
         except Exception as e:
@@ -136,6 +169,12 @@ class UserRepository:
         Get existing user or create new one if doesn't exist.
         Useful for handling first-time users.
         
+        A cached profile costs no reads. Otherwise it's one read, plus for a
+        new user one create() that is atomic against concurrent first logins.
+        last_active is only written when it is older than
+        LAST_ACTIVE_RESOLUTION_SECONDS, so repeat calls on a cached profile
+        cost nothing even when the write-behind buffer isn't running.
+        
         Args:
             user_id: Firebase UID
             email: User email
@@ -148,8 +187,10 @@ class UserRepository:
         user = await self.get_user(user_id)
         
         if user is not None:
-            # User exists, update last active
-            await self.update_last_active(user_id)
+            # User exists, update last active unless it is recent
+            age = datetime.utcnow() - utc_naive(user.last_active)
+            if age.total_seconds() >= LAST_ACTIVE_RESOLUTION_SECONDS:
+                await self.update_last_active(user_id)
             return user
         
         # Create new user
@@ -164,7 +205,12 @@ class UserRepository:
             preferences={}
         )
         
-        return await self.create_user(new_user)
+        try:
+            return await self.create_user(new_user)
+        except ValueError:
+            # Another request created the profile between our read and create
+            self.cache.invalidate(user_id)
+            return await self.get_user(user_id)
     
     async def update_preferences(self, user_id: str, preferences: dict) -> None:
         """
@@ -175,11 +221,36 @@ class UserRepository:
             preferences: Dict of preference key-value pairs
         """
         try:
-            self.users_ref.document(user_id).update({
+            await self.users_ref.document(user_id).update({
                 'preferences': preferences
             })
+            self.cache.invalidate(user_id)
             logger.info(f"Updated preferences for user {user_id}")
             
         except Exception as e:
             logger.error(f"Failed to update preferences for {user_id}: {str(e)}")
             raise
+    
+    async def delete_user(self, user_id: str) -> bool:
+        """
+        Delete a user profile document.
+        
+        Args:
+            user_id: Firebase UID
+            
+        Returns:
+            True if the profile existed
+        """
+        try:
+            user_ref = self.users_ref.document(user_id)
+            self.write_buffer.discard(user_ref)
+            existed = (await user_ref.get()).exists
+            await user_ref.delete()
+            self.cache.invalidate(user_id)
+            
+            logger.info(f"Deleted user profile {user_id}")
+            return existed
+            
+        except Exception as e:
+            logger.error(f"Failed to delete user {user_id}: {str(e)}")
+            raise
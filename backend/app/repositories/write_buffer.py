@@ -0,0 +1,142 @@
+"""
+Write-Behind Buffer
+Coalesces low-value Firestore field updates (e.g. last_active) and flushes
+them in batched commits on an interval and at shutdown.
+"""
+from app.config.firebase_config import FirebaseConfig
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Firestore caps a batched write at 500 operations
+BATCH_WRITE_LIMIT = 500
+
+
+class WriteBehindBuffer:
+    """
+    Keeps the latest pending field values per document and writes them later.
+
+    Repeated updates to the same document between flushes collapse into one
+    write. Only use this for data where losing the last few seconds on a crash
+    is acceptable.
+    """
+
+    def __init__(self, flush_interval: float = 5.0, max_pending: int = BATCH_WRITE_LIMIT):
+        """
+        Initialize buffer.
+
+        Args:
+            flush_interval: Seconds between background flushes
+            max_pending: Pending documents that trigger an early flush
+        """
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[str, Tuple[object, dict]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._flush_task is not None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    async def update(self, doc_ref, fields: dict) -> None:
+        """
+        Queue a field update for an existing document.
+        Writes through immediately if the buffer hasn't been started.
+
+        Args:
+            doc_ref: Async Firestore document reference
+            fields: Field values to update (later values win)
+        """
+        if not self.running:
+            await doc_ref.update(fields)
+            return
+
+        _, pending_fields = self._pending.get(doc_ref.path, (doc_ref, {}))
+        pending_fields.update(fields)
+        self._pending[doc_ref.path] = (doc_ref, pending_fields)
+
+        if len(self._pending) >= self.max_pending:
+            asyncio.create_task(self.flush())
+
+    def discard(self, doc_ref) -> None:
+        """Drop any pending update for a document (e.g. before deleting it)."""
+        self._pending.pop(doc_ref.path, None)
+
+    async def flush(self) -> int:
+        """
+        Write all pending updates in batched commits.
+
+        Returns:
+            Number of documents written
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            pending, self._pending = list(self._pending.values()), {}
+            written = 0
+
+            for start in range(0, len(pending), BATCH_WRITE_LIMIT):
+                chunk = pending[start:start + BATCH_WRITE_LIMIT]
+                batch = FirebaseConfig.get_async_firestore().batch()
+                for doc_ref, fields in chunk:
+                    batch.update(doc_ref, fields)
+
+                try:
+                    await batch.commit()
+                    written += len(chunk)
+                except Exception as e:
+                    # One missing document fails the whole batch; retry individually
+                    logger.warning(f"Buffered batch failed ({str(e)}), retrying {len(chunk)} updates singly")
+                    for doc_ref, fields in chunk:
+                        try:
+                            await doc_ref.update(fields)
+                            written += 1
+                        except Exception as single_error:
+                            logger.error(f"Dropped buffered update for {doc_ref.path}: {str(single_error)}")
+
+            logger.debug(f"Flushed {written} buffered document updates")
+            return written
+
+    async def start(self) -> None:
+        """Start the periodic flush task."""
+        if self.running:
+            return
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush task and write everything still pending."""
+        if not self.running:
+            return
+        self._flush_task.cancel()
+        await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._flush_task = None
+        await self.flush()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {str(e)}")
+
+
+# Global buffer instance (lazy-initialized)
+_write_buffer: Optional[WriteBehindBuffer] = None
+
+
+def get_write_buffer() -> WriteBehindBuffer:
+    """Get or create the global write-behind buffer."""
+    global _write_buffer
+    if _write_buffer is None:
+        from app.config.settings import WRITE_BUFFER_FLUSH_SECONDS
+        _write_buffer = WriteBehindBuffer(flush_interval=WRITE_BUFFER_FLUSH_SECONDS)
+    return _write_buffer
@@ -0,0 +1,90 @@
+"""
+Dashboard API Routes
+One aggregated payload for the parent dashboard and curiosity board.
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from app.auth.firebase_auth import verify_firebase_token, get_user_id, get_user_email
+from app.repositories.base import utc_naive
+from app.repositories.factory import get_user_repository, get_discovery_repository, get_stats_repository
+from app.utils.json_response import FastJSONResponse
+from typing import Dict, Literal, Optional
+from datetime import datetime, timedelta
+import asyncio
+import logging
+
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+user_repo = get_user_repository()
+discovery_repo = get_discovery_repository()
+stats_repo = get_stats_repository()
+logger = logging.getLogger(__name__)
+
+EMPTY_STATS = {"discoveries_today": 0, "new_species": 0, "streak_days": 0}
+
+
+async def _safe_stats(user_id: str) -> Dict[str, int]:
+    try:
+        return await stats_repo.get_stats(user_id)
+    except Exception as e:
+        logger.error(f"Stats error: {e}")
+        return dict(EMPTY_STATS)
+
+
+@router.get("")
+async def get_dashboard(
+    limit: int = 50,
+    days: int = 7,
+    child_id: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    token: Dict = Depends(verify_firebase_token)
+):
+    """
+    Everything the dashboard screens load on open, in one response:
+    profile and children (/api/users/me, /children), the first history page
+    and total (/api/discoveries), recent discoveries (/recent), favorites
+    (/favorites) and stats (/api/users/stats).
+
+    The token is verified once and the reads run concurrently. Children come
+    from the profile document, and recent discoveries are taken from the
+    history page whenever it already reaches back `days` days.
+    """
+    user_id = get_user_id(token)
+    summary = view == "summary"
+
+    try:
+        profile, (history, next_cursor), total, favorites, stats = await asyncio.gather(
+            user_repo.get_or_create_user(
+                user_id=user_id,
+                email=get_user_email(token),
+                display_name=token.get('name')
+            ),
+            discovery_repo.get_user_discoveries_page(user_id, limit=limit, child_id=child_id, summary=summary),
+            discovery_repo.count_user_discoveries(user_id, child_id=child_id),
+            discovery_repo.get_favorites(user_id, summary=summary),
+            _safe_stats(user_id)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Recent discoveries are a prefix of the (unfiltered) history when the page reaches far enough back
+    since = datetime.utcnow() - timedelta(days=days)
+    if child_id is None and (next_cursor is None or (history and utc_naive(history[-1].timestamp) < since)):
+        recent = [d for d in history if utc_naive(d.timestamp) >= since]
+    else:
+        recent = await discovery_repo.get_recent_discoveries(user_id, days, summary=summary)
+
+    return FastJSONResponse({
+        "profile": profile,
+        "children": profile.children,
+        "stats": stats,
+        "history": {
+            "discoveries": history,
+            "total": total,
+            "page_size": limit,
+            "next_cursor": next_cursor
+        },
+        "recent": {
+            "discoveries": recent,
+            "days": days
+        },
+        "favorites": favorites
+    })
@@ -0,0 +1,112 @@
+"""
+Export API Routes
+Streams a family's whole discovery history as NDJSON.
+"""
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from app.auth.firebase_auth import verify_firebase_token, get_user_id
+from app.models.discovery_record import DiscoveryRecord
+from app.repositories.factory import get_discovery_repository
+from app.utils.metrics import metrics
+from typing import AsyncIterator, Dict, List, Literal, Optional
+from datetime import datetime
+import asyncio
+import logging
+import pydantic_core
+import zlib
+
+router = APIRouter(prefix="/api/discoveries", tags=["export"])
+discovery_repo = get_discovery_repository()
+logger = logging.getLogger(__name__)
+
+# Discoveries read per repository page; the only ones held in memory at a time
+EXPORT_PAGE_SIZE = 200
+EXPORT_GZIP_LEVEL = 6
+
+
+async def _pages(user_id: str, child_id: Optional[str]) -> AsyncIterator[List[DiscoveryRecord]]:
+    """Walk the history with cursors, reading the next page while the current one is sent."""
+    page, cursor = await discovery_repo.get_user_discoveries_page(user_id, limit=EXPORT_PAGE_SIZE, child_id=child_id)
+    following: Optional[asyncio.Task] = None
+    try:
+        while True:
+            if cursor:
+                following = asyncio.create_task(discovery_repo.get_user_discoveries_page(
+                    user_id, limit=EXPORT_PAGE_SIZE, child_id=child_id, cursor=cursor
+                ))
+            yield page
+            if following is None:
+                return
+            page, cursor = await following
+            following = None
+    finally:
+        if following is not None:
+            following.cancel()
+
+
+def _with_images(discovery: DiscoveryRecord, images: str, base_url: str) -> DiscoveryRecord:
+    """Drop image references, or make relative ones absolute so the file is usable offline."""
+    if images == "none":
+        return discovery.model_copy(update={"image_url": None, "thumbnail_url": None})
+
+    updates = {
+        field: base_url + url
+        for field, url in (("image_url", discovery.image_url), ("thumbnail_url", discovery.thumbnail_url))
+        if url and url.startswith("/")
+    }
+    return discovery.model_copy(update=updates) if updates else discovery
+
+
+async def _ndjson(
+    user_id: str,
+    child_id: Optional[str],
+    images: str,
+    base_url: str,
+    compress: bool
+) -> AsyncIterator[bytes]:
+    """One JSON line per discovery, one chunk per page (gzip is flushed after each page)."""
+    compressor = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    exported = 0
+    async for page in _pages(user_id, child_id):
+        chunk = b"".join(
+            pydantic_core.to_json(_with_images(discovery, images, base_url)) + b"\n"
+            for discovery in page
+        )
+        exported += len(page)
+        metrics.increment("export_discoveries", len(page))
+        if compressor:
+            chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield chunk
+
+    if compressor:
+        yield compressor.flush()
+    logger.info(f"Exported {exported} discoveries for user {user_id}")
+
+
+@router.get("/export")
+async def export_discoveries(
+    request: Request,
+    child_id: Optional[str] = None,
+    images: Literal["reference", "none"] = "reference",
+    compress: bool = False,
+    token: Dict = Depends(verify_firebase_token)
+):
+    """
+    Download every discovery (optionally one child's) as NDJSON, newest first.
+
+    The history is read page by page with cursors and streamed as it is
+    read, so memory use doesn't grow with its size. images=reference keeps
+    image_url/thumbnail_url (made absolute); images=none leaves them out.
+    compress=true sends a .ndjson.gz file; otherwise the response is still
+    compressed on the wire when the client accepts it.
+    """
+    user_id = get_user_id(token)
+    filename = f"discoveries-{datetime.utcnow():%Y%m%d}.ndjson"
+    if compress:
+        filename += ".gz"
+
+    return StreamingResponse(
+        _ndjson(user_id, child_id, images, str(request.base_url).rstrip("/"), compress),
+        media_type="application/gzip" if compress else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
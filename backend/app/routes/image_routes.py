@@ -0,0 +1,33 @@
+"""
+Image API Routes
+Serves content-addressed discovery photos from the local image store.
+"""
+from fastapi import APIRouter, HTTPException, Request, Response
+from app.storage.image_store import CACHE_CONTROL, get_image_store
+import logging
+
+router = APIRouter(prefix="/api/images", tags=["images"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/{digest}/{name}")
+async def get_image(digest: str, name: str, request: Request):
+    """
+    Serve one image variant ("original.jpg", "display.jpg", "thumb.jpg").
+
+    No token is required: <img> tags can't send one, and the URL is the
+    SHA-256 of the image, so it can't be guessed. Content never changes for
+    a URL, so responses are cacheable for a year.
+    """
+    image_store = get_image_store()
+    stored = await image_store.get(digest, name) if image_store is not None else None
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    tag = f'"{digest}-{name}"'
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": tag}
+    if request.headers.get("if-none-match") == tag:
+        return Response(status_code=304, headers=headers)
+
+    data, content_type = stored
+    return Response(content=data, media_type=content_type, headers=headers)
@@ -0,0 +1,85 @@
+"""
+Job API Routes
+Status polling and Server-Sent Events for background jobs.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.auth.firebase_auth import optional_auth
+from app.jobs.queue import Job, JobQueue, TERMINAL_STATUSES, get_job_queue
+from typing import Dict, Optional
+import asyncio
+import json
+import logging
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+logger = logging.getLogger(__name__)
+
+# Seconds between SSE keep-alive comments
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+def _get_visible_job(job_queue: JobQueue, job_id: str, token: Optional[Dict]) -> Job:
+    """Return the job, hiding jobs owned by another user behind a 404."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job.owner_id and (not token or token.get('uid') != job.owner_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return job
+
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str, token: Optional[Dict] = Depends(optional_auth)):
+    """Get the current status (and result, once finished) of a background job."""
+    job = _get_visible_job(get_job_queue(), job_id, token)
+    return job.to_dict()
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    request: Request,
+    token: Optional[Dict] = Depends(optional_auth)
+):
+    """
+    Server-Sent Events stream for a background job.
+    Emits the current status immediately, then every status transition and
+    any handler events (e.g. "enriched"), and closes once the job finishes.
+    """
+    job_queue = get_job_queue()
+    job = _get_visible_job(job_queue, job_id, token)
+
+    async def event_stream():
+        events = job_queue.subscribe(job_id)
+        try:
+            yield _sse("status", job.to_dict())
+            if job.status in TERMINAL_STATUSES:
+                return
+
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(events.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield _sse(message["event"], message["data"])
+
+                if message["event"] == "status" and message["data"]["status"] in (
+                    status.value for status in TERMINAL_STATUSES
+                ):
+                    return
+        finally:
+            job_queue.unsubscribe(job_id, events)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
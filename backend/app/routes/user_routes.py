@@ -4,14 +4,18 @@ Handles user profile management endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException
 from app.auth.firebase_auth import verify_firebase_token, get_user_id, get_user_email
-from app.repositories.user_repository import UserRepository
+from app.repositories.factory import get_user_repository, get_child_context_repository
+from app.orchestrator.context_loader import invalidate_context
+from app.jobs import DELETE_ACCOUNT, get_job_queue
+from app.jobs.queue import TERMINAL_STATUSES
 from app.models.user_profile import UserProfile, AddChildRequest, ChildProfile
 from typing import Dict
 import logging
 import uuid
 
 router = APIRouter(prefix="/api/users", tags=["users"])
-user_repo = UserRepository()
+user_repo = get_user_repository()
+child_context_repo = get_child_context_repository()
 logger = logging.getLogger(__name__)
 
 
@@ -55,6 +59,10 @@ async def add_child(
     # Add to user
     await user_repo.add_child(user_id, child_profile)
     
+    # Keep Pip's denormalized context in step with the profile
+    await child_context_repo.update_profile(user_id, await user_repo.get_user(user_id))
+    invalidate_context(user_id)
+    
     logger.info(f"Added child {child_profile.name} to user {user_id}")
     
     return {
@@ -88,3 +96,25 @@ async def update_preferences(
     await user_repo.update_preferences(user_id, preferences)
     
     return {"success": True, "preferences": preferences}
+
+
+@router.delete("/me", status_code=202)
+async def delete_account(token: Dict = Depends(verify_firebase_token)):
+    """
+    Delete the current user's account and all of their data.
+
+    Runs as a background job (discoveries, images, stats, child context,
+    then the profile); poll /api/jobs/{job_id} or follow its events for
+    progress. Deleting the Firebase Auth account is left to the client.
+    """
+    user_id = get_user_id(token)
+    job_queue = get_job_queue()
+
+    # One deletion per user: asking again returns the job already under way
+    job_id = f"account_delete_{user_id}"
+    job = job_queue.get(job_id)
+    if job is None or job.status in TERMINAL_STATUSES:
+        job = await job_queue.submit(DELETE_ACCOUNT, payload={"user_id": user_id}, owner_id=user_id, job_id=job_id)
+        logger.info(f"Account deletion requested for user {user_id}")
+
+    return {"job_id": job.job_id, "status": job.status}
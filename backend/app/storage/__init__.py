@@ -0,0 +1,20 @@
+"""Image storage package."""
+from .image_store import (
+    ImageStore,
+    LocalImageStore,
+    BucketImageStore,
+    StoredImage,
+    decode_media_data,
+    digest_from_url,
+    get_image_store
+)
+
+__all__ = [
+    'ImageStore',
+    'LocalImageStore',
+    'BucketImageStore',
+    'StoredImage',
+    'decode_media_data',
+    'digest_from_url',
+    'get_image_store'
+]
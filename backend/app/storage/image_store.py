@@ -0,0 +1,392 @@
+"""
+Image Store
+Content-addressed storage for discovery photos, with resized variants.
+
+Images are keyed by the SHA-256 of their bytes, so the same photo is stored
+once however many discoveries use it, and every URL is immutable (served
+with a year-long cache lifetime). Each image has:
+    original   the uploaded bytes
+    display    longest side DISPLAY_SIZE, JPEG
+    thumb      longest side THUMB_SIZE, JPEG
+
+Variants are rendered in a process pool so resizing never blocks the event
+loop. Rendering needs Pillow. Without it only the original is kept, and the
+variant URLs point at the original.
+
+Backends:
+    LocalImageStore   files under IMAGE_DIR, served by /api/images
+    BucketImageStore  a Cloud Storage / Firebase Storage bucket
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Longest side, in pixels, of each rendered variant
+DISPLAY_SIZE = 1280
+THUMB_SIZE = 320
+VARIANTS = {"display": DISPLAY_SIZE, "thumb": THUMB_SIZE}
+JPEG_QUALITY = 82
+
+# Immutable, content-addressed responses
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Magic bytes -> (content type, file extension)
+IMAGE_TYPES = [
+    (b"\xff\xd8\xff", ("image/jpeg", "jpg")),
+    (b"\x89PNG\r\n\x1a\n", ("image/png", "png")),
+    (b"GIF87a", ("image/gif", "gif")),
+    (b"GIF89a", ("image/gif", "gif")),
+]
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def sniff_image_type(data: bytes) -> Optional[Tuple[str, str]]:
+    """(content type, extension) for a supported image, None otherwise."""
+    for magic, image_type in IMAGE_TYPES:
+        if data.startswith(magic):
+            return image_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return None
+
+
+def decode_media_data(media_data: Optional[str]) -> Optional[bytes]:
+    """Bytes of a base64 image payload (data: prefix allowed), None if empty or not base64."""
+    if not media_data:
+        return None
+    if "," in media_data:
+        media_data = media_data.split(",", 1)[1]
+    try:
+        return base64.b64decode(media_data.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def digest_from_url(url: Optional[str]) -> Optional[str]:
+    """The image digest in a stored image URL (".../{digest}/{name}"), or None."""
+    if not url:
+        return None
+    parts = url.rstrip("/").split("/")
+    if len(parts) >= 2 and DIGEST_PATTERN.match(parts[-2]):
+        return parts[-2]
+    return None
+
+
+def render_variants(data: bytes) -> Dict[str, bytes]:
+    """
+    Resize an image to every variant size (runs in a worker process).
+    Returns an empty dict when Pillow isn't installed.
+    """
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return {}
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        rendered = {}
+        for variant, size in VARIANTS.items():
+            copy = image.copy()
+            copy.thumbnail((size, size))
+            buffer = io.BytesIO()
+            copy.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            rendered[variant] = buffer.getvalue()
+        return rendered
+
+
+@dataclass
+class StoredImage:
+    """A stored image and the URLs of its variants."""
+    digest: str
+    content_type: str
+    urls: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def display_url(self) -> str:
+        return self.urls.get("display") or self.urls["original"]
+
+    @property
+    def thumbnail_url(self) -> str:
+        return self.urls.get("thumb") or self.urls["original"]
+
+    def to_dict(self) -> dict:
+        return {"digest": self.digest, "content_type": self.content_type, "urls": self.urls}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StoredImage":
+        return cls(digest=data["digest"], content_type=data["content_type"], urls=data.get("urls", {}))
+
+
+class ImageStore:
+    """
+    Content-addressed image storage. Subclasses provide the object I/O
+    (_exists, _write, _read, _delete) and public URLs (url).
+
+    Objects are named "{digest}/{variant}.{ext}"; variants are written before
+    the original, so an existing original means the image is complete.
+    """
+
+    def __init__(self, max_bytes: int, workers: int):
+        """
+        Args:
+            max_bytes: Largest accepted upload
+            workers: Processes used to render variants
+        """
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    async def put(self, data: bytes) -> Optional[StoredImage]:
+        """
+        Store an image and its variants unless it is already stored.
+
+        Args:
+            data: Raw image bytes
+
+        Returns:
+            StoredImage, or None if the data isn't a supported image or is too large
+        """
+        image_type = sniff_image_type(data)
+        if image_type is None or len(data) > self.max_bytes:
+            logger.warning(f"Not storing image: unsupported type or {len(data)} bytes")
+            return None
+
+        content_type, extension = image_type
+        digest = hashlib.sha256(data).hexdigest()
+        original = f"{digest}/original.{extension}"
+
+        try:
+            if await self._exists(original):
+                logger.debug(f"Image {digest} already stored")
+                variants = await self._variants(digest)
+            else:
+                rendered = await self._render(data)
+                await asyncio.gather(*(
+                    self._write(f"{digest}/{variant}.jpg", body, "image/jpeg")
+                    for variant, body in rendered.items()
+                ))
+                await self._write(original, data, content_type)
+                variants = list(rendered)
+                logger.info(f"Stored image {digest} ({len(data)} bytes, variants: {variants or 'none'})")
+
+            urls = {"original": self.url(original)}
+            urls.update({variant: self.url(f"{digest}/{variant}.jpg") for variant in variants})
+            return StoredImage(digest=digest, content_type=content_type, urls=urls)
+
+        except Exception as e:
+            logger.error(f"Failed to store image {digest}: {str(e)}")
+            raise
+
+    async def get(self, digest: str, name: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Read one stored object.
+
+        Args:
+            digest: Image SHA-256
+            name: "{variant}.{ext}"
+
+        Returns:
+            Tuple of (bytes, content type), or None if it doesn't exist
+        """
+        if not DIGEST_PATTERN.match(digest) or not self._valid_name(name):
+            return None
+        data = await self._read(f"{digest}/{name}")
+        if data is None:
+            return None
+        image_type = sniff_image_type(data)
+        return data, image_type[0] if image_type else "application/octet-stream"
+
+    async def delete(self, digest: str) -> None:
+        """Delete an image and all its variants (callers check nothing else references it)."""
+        names = [f"{digest}/{variant}.jpg" for variant in VARIANTS]
+        names += [f"{digest}/original.{extension}" for _, (_, extension) in IMAGE_TYPES]
+        names.append(f"{digest}/original.webp")
+        await asyncio.gather(*(self._delete(name) for name in set(names)))
+        logger.info(f"Deleted image {digest}")
+
+    def url(self, name: str) -> str:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Shut down the render pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _render(self, data: bytes) -> Dict[str, bytes]:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            rendered = await asyncio.get_running_loop().run_in_executor(self._pool, render_variants, data)
+        except Exception as e:
+            # Corrupt or unsupported image data: keep the original only
+            logger.warning(f"Could not render image variants: {str(e)}")
+            return {}
+        if not rendered:
+            logger.warning("Pillow is not installed; storing originals without variants")
+        return rendered
+
+    async def _variants(self, digest: str) -> List[str]:
+        exists = await asyncio.gather(*(self._exists(f"{digest}/{variant}.jpg") for variant in VARIANTS))
+        return [variant for variant, present in zip(VARIANTS, exists) if present]
+
+    @staticmethod
+    def _valid_name(name: str) -> bool:
+        stem, _, extension = name.partition(".")
+        known = {ext for _, (_, ext) in IMAGE_TYPES} | {"webp"}
+        return (stem == "original" and extension in known) or (stem in VARIANTS and extension == "jpg")
+
+    async def _exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    async def _write(self, name: str, data: bytes, content_type: str) -> None:
+        raise NotImplementedError
+
+    async def _read(self, name: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def _delete(self, name: str) -> None:
+        raise NotImplementedError
+
+
+class LocalImageStore(ImageStore):
+    """Images as files under a directory, served by /api/images."""
+
+    def __init__(self, root: str, base_url: str = "", max_bytes: int = 10_000_000, workers: int = 2):
+        """
+        Args:
+            root: Directory to store images in
+            base_url: Prefix for image URLs (empty for paths relative to the API)
+            max_bytes: Largest accepted upload
+            workers: Processes used to render variants
+        """
+        super().__init__(max_bytes, workers)
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/api/images/{name}"
+
+    def _path(self, name: str) -> Path:
+        return self.root / name[:2] / name
+
+    async def _exists(self, name: str) -> bool:
+        return await asyncio.to_thread(self._path(name).exists)
+
+    async def _write(self, name: str, data: bytes, content_type: str) -> None:
+        path = self._path(name)
+
+        def write() -> None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+
+        await asyncio.to_thread(write)
+
+    async def _read(self, name: str) -> Optional[bytes]:
+        path = self._path(name)
+
+        def read() -> Optional[bytes]:
+            try:
+                return path.read_bytes()
+            except FileNotFoundError:
+                return None
+
+        return await asyncio.to_thread(read)
+
+    async def _delete(self, name: str) -> None:
+        await asyncio.to_thread(self._path(name).unlink, missing_ok=True)
+
+
+class BucketImageStore(ImageStore):
+    """
+    Images in a Cloud Storage bucket (e.g. the project's Firebase Storage bucket).
+
+    Objects are uploaded with an immutable Cache-Control, and URLs point at the
+    bucket (or at base_url, e.g. a CDN in front of it), so images never pass
+    through the API. The "images/" prefix must be publicly readable.
+    """
+
+    PREFIX = "images/"
+
+    def __init__(
+        self,
+        bucket_name: str,
+        base_url: str = "",
+        max_bytes: int = 10_000_000,
+        workers: int = 2
+    ):
+        """
+        Args:
+            bucket_name: Bucket to use
+            base_url: Public URL prefix for the bucket (default: its storage.googleapis.com URL)
+            max_bytes: Largest accepted upload
+            workers: Processes used to render variants
+        """
+        super().__init__(max_bytes, workers)
+        from app.config.firebase_config import FirebaseConfig
+        from firebase_admin import storage
+
+        FirebaseConfig.initialize()
+        self.bucket = storage.bucket(bucket_name)
+        self.base_url = (base_url or f"https://storage.googleapis.com/{self.bucket.name}").rstrip("/")
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{self.PREFIX}{name}"
+
+    async def _exists(self, name: str) -> bool:
+        return await asyncio.to_thread(self.bucket.blob(self.PREFIX + name).exists)
+
+    async def _write(self, name: str, data: bytes, content_type: str) -> None:
+        blob = self.bucket.blob(self.PREFIX + name)
+        blob.cache_control = CACHE_CONTROL
+        await asyncio.to_thread(blob.upload_from_string, data, content_type=content_type)
+
+    async def _read(self, name: str) -> Optional[bytes]:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            return await asyncio.to_thread(self.bucket.blob(self.PREFIX + name).download_as_bytes)
+        except NotFound:
+            return None
+
+    async def _delete(self, name: str) -> None:
+        from google.api_core.exceptions import NotFound
+
+        try:
+            await asyncio.to_thread(self.bucket.blob(self.PREFIX + name).delete)
+        except NotFound:
+            pass
+
+
+_image_store: Optional[ImageStore] = None
+
+
+def get_image_store() -> Optional[ImageStore]:
+    """The configured image store (IMAGE_STORE), or None when image storage is off."""
+    global _image_store
+    if _image_store is None:
+        from app.config.settings import (
+            IMAGE_STORE, IMAGE_DIR, IMAGE_BUCKET, IMAGE_BASE_URL, IMAGE_MAX_BYTES, IMAGE_WORKERS
+        )
+        if IMAGE_STORE == "local":
+            _image_store = LocalImageStore(IMAGE_DIR, IMAGE_BASE_URL, IMAGE_MAX_BYTES, IMAGE_WORKERS)
+        elif IMAGE_STORE == "bucket":
+            if not IMAGE_BUCKET:
+                raise ValueError("IMAGE_STORE=bucket needs IMAGE_BUCKET")
+            _image_store = BucketImageStore(IMAGE_BUCKET, IMAGE_BASE_URL, IMAGE_MAX_BYTES, IMAGE_WORKERS)
+        elif IMAGE_STORE != "none":
+            raise ValueError(f"Unknown IMAGE_STORE {IMAGE_STORE!r}; expected local, bucket or none")
+    return _image_store
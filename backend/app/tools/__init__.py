@@ -0,0 +1 @@
+"""Maintenance tools, run as `python -m app.tools.<name>` from backend/."""
@@ -0,0 +1,103 @@
+"""
+Memory Embedding Backfill
+Embeds existing discovery history into the vector index, for discoveries saved
+before the embedding pipeline existed or dropped by it (crash, API outage).
+
+Usage (from backend/):
+    python -m app.tools.backfill_embeddings --user <uid> [--force]
+    python -m app.tools.backfill_embeddings --all [--page-size 200]
+
+Discoveries already in the index are skipped unless --force is given. History
+is read page by page with cursors and embedded one page per batch, and each
+user's partition is saved when they are done, so an interrupted run resumes
+where it stopped. The index lives in this process's VECTOR_DIR: run the tool
+while the API server using the same directory is stopped, or the server's
+next flush overwrites what it wrote.
+"""
+from app.config.firebase_config import FirebaseConfig
+from app.memory.embeddings import get_embedder, memory_metadata, memory_text
+from app.memory.vector_db import get_vector_db
+from app.repositories.factory import get_discovery_repository
+import argparse
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 200
+
+
+async def backfill_user(user_id: str, page_size: int = DEFAULT_PAGE_SIZE, force: bool = False) -> int:
+    """
+    Embed one user's discovery history.
+
+    Returns:
+        Number of discoveries embedded
+    """
+    discovery_repo = get_discovery_repository()
+    vector_db = get_vector_db()
+    embedder = get_embedder()
+
+    embedded = 0
+    cursor = None
+    while True:
+        page, cursor = await discovery_repo.get_user_discoveries_page(user_id, limit=page_size, cursor=cursor)
+        if not force:
+            known = set(await vector_db.contains(user_id, [record.discovery_id for record in page]))
+            page = [record for record in page if record.discovery_id not in known]
+
+        if page:
+            vectors = await embedder.embed([memory_text(record) for record in page])
+            embedded += await vector_db.store_many(user_id, [
+                (record.discovery_id, vector, memory_metadata(record))
+                for record, vector in zip(page, vectors)
+            ])
+
+        if not cursor:
+            break
+
+    await vector_db.flush()
+    logger.info(f"Embedded {embedded} discoveries for user {user_id}")
+    return embedded
+
+
+async def backfill(user_ids=None, page_size: int = DEFAULT_PAGE_SIZE, force: bool = False) -> int:
+    """
+    Backfill the given users, or every user when None.
+
+    Returns:
+        Number of discoveries embedded
+    """
+    if get_vector_db() is None:
+        raise RuntimeError("The vector index needs numpy")
+
+    if user_ids is None:
+        users_ref = FirebaseConfig.get_async_firestore().collection('users')
+        user_ids = [doc.id async for doc in users_ref.list_documents()]
+
+    embedded = 0
+    for user_id in user_ids:
+        try:
+            embedded += await backfill_user(user_id, page_size, force)
+        except Exception as e:
+            logger.error(f"Skipping {user_id}: {str(e)}")
+
+    return embedded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embed existing discoveries into the vector index")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user", action="append", help="Firebase UID (repeatable)")
+    target.add_argument("--all", action="store_true", help="Every user in the users collection")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--force", action="store_true", help="Re-embed discoveries already in the index")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    embedded = asyncio.run(backfill(None if args.all else args.user, args.page_size, args.force))
+    logger.info(f"Embedded {embedded} discoveries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Stats Backfill
+Rebuilds per-user stats rollups (`user_stats/{uid}`) from discovery history.
+
+Usage (from backend/):
+    python -m app.tools.backfill_stats --user <uid>
+    python -m app.tools.backfill_stats --all
+
+Rollups go to the configured REPOSITORY_BACKEND; --all lists users from the
+Firestore users collection.
+"""
+from app.config.firebase_config import FirebaseConfig
+from app.repositories.factory import get_stats_repository
+import argparse
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill(user_ids=None) -> int:
+    """
+    Rebuild rollups for the given users, or for every user when None.
+
+    Returns:
+        Number of rollups rebuilt
+    """
+    stats_repo = get_stats_repository()
+
+    if user_ids is None:
+        users_ref = FirebaseConfig.get_async_firestore().collection('users')
+        user_ids = [doc.id async for doc in users_ref.list_documents()]
+
+    rebuilt = 0
+    for user_id in user_ids:
+        try:
+            await stats_repo.rebuild(user_id)
+            rebuilt += 1
+        except Exception as e:
+            logger.error(f"Skipping {user_id}: {str(e)}")
+
+    return rebuilt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild per-user stats rollups")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user", action="append", help="Firebase UID (repeatable)")
+    target.add_argument("--all", action="store_true", help="Every user in the users collection")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rebuilt = asyncio.run(backfill(None if args.all else args.user))
+    logger.info(f"Rebuilt {rebuilt} stats rollups")
+
+
+if __name__ == "__main__":
+    main()
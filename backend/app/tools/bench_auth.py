@@ -0,0 +1,63 @@
+"""
+Auth Benchmark
+Measures ID-token verification throughput offline, using the local signing key.
+
+Usage (from backend/):
+    python -m app.tools.bench_auth [--users 200] [--requests 5000] [--concurrency 50]
+
+Reports cold verifications (every token checked for the first time) and
+warm ones (served from the verified-token cache).
+"""
+from app.config import settings
+
+# Patch the loaded setting, not os.environ: settings loads .env with
+# override=True, so an AUTH_MODE there would win. Must happen before the auth
+# module reads its settings.
+settings.AUTH_MODE = "local"
+
+from app.auth.firebase_auth import verify_token, _verified_tokens
+from app.auth.local_tokens import issue_local_token
+import argparse
+import asyncio
+import random
+import time
+
+
+async def _run(tokens, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(token: str) -> None:
+        async with semaphore:
+            await verify_token(token)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(random.choice(tokens)) for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def benchmark(users: int, requests: int, concurrency: int) -> None:
+    tokens = [issue_local_token(f"bench_user_{i}", email=f"user{i}@example.com") for i in range(users)]
+
+    _verified_tokens.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(verify_token(token) for token in tokens))
+    cold = users / (time.perf_counter() - started)
+
+    warm = await _run(tokens, requests, concurrency)
+
+    print(f"cold verifications: {cold:,.0f}/s ({users} distinct tokens)")
+    print(f"cached verifications: {warm:,.0f}/s ({requests} requests, concurrency {concurrency})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ID-token verification")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(benchmark(args.users, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Serialization Benchmark
+Compares the original read/response path for discovery lists with the fast one.
+
+Usage (from backend/):
+    python -m app.tools.bench_serialization [--sizes 50 100 250 500] [--rounds 50]
+
+    original: DiscoveryRecord.from_firestore (validated), model_dump(),
+              jsonable_encoder, JSONResponse
+    fast:     from_firestore(trusted=True), FastJSONResponse
+
+Both paths must produce the same JSON. Firestore document shapes are
+synthetic, so network and decoding costs are excluded.
+"""
+from app.models.discovery_record import DiscoveryRecord, DiscoverySummary
+from app.utils.json_response import FastJSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from datetime import datetime, timedelta
+from typing import Callable, List
+import argparse
+import json
+import time
+
+
+def _documents(count: int) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "user_id": "bench_user",
+            "child_id": f"child_{i % 3}",
+            "timestamp": now - timedelta(minutes=i),
+            "image_url": f"https://storage.example.com/discoveries/{i}.jpg",
+            "location": {"lat": 51.5 + i / 1000, "lng": -0.12},
+            "subject_type": "insect",
+            "species_info": {
+                "common_name": f"Species {i}",
+                "scientific_name": "Danaus plexippus",
+                "habitat": "meadows and gardens",
+                "interesting_facts": ["Migrates thousands of miles", "Tastes with its feet"]
+            },
+            "safety_assessment": {"safe_to_touch": False, "warnings": ["Handle gently"], "safety_level": "safe"},
+            "story": "Once upon a time, in a sunny meadow, a butterfly went exploring. " * 8,
+            "learning_activities": [
+                {"title": "Draw the butterfly", "description": "Color the butterfly's wings"},
+                {"title": "Count the spots", "description": "How many spots can you find?"}
+            ],
+            "viewed_at": now,
+            "time_spent_seconds": 42,
+            "activities_completed": ["a1"],
+            "favorite": i % 5 == 0,
+            "version": i + 1
+        }
+        for i in range(count)
+    ]
+
+
+def original(documents: List[dict], summary: bool) -> bytes:
+    model = DiscoverySummary if summary else DiscoveryRecord
+    records = [model.from_firestore(f"disc_{i}", doc) for i, doc in enumerate(documents)]
+    content = {"discoveries": [r.model_dump() for r in records], "total": len(records)}
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def fast(documents: List[dict], summary: bool) -> bytes:
+    model = DiscoverySummary if summary else DiscoveryRecord
+    records = [model.from_firestore(f"disc_{i}", doc, trusted=True) for i, doc in enumerate(documents)]
+    return FastJSONResponse({"discoveries": records, "total": len(records)}).body
+
+
+def _time(path: Callable[[List[dict], bool], bytes], documents: List[dict], summary: bool, rounds: int) -> float:
+    """Best per-call time in milliseconds."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        path(documents, summary)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def benchmark(sizes: List[int], rounds: int) -> None:
+    print(f"{'records':>8} {'view':>8} {'original ms':>12} {'fast ms':>9} {'speedup':>8}")
+    for size in sizes:
+        documents = _documents(size)
+        for summary in (False, True):
+            if json.loads(original(documents, summary)) != json.loads(fast(documents, summary)):
+                raise SystemExit(f"Outputs differ for {size} records (summary={summary})")
+
+            before = _time(original, documents, summary, rounds)
+            after = _time(fast, documents, summary, rounds)
+            view = "summary" if summary else "full"
+            print(f"{size:>8} {view:>8} {before:>12.2f} {after:>9.2f} {before / after:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark discovery list serialization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 250, 500])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    benchmark(args.sizes, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Discovery Layout Migration
+Copies discoveries from the flat `discoveries` collection into the nested
+layout (users/{uid}/children/{child_id}/discoveries), online and resumably.
+
+Usage (from backend/):
+    python -m app.tools.migrate_layout --all [--batch-size 200] [--pause 0.5]
+    python -m app.tools.migrate_layout --user <uid>
+    python -m app.tools.migrate_layout --all --verify
+
+Each user is copied in two phases, with progress checkpointed in
+`layout_migrations/{uid}` in the same batched write as every page:
+    1. Full copy: the user's flat documents in document-ID order. The user's
+       change version is recorded before it starts.
+    2. Catch-up: discoveries written and tombstones left since the recorded
+       version (the delta sync feed), then the version moves forward.
+Re-running resumes phase 1 or repeats phase 2, so the tool can run while the
+app keeps serving the flat layout. A nested copy with a higher version than
+the flat document is never overwritten, so it is also safe after cutover.
+
+Cutover:
+    1. Run --all while FIRESTORE_LAYOUT=flat (repeat until it's quick).
+    2. Deploy with FIRESTORE_LAYOUT=nested.
+    3. Run --all again to catch up writes that reached the flat layout
+       before the switch, then --verify.
+The flat documents are left in place; delete them once verified.
+Users are listed from the users collection.
+"""
+from app.config.firebase_config import FirebaseConfig
+from app.models.discovery_record import DiscoveryTombstone
+from app.repositories.discovery_layout import child_discoveries_ref, user_discovery_queries
+from app.repositories.discovery_repository import BATCH_WRITE_LIMIT
+from google.cloud.firestore_v1.field_path import FieldPath
+from datetime import datetime
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Documents read per page. A catch-up page can hold this many copies and as
+# many deletes, plus the checkpoint, in one batched write.
+DEFAULT_BATCH_SIZE = 200
+
+
+class LayoutMigration:
+    """Flat-to-nested discovery copy for one user at a time (see module docstring)."""
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, pause: float = 0.0):
+        """
+        Args:
+            batch_size: Documents per page (and per batched write)
+            pause: Seconds to sleep between pages, to spare production traffic
+        """
+        self.db = FirebaseConfig.get_async_firestore()
+        self.discoveries_ref = self.db.collection('discoveries')
+        self.versions_ref = self.db.collection('sync_versions')
+        self.tombstones_ref = self.db.collection('discovery_tombstones')
+        self.checkpoints_ref = self.db.collection('layout_migrations')
+        self.batch_size = min(batch_size, (BATCH_WRITE_LIMIT - 1) // 2)
+        self.pause = pause
+
+    async def migrate_user(self, user_id: str) -> int:
+        """
+        Run (or resume) both phases for one user.
+
+        Args:
+            user_id: Firebase UID
+
+        Returns:
+            Number of documents copied or deleted in this run
+        """
+        try:
+            checkpoint_ref = self.checkpoints_ref.document(user_id)
+            doc = await checkpoint_ref.get()
+            checkpoint = doc.to_dict() if doc.exists else None
+
+            if checkpoint is None:
+                version_doc = await self.versions_ref.document(user_id).get()
+                checkpoint = {
+                    "version": (version_doc.to_dict() or {}).get("version", 0) if version_doc.exists else 0,
+                    "cursor": None,
+                    "complete": False,
+                    "started_at": datetime.utcnow()
+                }
+                await checkpoint_ref.set(checkpoint)
+
+            applied = 0
+            if not checkpoint["complete"]:
+                applied += await self._full_copy(user_id, checkpoint)
+            applied += await self._catch_up(user_id, checkpoint)
+
+            logger.info(f"Migrated user {user_id}: {applied} changes applied, at version {checkpoint['version']}")
+            return applied
+
+        except Exception as e:
+            logger.error(f"Failed to migrate user {user_id}: {str(e)}")
+            raise
+
+    async def _full_copy(self, user_id: str, checkpoint: dict) -> int:
+        """Phase 1: copy the user's flat documents page by page."""
+        copied = 0
+        while True:
+            query = (self.discoveries_ref
+                    .where('user_id', '==', user_id)
+                    .order_by(FieldPath.document_id())
+                    .limit(self.batch_size))
+            if checkpoint["cursor"]:
+                query = query.start_after({"__name__": checkpoint["cursor"]})
+
+            docs = [doc async for doc in query.stream()]
+            if docs:
+                checkpoint["cursor"] = docs[-1].id
+            checkpoint["complete"] = len(docs) < self.batch_size
+
+            copied += await self._apply(user_id, {doc.id: doc.to_dict() for doc in docs}, [], checkpoint)
+            if checkpoint["complete"]:
+                return copied
+            await asyncio.sleep(self.pause)
+
+    async def _catch_up(self, user_id: str, checkpoint: dict) -> int:
+        """Phase 2: apply flat writes and deletes made since the checkpoint version."""
+        applied = 0
+        while True:
+            since = checkpoint["version"]
+            discovery_query = (self.discoveries_ref
+                    .where('user_id', '==', user_id)
+                    .where('version', '>', since)
+                    .order_by('version')
+                    .limit(self.batch_size))
+            tombstone_query = (self.tombstones_ref
+                    .where('user_id', '==', user_id)
+                    .where('version', '>', since)
+                    .order_by('version')
+                    .limit(self.batch_size))
+
+            docs = [doc async for doc in discovery_query.stream()]
+            tombstones = [
+                DiscoveryTombstone.from_firestore(doc.id, doc.to_dict())
+                async for doc in tombstone_query.stream()
+            ]
+
+            # Only advance to the lower end of a full page, so nothing in between is skipped
+            page_ends = []
+            if len(docs) == self.batch_size:
+                page_ends.append(docs[-1].get("version"))
+            if len(tombstones) == self.batch_size:
+                page_ends.append(tombstones[-1].version)
+            through = min(page_ends, default=None)
+            if through is not None:
+                docs = [doc for doc in docs if doc.get("version") <= through]
+                tombstones = [t for t in tombstones if t.version <= through]
+
+            versions = [doc.get("version") for doc in docs] + [t.version for t in tombstones]
+            if not versions:
+                return applied
+            checkpoint["version"] = max(versions)
+
+            applied += await self._apply(user_id, {doc.id: doc.to_dict() for doc in docs}, tombstones, checkpoint)
+            if through is None:
+                return applied
+            await asyncio.sleep(self.pause)
+
+    async def _apply(
+        self,
+        user_id: str,
+        documents: Dict[str, dict],
+        tombstones: List[DiscoveryTombstone],
+        checkpoint: dict
+    ) -> int:
+        """
+        Write one page of copies and deletes together with the checkpoint.
+        Nested documents with a higher version than the change are left alone.
+        """
+        targets = {
+            discovery_id: child_discoveries_ref(self.db, user_id, data.get("child_id")).document(discovery_id)
+            for discovery_id, data in documents.items()
+        }
+        targets.update({
+            t.discovery_id: child_discoveries_ref(self.db, user_id, t.child_id).document(t.discovery_id)
+            for t in tombstones
+            if t.discovery_id not in targets
+        })
+        nested_versions = {}
+        if targets:
+            async for snapshot in self.db.get_all(list(targets.values())):
+                if snapshot.exists:
+                    nested_versions[snapshot.id] = (snapshot.to_dict() or {}).get("version", 0)
+
+        batch = self.db.batch()
+        changed = 0
+        for discovery_id, data in documents.items():
+            if nested_versions.get(discovery_id, -1) > data.get("version", 0):
+                continue
+            batch.set(targets[discovery_id], {**data, "discovery_id": discovery_id})
+            changed += 1
+        for tombstone in tombstones:
+            if tombstone.discovery_id in nested_versions and nested_versions[tombstone.discovery_id] < tombstone.version:
+                batch.delete(targets[tombstone.discovery_id])
+                changed += 1
+
+        batch.set(self.checkpoints_ref.document(user_id), {**checkpoint, "updated_at": datetime.utcnow()})
+        await batch.commit()
+        return changed
+
+    async def verify_user(self, user_id: str) -> bool:
+        """
+        Compare the user's flat and nested discovery counts (aggregation queries).
+
+        Returns:
+            True if they match
+        """
+        async def count(layout: str) -> int:
+            queries = await user_discovery_queries(self.db, layout, user_id)
+            results = await asyncio.gather(*(query.count(alias="total").get() for query in queries))
+            return sum(int(result[0][0].value) for result in results if result)
+
+        flat, nested = await asyncio.gather(count("flat"), count("nested"))
+        if flat != nested:
+            logger.warning(f"User {user_id}: {flat} flat discoveries, {nested} nested")
+        return flat == nested
+
+
+async def migrate(
+    user_ids: Optional[List[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pause: float = 0.0,
+    verify: bool = False
+) -> int:
+    """
+    Migrate (or verify) the given users, or every user when None.
+
+    Returns:
+        Number of users migrated (or verified as matching)
+    """
+    migration = LayoutMigration(batch_size, pause)
+
+    if user_ids is None:
+        users_ref = FirebaseConfig.get_async_firestore().collection('users')
+        user_ids = [doc.id async for doc in users_ref.list_documents()]
+
+    done = 0
+    for user_id in user_ids:
+        try:
+            if verify:
+                done += await migration.verify_user(user_id)
+            else:
+                await migration.migrate_user(user_id)
+                done += 1
+        except Exception as e:
+            logger.error(f"Skipping {user_id}: {str(e)}")
+
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Copy discoveries into the nested Firestore layout")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user", action="append", help="Firebase UID (repeatable)")
+    target.add_argument("--all", action="store_true", help="Every user in the users collection")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds between pages")
+    parser.add_argument("--verify", action="store_true", help="Compare counts instead of copying")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    done = asyncio.run(migrate(None if args.all else args.user, args.batch_size, args.pause, args.verify))
+    logger.info(f"{'Verified' if args.verify else 'Migrated'} {done} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Child Context Rebuild
+Regenerates denormalized child context documents (`child_contexts/{uid}`)
+from the user document and discovery history.
+
+Usage (from backend/):
+    python -m app.tools.rebuild_child_context --user <uid>
+    python -m app.tools.rebuild_child_context --all
+
+Contexts go to the configured REPOSITORY_BACKEND; --all lists users from the
+Firestore users collection.
+"""
+from app.config.firebase_config import FirebaseConfig
+from app.repositories.factory import get_child_context_repository
+import argparse
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild(user_ids=None) -> int:
+    """
+    Rebuild contexts for the given users, or for every user when None.
+
+    Returns:
+        Number of contexts rebuilt
+    """
+    child_context_repo = get_child_context_repository()
+
+    if user_ids is None:
+        users_ref = FirebaseConfig.get_async_firestore().collection('users')
+        user_ids = [doc.id async for doc in users_ref.list_documents()]
+
+    rebuilt = 0
+    for user_id in user_ids:
+        try:
+            await child_context_repo.rebuild(user_id)
+            rebuilt += 1
+        except Exception as e:
+            logger.error(f"Skipping {user_id}: {str(e)}")
+
+    return rebuilt
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild denormalized child context documents")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user", action="append", help="Firebase UID (repeatable)")
+    target.add_argument("--all", action="store_true", help="Every user in the users collection")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rebuilt = asyncio.run(rebuild(None if args.all else args.user))
+    logger.info(f"Rebuilt {rebuilt} child contexts")
+
+
+if __name__ == "__main__":
+    main()
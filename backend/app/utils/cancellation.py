@@ -0,0 +1,112 @@
+"""
+Request Cancellation
+Cancels in-flight agent work when the HTTP client goes away, and records how
+much upstream work that saved.
+"""
+from contextvars import ContextVar
+from typing import Any, Awaitable, List, Optional
+from fastapi import Request
+from app.utils.metrics import metrics
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How often to check whether the client is still connected
+DISCONNECT_POLL_SECONDS = 0.25
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client disconnected and its work was cancelled."""
+
+
+class AgentWorkLedger:
+    """Per-request record of which agent calls started, finished or were cancelled."""
+
+    def __init__(self):
+        self.started: List[str] = []
+        self.completed: List[str] = []
+        self.cancelled: List[str] = []
+
+
+_current_ledger: ContextVar[Optional[AgentWorkLedger]] = ContextVar("agent_work_ledger", default=None)
+
+
+async def track_agent(agent_name: str, call: Awaitable[Any]) -> Any:
+    """
+    Await an agent call, counting it as started/completed/cancelled.
+    Wrap every agent coroutine handed to asyncio.gather with this.
+    """
+    ledger = _current_ledger.get()
+    if ledger is not None:
+        ledger.started.append(agent_name)
+    metrics.increment("agent_calls_started")
+
+    try:
+        result = await call
+    except asyncio.CancelledError:
+        if ledger is not None:
+            ledger.cancelled.append(agent_name)
+        metrics.increment("agent_calls_cancelled")
+        raise
+
+    if ledger is not None:
+        ledger.completed.append(agent_name)
+    metrics.increment("agent_calls_completed")
+    return result
+
+
+async def run_until_disconnected(
+    request: Request,
+    work: Awaitable[Any],
+    expected_agent_calls: int = 0
+) -> Any:
+    """
+    Run `work` as a task, cancelling it if the client disconnects first.
+
+    Cancelling the task cancels the whole orchestrator tree: asyncio.gather
+    cancels its children, and GeminiClient's native async calls abort the
+    upstream HTTP request.
+
+    Args:
+        request: Incoming request to watch
+        work: Coroutine to run
+        expected_agent_calls: Agent calls the work would make if it ran to
+            completion; the ones never started are counted as skipped
+
+    Returns:
+        The result of `work`
+
+    Raises:
+        ClientDisconnected: If the client went away and the work was cancelled
+    """
+    ledger = AgentWorkLedger()
+    token = _current_ledger.set(ledger)
+    try:
+        task = asyncio.ensure_future(work)  # copies the context, ledger included
+    finally:
+        _current_ledger.reset(token)
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                break
+    except asyncio.CancelledError:
+        # The server cancelled us (shutdown, or its own disconnect handling)
+        task.cancel()
+        raise
+
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    skipped = max(expected_agent_calls - len(ledger.started), 0)
+    metrics.increment("requests_cancelled")
+    metrics.increment("agent_calls_skipped", skipped)
+    logger.info(
+        f"Client disconnected from {request.url.path}: cancelled {len(ledger.cancelled)} "
+        f"in-flight agent calls, skipped {skipped} more"
+    )
+    raise ClientDisconnected()
@@ -0,0 +1,241 @@
+"""
+Response Compression
+ASGI middleware that compresses text responses (gzip, or brotli when the
+`brotli` package is installed) and adds strong ETags to GET responses.
+
+- The encoding is negotiated from Accept-Encoding. Brotli is preferred when
+  the client accepts it.
+- Buffered responses under `minimum_size` bytes are sent as they are.
+  Streaming responses are compressed chunk by chunk and flushed after each
+  chunk, so NDJSON and similar streams still arrive incrementally.
+- Buffered 200 responses to GET/HEAD without an ETag get a strong one: a
+  hash of the uncompressed body, suffixed with the encoding when compressed.
+  A matching If-None-Match is answered with an empty 304. Weak version
+  ETags set by the endpoints (app/utils/etag.py) are left as they are.
+- Images and other already-compressed types pass through untouched.
+
+Bytes before and after compression are counted at /metrics.
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.metrics import metrics
+from typing import Optional
+import hashlib
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Content types worth compressing (prefix match on the media type)
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/"
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header, or None for identity.
+    Codings with q=0 are refused. "*" accepts either.
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(candidates, key=lambda coding: accepted.get(coding, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+def _is_compressible(headers: MutableHeaders) -> bool:
+    if "content-encoding" in headers:
+        return False
+    if "no-transform" in headers.get("cache-control", ""):
+        return False
+    return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+
+def _etag_key(tag: str) -> str:
+    """ETag with the weak prefix, quotes and encoding suffix removed (for comparison)."""
+    tag = tag.strip().removeprefix("W/").strip('"')
+    for suffix in ("-br", "-gzip"):
+        tag = tag.removesuffix(suffix)
+    return tag
+
+
+class _Compressor:
+    """Streaming gzip/brotli compressor."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush, so the peer can decode everything sent so far."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._gzip.compress(data) + self._gzip.flush()
+
+
+class CompressionMiddleware:
+    """Content-negotiated compression and strong ETags (see module docstring)."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        encoding = negotiate_encoding(request_headers.get("accept-encoding", ""))
+        conditional = scope["method"] in ("GET", "HEAD")
+        if encoding is None and not conditional:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _Responder(self, send, encoding, conditional, request_headers.get("if-none-match"))
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    """Per-request send() wrapper: holds the start message until the first body chunk."""
+
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        send: Send,
+        encoding: Optional[str],
+        conditional: bool,
+        if_none_match: Optional[str]
+    ):
+        self.middleware = middleware
+        self._send = send
+        self.encoding = encoding
+        self.conditional = conditional
+        self.if_none_match = if_none_match
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.started = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = {**message, "headers": list(message.get("headers", []))}
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.started:
+            await self._body_chunk(message)
+            return
+        self.started = True
+
+        body = message.get("body", b"")
+        if message.get("more_body", False):
+            await self._start_stream(body)
+        else:
+            await self._send_buffered(body)
+
+    async def _send_buffered(self, body: bytes) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        status = self.start["status"]
+        compressible = _is_compressible(headers)
+        encoding = self.encoding if compressible and len(body) >= self.middleware.minimum_size else None
+
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+
+        if self.conditional and status == 200 and "etag" not in headers:
+            tag = hashlib.sha256(body).hexdigest()[:32]
+            headers["ETag"] = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+        elif encoding and headers.get("etag", "W/").startswith('"'):
+            # A strong ETag names one representation; give the compressed one its own
+            headers["ETag"] = headers["etag"][:-1] + f'-{encoding}"'
+
+        if self.conditional and status == 200 and self._not_modified(headers.get("etag")):
+            metrics.increment("http_not_modified")
+            for name in ("content-length", "content-type"):
+                del headers[name]
+            await self._send({**self.start, "status": 304})
+            await self._send({"type": "http.response.body", "body": b""})
+            return
+
+        if encoding:
+            compressed = _Compressor(encoding, self.middleware.gzip_level, self.middleware.brotli_quality).finish(body)
+            metrics.increment("compression_bytes_in", len(body))
+            metrics.increment("compression_bytes_out", len(compressed))
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            body = compressed
+
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": body})
+
+    async def _start_stream(self, body: bytes) -> None:
+        headers = MutableHeaders(raw=self.start["headers"])
+        if _is_compressible(headers):
+            headers.add_vary_header("Accept-Encoding")
+            if self.encoding:
+                self.compressor = _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+                headers["Content-Encoding"] = self.encoding
+                del headers["content-length"]
+                if headers.get("etag", "W/").startswith('"'):
+                    del headers["etag"]
+
+        await self._send(self.start)
+        await self._body_chunk({"type": "http.response.body", "body": body, "more_body": True})
+
+    async def _body_chunk(self, message: Message) -> None:
+        if self.compressor is None:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        compressed = self.compressor.chunk(body) if more_body else self.compressor.finish(body)
+        metrics.increment("compression_bytes_in", len(body))
+        metrics.increment("compression_bytes_out", len(compressed))
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _not_modified(self, etag: Optional[str]) -> bool:
+        if not etag or not self.if_none_match:
+            return False
+        if self.if_none_match.strip() == "*":
+            return True
+        key = _etag_key(etag)
+        return any(_etag_key(candidate) == key for candidate in self.if_none_match.split(","))
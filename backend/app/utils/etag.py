@@ -0,0 +1,47 @@
+"""
+Version ETags
+Conditional GET support for endpoints whose response is a function of a
+user's discovery change version (see DiscoveryRepository.get_version).
+
+Check the version first (one point read); if the client's If-None-Match
+still matches, answer 304 without running the list queries.
+"""
+from fastapi import Request, Response
+import hashlib
+
+# Browsers may store private responses but must revalidate before reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+def version_etag(user_id: str, version: int, *params) -> str:
+    """
+    Weak ETag for a response derived from `version` and the query parameters.
+    The user ID is hashed in so tags never collide across accounts.
+    """
+    key = "\x1f".join(str(part) for part in (user_id, version, *params))
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match names this ETag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    tag = etag.removeprefix("W/")
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(candidate == "*" or candidate.removeprefix("W/") == tag for candidate in candidates)
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Attach the ETag and revalidation policy to a response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a matching conditional request."""
+    response = Response(status_code=304)
+    set_etag(response, etag)
+    return response
@@ -6,20 +6,28 @@ import os
 from google import genai
 from google.genai import types
 from typing import Optional, Dict, Any, List
+from app.utils.metrics import metrics
 import asyncio
 import base64
 from functools import wraps
 import json
 
 
+class MalformedResponseError(ValueError):
+    """The model answered, but not in the expected shape. Not retried: the
+    same request would cost as much again and likely fail the same way."""
+
+
 def async_retry(max_retries: int = 3, delay: float = 1.0):
-    """Decorator to retry async functions on failure."""
+    """Decorator to retry async functions on failure (except MalformedResponseError)."""
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             for attempt in range(max_retries):
                 try:
                     return await func(*args, **kwargs)
+                except MalformedResponseError:
+                    raise
                 except Exception as e:
                     if attempt == max_retries - 1:
                         raise
@@ -63,6 +71,21 @@ class GeminiClient:
         self._client = genai.Client(api_key=self.api_key)
         self._initialized = True
         
+    async def _generate_content(self, contents: Any, config: types.GenerateContentConfig):
+        """Call the model through the SDK's async client, counting cancellations."""
+        metrics.increment("gemini_calls_started")
+        try:
+            response = await self._client.aio.models.generate_content(
+                model=self.model_name,
+                contents=contents,
+                config=config
+            )
+        except asyncio.CancelledError:
+            metrics.increment("gemini_calls_cancelled")
+            raise
+        metrics.increment("gemini_calls_completed")
+        return response
+
     @async_retry(max_retries=3)
     async def generate_async(
         self,
@@ -99,15 +122,8 @@ class GeminiClient:
         config = types.GenerateContentConfig(**config_params)
         
         # Run generation in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: self._client.models.generate_content(
-                model=self.model_name,
-                contents=prompt,
-                config=config
-            )
-        )
+        # Native async call: cancelling the awaiting task aborts the HTTP request
+        response = await self._generate_content(prompt, config)
         
         return response.text
     
@@ -195,15 +211,8 @@ class GeminiClient:
         )
         text_part = types.Part.from_text(text=schema_prompt)
 
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: self._client.models.generate_content(
-                model=self.model_name,
-                contents=[image_part, text_part],
-                config=config,
-            ),
-        )
+        # Native async call: cancelling the awaiting task aborts the HTTP request
+        response = await self._generate_content([image_part, text_part], config)
 
         response_text = response.text
         if "```json" in response_text:
@@ -213,6 +222,112 @@ class GeminiClient:
 
         return json.loads(response_text)
 
+    @async_retry(max_retries=3)
+    async def generate_with_images(
+        self,
+        images_base64: List[str],
+        prompt: str,
+        schema: Dict[str, Any],
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.7,
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate one structured output per image in a single multimodal call.
+
+        Images are labelled "Image 1", "Image 2", ... and the model is asked for
+        a JSON array with exactly one `schema` object per image, in order.
+
+        Args:
+            images_base64: Base64-encoded JPEG/PNG strings (with or without data: prefix)
+            prompt: The text prompt to send alongside the images
+            schema: JSON schema for each array element
+            system_instruction: System instruction for the model
+            temperature: Sampling temperature
+
+        Returns:
+            List of parsed JSON dicts, one per image
+
+        Raises:
+            MalformedResponseError: If the model does not return one result per
+                image (raised at once; callers fall back to per-image calls)
+        """
+        self._ensure_initialized()
+
+        schema_prompt = (
+            f"{prompt}\n\nYou are given {len(images_base64)} images. "
+            f"Respond ONLY with a valid JSON array of exactly {len(images_base64)} objects, "
+            f"one per image in the order given, each matching this schema:\n{schema}"
+        )
+
+        config_params: Dict[str, Any] = {
+            "temperature": temperature,
+            "max_output_tokens": 1024 * len(images_base64),
+        }
+        if system_instruction:
+            config_params["system_instruction"] = system_instruction
+        config = types.GenerateContentConfig(**config_params)
+
+        contents: List[Any] = []
+        for i, image_base64 in enumerate(images_base64):
+            if "," in image_base64:
+                image_base64 = image_base64.split(",", 1)[1]
+            contents.append(types.Part.from_text(text=f"Image {i + 1}:"))
+            contents.append(types.Part.from_bytes(
+                data=base64.b64decode(image_base64),
+                mime_type="image/jpeg",
+            ))
+        contents.append(types.Part.from_text(text=schema_prompt))
+
+        # Native async call: cancelling the awaiting task aborts the HTTP request
+        response = await self._generate_content(contents, config)
+
+        response_text = response.text
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0].strip()
+
+        results = json.loads(response_text)
+        if isinstance(results, dict):
+            results = results.get("results", [results])
+        if not isinstance(results, list) or len(results) != len(images_base64):
+            raise MalformedResponseError(
+                f"Expected {len(images_base64)} results, got "
+                f"{len(results) if isinstance(results, list) else type(results).__name__}"
+            )
+
+        return results
+
+    @async_retry(max_retries=3)
+    async def embed_texts(
+        self,
+        texts: List[str],
+        model: str = "gemini-embedding-001",
+        task_type: str = "RETRIEVAL_DOCUMENT",
+        dimensions: int = 768,
+    ) -> List[List[float]]:
+        """
+        Embed several texts in one request.
+
+        Args:
+            texts: Texts to embed (the API takes up to 100 per request)
+            model: Embedding model
+            task_type: RETRIEVAL_DOCUMENT, RETRIEVAL_QUERY, SEMANTIC_SIMILARITY, ...
+            dimensions: Output dimensionality
+
+        Returns:
+            One vector per text, in order
+        """
+        self._ensure_initialized()
+
+        metrics.increment("gemini_embed_calls")
+        response = await self._client.aio.models.embed_content(
+            model=model,
+            contents=texts,
+            config=types.EmbedContentConfig(task_type=task_type, output_dimensionality=dimensions)
+        )
+        return [embedding.values for embedding in response.embeddings]
+
 
 # Global client instance (lazy-initialized)
 _gemini_client: Optional[GeminiClient] = None
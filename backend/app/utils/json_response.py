@@ -0,0 +1,23 @@
+"""
+Fast JSON Responses
+Serializes response content, Pydantic models included, straight to bytes.
+
+For a returned dict, FastAPI runs jsonable_encoder (a recursive Python walk
+over every value) and then json.dumps. Repository reads add a model_dump()
+per record before that. FastJSONResponse replaces all three with one call
+into pydantic-core's compiled serializer, which writes models, datetimes and
+plain containers directly.
+
+Return it from the endpoint. Naming it as response_class isn't enough,
+because FastAPI would still run jsonable_encoder over the content first.
+"""
+from fastapi.responses import JSONResponse
+from typing import Any
+import pydantic_core
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that accepts models anywhere in the content."""
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
@@ -0,0 +1,36 @@
+"""
+In-process Metrics
+Lightweight counters for operational visibility, exposed at /metrics.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict
+import threading
+
+
+class Metrics:
+    """Thread-safe named counters."""
+
+    def __init__(self):
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._lock = threading.Lock()
+        self.started_at = datetime.utcnow()
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        """Add `amount` to counter `name`."""
+        with self._lock:
+            self._counters[name] += amount
+
+    def get(self, name: str) -> float:
+        """Current value of a counter (0 if never incremented)."""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Copy of all counters."""
+        with self._lock:
+            return dict(self._counters)
+
+
+# Global metrics registry
+metrics = Metrics()
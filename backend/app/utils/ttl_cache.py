@@ -0,0 +1,75 @@
+"""
+TTL Cache
+Small in-process cache with per-entry expiry and LRU eviction.
+"""
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+from app.utils.metrics import metrics
+import threading
+import time
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """
+    Maps keys to values for `ttl_seconds`, holding at most `max_entries`.
+
+    Hits and misses are counted in the metrics registry as
+    `<name>_cache_hits` / `<name>_cache_misses`.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000, name: str = "cache"):
+        """
+        Initialize cache.
+
+        Args:
+            ttl_seconds: How long an entry stays valid (0 disables caching)
+            max_entries: Entries kept before the least recently used is evicted
+            name: Prefix for the hit/miss metrics
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.name = name
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                metrics.increment(f"{self.name}_cache_hits")
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+
+        metrics.increment(f"{self.name}_cache_misses")
+        return None
+
+    def set(self, key: Hashable, value: V, ttl_seconds: Optional[float] = None) -> None:
+        """Cache a value, optionally with its own TTL."""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop one entry."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -18,6 +18,7 @@ interface Discovery {
     story: string;
     favorite: boolean;
     image_url?: string;
+    thumbnail_url?: string;
 }
 
 export function DiscoveryHistory() {
@@ -99,6 +99,20 @@ export const userAPI = {
             body: JSON.stringify(preferences)
         });
         return handleResponse(response);
+    },
+
+    /**
+     * Delete the current user's account and data.
+     * Runs as a background job; returns { job_id, status } to follow.
+     * The Firebase Auth account itself is deleted by the caller.
+     */
+    async deleteAccount() {
+        const headers = await getAuthHeaders();
+        const response = await fetch(`${API_BASE_URL}/api/users/me`, {
+            method: 'DELETE',
+            headers
+        });
+        return handleResponse(response);
     }
 };
 
@@ -132,23 +146,38 @@ export const discoveryAPI = {
 
     /**
      * Get discovery history (requires auth).
+     * Pass the previous response's `next_cursor` as `cursor` for the next page.
      */
     async getHistory(params?: {
         child_id?: string;
         limit?: number;
         page?: number;
+        cursor?: string;
+        view?: 'full' | 'summary';
     }) {
         const headers = await getAuthHeaders();
         const queryParams = new URLSearchParams();
         if (params?.child_id) queryParams.set('child_id', params.child_id);
         if (params?.limit) queryParams.set('limit', params.limit.toString());
         if (params?.page) queryParams.set('page', params.page.toString());
+        if (params?.cursor) queryParams.set('cursor', params.cursor);
+        if (params?.view) queryParams.set('view', params.view);
 
         const url = `${API_BASE_URL}/api/discoveries${queryParams.toString() ? '?' + queryParams.toString() : ''}`;
         const response = await fetch(url, { headers });
         return handleResponse(response);
     },
 
+    /**
+     * Get the full record for one discovery (requires auth).
+     * Use with `view: 'summary'` lists to load stories on demand.
+     */
+    async get(discoveryId: string) {
+        const headers = await getAuthHeaders();
+        const response = await fetch(`${API_BASE_URL}/api/discoveries/${discoveryId}`, { headers });
+        return handleResponse(response);
+    },
+
     /**
      * Get recent discoveries (requires auth).
      */
@@ -171,6 +200,57 @@ export const discoveryAPI = {
         return handleResponse(response);
     },
 
+    /**
+     * Get changes since a version (requires auth).
+     * Apply `discoveries` and `deleted` in order, then pass the returned
+     * `version` as `since`; repeat while `has_more` is true.
+     */
+    async getChanges(since: number, limit?: number) {
+        const headers = await getAuthHeaders();
+        const queryParams = new URLSearchParams({ since: since.toString() });
+        if (limit) queryParams.set('limit', limit.toString());
+
+        const response = await fetch(`${API_BASE_URL}/api/discoveries/changes?${queryParams.toString()}`, {
+            headers
+        });
+        return handleResponse(response);
+    },
+
+    /**
+     * Download the whole discovery history as an NDJSON file (requires auth).
+     * Set `compress` for a .ndjson.gz file.
+     */
+    async exportHistory(params?: {
+        child_id?: string;
+        images?: 'reference' | 'none';
+        compress?: boolean;
+    }): Promise<Blob> {
+        const headers = await getAuthHeaders();
+        const queryParams = new URLSearchParams();
+        if (params?.child_id) queryParams.set('child_id', params.child_id);
+        if (params?.images) queryParams.set('images', params.images);
+        if (params?.compress) queryParams.set('compress', 'true');
+
+        const url = `${API_BASE_URL}/api/discoveries/export${queryParams.toString() ? '?' + queryParams.toString() : ''}`;
+        const response = await fetch(url, { headers });
+        if (!response.ok) {
+            throw new Error(`Export failed with status ${response.status}`);
+        }
+        return response.blob();
+    },
+
+    /**
+     * Delete a discovery (requires auth).
+     */
+    async delete(discoveryId: string) {
+        const headers = await getAuthHeaders();
+        const response = await fetch(`${API_BASE_URL}/api/discoveries/${discoveryId}`, {
+            method: 'DELETE',
+            headers
+        });
+        return handleResponse(response);
+    },
+
     /**
      * Toggle favorite status (requires auth).
      */
@@ -218,6 +298,29 @@ export const statsAPI = {
     }
 };
 
+/**
+ * Dashboard API — profile, children, history, recent, favorites and stats in one request
+ */
+export const dashboardAPI = {
+    async get(params?: {
+        child_id?: string;
+        limit?: number;
+        days?: number;
+        view?: 'full' | 'summary';
+    }) {
+        const headers = await getAuthHeaders();
+        const queryParams = new URLSearchParams();
+        if (params?.child_id) queryParams.set('child_id', params.child_id);
+        if (params?.limit) queryParams.set('limit', params.limit.toString());
+        if (params?.days) queryParams.set('days', params.days.toString());
+        if (params?.view) queryParams.set('view', params.view);
+
+        const url = `${API_BASE_URL}/api/dashboard${queryParams.toString() ? '?' + queryParams.toString() : ''}`;
+        const response = await fetch(url, { headers });
+        return handleResponse(response);
+    }
+};
+
 /**
  * Health check
  */
@@ -231,6 +334,7 @@ export default {
     discoveryAPI,
     chatAPI,
     statsAPI,
+    dashboardAPI,
     healthCheck,
     registerAuthTokenGetter
 };